@@ -1,9 +1,16 @@
+import importlib.metadata
 import logging
 import os
+import pickle
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
 
 import dateparser
 import pandas
 import pytest
+import torch
 from fbprophet import Prophet
 
 from pandas import Series, DataFrame
@@ -12,12 +19,15 @@ import numpy as np
 from scipy.stats import yeojohnson
 
 from timexseries.data_prediction.models.arima_predictor import ARIMAModel
-from timexseries.data_prediction.models.lstm_predictor import LSTMModel
+from timexseries.data_prediction.models import arima_predictor, lstm_predictor
+from timexseries.data_prediction.models.lstm_inference import load_lstm
+from timexseries.data_prediction.models.lstm_predictor import LSTMModel, split_sequences
 from timexseries.data_prediction.models.mockup_predictor import MockUpModel
-from timexseries.data_prediction.models.predictor import ModelResult
+from timexseries.data_prediction.models.predictor import ModelResult, ResultTable, SingleResult
+from timexseries.data_prediction.validation_performances import ValidationPerformance, ErrorAccumulator
 from timexseries.data_prediction.xcorr import calc_xcorr, calc_all_xcorr
 
-from tests.utilities import get_fake_df
+from tests.utilities import get_fake_df, timed_sleep, shared_after, SlowMockUpModel
 from timexseries.data_ingestion import add_freq
 # from timexseries.data_prediction.models.neuralprophet_predictor import NeuralProphetModel
 
@@ -25,9 +35,16 @@ from timexseries.data_ingestion import add_freq
 # from timexseries.data_prediction import LSTM_model
 # from timexseries.data_prediction import MockUpModel
 from timexseries.data_prediction.pipeline import prepare_extra_regressor, get_best_univariate_predictions, \
-    get_best_multivariate_predictions, compute_historical_predictions, get_best_predictions, create_timeseries_containers
+    get_best_multivariate_predictions, compute_historical_predictions, get_best_predictions, create_timeseries_containers, \
+    model_factory, launch_models
+from timexseries.data_prediction.models import registry
 from timexseries.data_prediction.models.prophet_predictor import FBProphetModel, suppress_stdout_stderr
+from timexseries.data_prediction.training_pool import TrainingPool, SharedFrame, share_frame, read_frame, unlink_frame, \
+    run_steps, MemoryEstimator, JobTimeout, JobCancelled, job_time_left
+from timexseries.data_prediction.config import compile_config, default_model_parameters, ConfigurationError, Config
+from timexseries.data_prediction.fit_cache import FitCache, fit_key
 from timexseries.data_prediction.transformation import transformation_factory, Identity
+from timexseries.data_prediction.window_search import window_search_factory
 from timexseries.timeseries_container import TimeSeriesContainer
 
 xcorr_modes = ['pearson', 'kendall', 'spearman', 'matlab_normalized']
@@ -138,6 +155,70 @@ class TestTransformations:
         assert str(tr) == f"differentiate (1)"
 
 
+class TestWindowSearch:
+    @staticmethod
+    def run_search(search, errors):
+        evaluated = []
+        windows = search.ask()
+        while len(windows) > 0:
+            for w in windows:
+                assert w not in evaluated
+                evaluated.append(w)
+                search.tell(w, errors[w])
+            windows = search.ask()
+        return evaluated
+
+    def test_exhaustive(self):
+        search = window_search_factory("exhaustive", 10, batch_size=3)
+        assert self.run_search(search, [1.0] * 10) == [*range(0, 10)]
+
+    @pytest.mark.parametrize(
+        "batch_size,expected",
+        [(1, [0, 1, 2, 3, 4, 5]),
+         (2, [0, 1, 2, 3, 4, 5]),
+         (4, [0, 1, 2, 3, 4, 5, 6, 7])]
+    )
+    def test_patience(self, batch_size, expected):
+        # Error decreases till window 3, then increases.
+        errors = [5.0, 4.0, 3.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+        search = window_search_factory("patience", 10, batch_size=batch_size, patience=2)
+        assert self.run_search(search, errors) == expected
+
+    def test_successive_halving(self):
+        # Error is minimum in window 63; successive halving should find it evaluating a fraction of the windows.
+        errors = [abs(w - 63) + 1.0 for w in range(0, 100)]
+        search = window_search_factory("successive_halving", 100, eta=3)
+        evaluated = self.run_search(search, errors)
+
+        assert 63 in evaluated
+        assert len(evaluated) < 30
+
+    def test_successive_halving_few_windows(self):
+        search = window_search_factory("successive_halving", 3, eta=3)
+        assert sorted(self.run_search(search, [1.0, 2.0, 3.0])) == [0, 1, 2]
+
+    @pytest.mark.parametrize(
+        "ratio,windows_number,expected",
+        [(2, 100, [0, 1, 3, 7, 15, 31, 63, 99]),
+         (2, 3, [0, 1, 2]),
+         (1.5, 10, [0, 1, 2, 3, 5, 7, 9])]
+    )
+    def test_geometric(self, ratio, windows_number, expected):
+        search = window_search_factory("geometric", windows_number, ratio=ratio)
+        assert self.run_search(search, [1.0] * windows_number) == expected
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 4])
+    @pytest.mark.parametrize("minimum", [0, 37, 63, 999])
+    def test_golden_section(self, batch_size, minimum):
+        # Unimodal error: the minimum is found with a logarithmic number of evaluations.
+        errors = [abs(w - minimum) + 1.0 for w in range(0, 1000)]
+        search = window_search_factory("golden_section", 1000, batch_size=batch_size)
+        evaluated = self.run_search(search, errors)
+
+        assert minimum in evaluated
+        assert len(evaluated) <= 30
+
+
 class Test_Xcorr:
     def test_calc_xcorr_1(self):
         # Example from https://www.mathworks.com/help/matlab/ref/xcorr.html, slightly modified
@@ -430,6 +511,522 @@ class Test_Models_General:
 
             assert len(expected_train_set_lengths) == 0
 
+    @pytest.mark.parametrize(
+        "n_threads,expected_windows",
+        [(1, 3), (2, 4), (4, 4)]
+    )
+    def test_launch_model_window_search(self, n_threads, expected_windows):
+        # MockUp model has the same error on every window: the patience search should stop as soon as possible.
+        param_config = {
+            "model_parameters": {
+                "test_values": 2,
+                "delta_training_percentage": 10,
+                "prediction_lags": 10,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae",
+                "window_search": "patience",
+                "window_search_patience": 2
+            },
+        }
+
+        df = get_fake_df(100)
+        predictor = MockUpModel(param_config)
+        model_result = predictor.launch_model(df.copy(), max_threads=n_threads)
+
+        assert len(model_result.results) == expected_windows
+        assert model_result.characteristics["window_search"] == "patience"
+        assert model_result.characteristics["evaluated_windows"] == expected_windows
+
+        # Windows are stored from the shortest to the longest.
+        lengths = [len(df.loc[r.testing_performances.first_used_index:]) for r in model_result.results]
+        assert lengths == [12 + 10 * i for i in range(0, expected_windows)]
+
+    def test_launch_model_warm_start(self):
+        # MockUp fitted parameters are the length of its training set.
+        class RecordingMockUp(MockUpModel):
+            def train(self, input_data, extra_regressors=None):
+                super().train(input_data, extra_regressors)
+                self.trainings = getattr(self, "trainings", []) + [(len(input_data), self.initial_parameters)]
+
+        param_config = {
+            "model_parameters": {
+                "test_values": 2,
+                "delta_training_percentage": 20,
+                "prediction_lags": 10,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae",
+                "warm_start": True
+            },
+        }
+
+        df = get_fake_df(30)
+        predictor = RecordingMockUp(param_config)
+        model_result = predictor.launch_model(df.copy(), max_threads=1)
+
+        # Each window starts from the previous one; the last training from the best window.
+        assert predictor.trainings[:5] == [(6, None), (12, 6), (18, 12), (24, 18), (28, 24)]
+        best_index = model_result.table.first_used_index[model_result.table.best("mae")]
+        assert predictor.trainings[5] == (len(df.loc[best_index:]), len(df.iloc[:-2].loc[best_index:]))
+
+        # In parallel, each wave starts from the nearest evaluated window.
+        predictor = MockUpModel(param_config)
+        parallel_result = predictor.launch_model(df.copy(), max_threads=2)
+        assert sorted(predictor.window_parameters.values()) == [6, 12, 18, 24, 28]
+        assert np.array_equal(parallel_result.table.first_used_index, model_result.table.first_used_index)
+
+    def test_launch_model_fit_cache(self, tmp_path):
+        class CountingMockUp(MockUpModel):
+            def train(self, input_data, extra_regressors=None):
+                super().train(input_data, extra_regressors)
+                self.trainings = getattr(self, "trainings", 0) + 1
+
+        param_config = {
+            "model_parameters": {
+                "test_values": 2,
+                "delta_training_percentage": 20,
+                "prediction_lags": 10,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae",
+                "fit_cache": str(tmp_path / "cache")
+            },
+        }
+
+        df = get_fake_df(30)
+        predictor = CountingMockUp(param_config)
+        model_result = predictor.launch_model(df.copy())
+        assert predictor.trainings == 6
+        assert predictor.fit_cache.stats()["entries"] == 6
+
+        # Same model, parameters and data: nothing is trained again, serially or in parallel.
+        for max_threads in [1, 2]:
+            predictor = CountingMockUp(param_config)
+            cached_result = predictor.launch_model(df.copy(), max_threads=max_threads)
+            assert getattr(predictor, "trainings", 0) == 0
+            assert cached_result.best_prediction.equals(model_result.best_prediction)
+            assert np.array_equal(cached_result.table.metrics, model_result.table.metrics)
+        assert predictor.fit_cache.hit_rate == 12 / 18
+
+        # Different data or parameters give different keys.
+        predictor = CountingMockUp(param_config)
+        predictor.launch_model(df.copy() + 1)
+        assert predictor.trainings == 6
+
+        param_config["model_parameters"]["test_values"] = 3
+        predictor = CountingMockUp(param_config)
+        predictor.launch_model(df.copy())
+        assert predictor.trainings == 6
+
+        # The settings of the search and of the retention of the results do not change the fits.
+        search_config = {"model_parameters": {**param_config["model_parameters"], "window_search": "patience",
+                                              "window_search_patience": 2, "main_accuracy_estimator": "mse",
+                                              "results_retention": "metrics"}}
+        assert CountingMockUp(search_config)._fit_key(df) == CountingMockUp(param_config)._fit_key(df)
+
+    def test_fit_cache_eviction(self, tmp_path):
+        cache = FitCache(str(tmp_path))
+        for i in range(0, 5):
+            cache.put(fit_key(i), np.zeros(1000))
+            os.utime(cache._path(fit_key(i)), (i, i))
+
+        # Hits make an entry the most recently used.
+        assert cache.get(fit_key(0)) is not None
+        assert cache.get(fit_key(5)) is None
+
+        entry_size = cache.size() // 5
+        cache.evict(3 * entry_size)
+        assert [cache.get(fit_key(i)) is not None for i in range(0, 5)] == [True, False, False, True, True]
+        assert cache.stats()["entries"] == 3
+        assert cache.hits == 4 and cache.misses == 3
+
+        # With a maximum size, the directory is scanned once, then only when an eviction is due.
+        scans = []
+        cache = FitCache(str(tmp_path), max_size=5 * entry_size)
+        entries = cache.entries
+        cache.entries = lambda: scans.append(1) or entries()
+        cache.put(fit_key(5), np.zeros(1000))
+        cache.put(fit_key(6), np.zeros(1000))
+        assert len(scans) == 1
+        cache.put(fit_key(7), np.zeros(1000))
+        assert len(scans) == 2
+        assert cache.size() <= 5 * entry_size
+        assert cache.stats()["entries"] == 5 and cache.get(fit_key(7)) is not None
+
+
+class TestTrainingPool:
+    def test_training_pool_reuse(self):
+        # Workers are started once and re-used by all the following jobs.
+        with TrainingPool(2) as pool:
+            assert pool.run([(pow, (2, i)) for i in range(0, 5)]) == [1, 2, 4, 8, 16]
+            pids = set(pool.run([(os.getpid, ()) for _ in range(0, 6)]))
+            assert len(pool.workers) == 2
+            assert pids == set(w.pid for w in pool.workers)
+            assert pids == set(pool.run([(os.getpid, ()) for _ in range(0, 6)]))
+
+        assert len(pool.workers) == 0
+
+    def test_training_pool_error(self):
+        with TrainingPool(2) as pool:
+            with pytest.raises(ZeroDivisionError):
+                pool.run([(divmod, (1, 0)), (pow, (2, 2))])
+
+            # The pool is still usable.
+            assert pool.run([(pow, (2, 2))]) == [4]
+
+    def test_training_pool_costs(self):
+        # Most expensive jobs are executed first; results are still in the order of the jobs.
+        costs = [1, 5, 3, 4, 2]
+        with TrainingPool(1) as pool:
+            times = pool.run([(time.monotonic_ns, ()) for _ in costs], costs)
+
+        assert [costs[i] for i in np.argsort(times)] == [5, 4, 3, 2, 1]
+
+    def test_window_cost(self):
+        predictor = MockUpModel({})
+        predictor.delta_training_values = 10
+        assert predictor.window_cost(0) < predictor.window_cost(3)
+        assert ARIMAModel({}).cost_factor > FBProphetModel({}).cost_factor > MockUpModel({}).cost_factor
+
+    def test_shared_frame(self):
+        df = get_fake_df(20)
+        df["other"] = np.arange(0, 20, dtype=float)
+        shared = share_frame(df)
+        assert isinstance(shared, SharedFrame)
+
+        try:
+            # Read in this process, and in a worker which receives only the handle.
+            read = read_frame(shared)
+            assert read.equals(df)
+            assert read.index.freq == df.index.freq
+            with pytest.raises(ValueError):
+                read.iloc[0, 0] = 5.0
+
+            with TrainingPool(1) as pool:
+                assert pool.run([(read_frame, (shared, ))])[0].equals(df)
+        finally:
+            del read
+            unlink_frame(shared)
+
+        # Frames which can not be shared are returned as they are.
+        mixed = DataFrame({"a": [1, 2], "b": ["x", "y"]})
+        assert share_frame(mixed) is mixed
+        assert read_frame(mixed) is mixed
+
+    def test_launch_model_shared_pool(self):
+        param_config = {
+            "model_parameters": {
+                "test_values": 2,
+                "delta_training_percentage": 20,
+                "prediction_lags": 10,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae"
+            },
+        }
+
+        df = get_fake_df(30)
+        expected = MockUpModel(param_config).launch_model(df.copy(), max_threads=1)
+
+        with TrainingPool(3) as pool:
+            for _ in range(0, 2):
+                model_result = MockUpModel(param_config).launch_model(df.copy(), max_threads=3, pool=pool)
+
+                assert len(model_result.results) == len(expected.results)
+                assert np.array_equal(model_result.table.first_used_index, expected.table.first_used_index)
+                for r, e in zip(model_result.results, expected.results):
+                    assert r.prediction.equals(e.prediction)
+            assert len(pool.workers) == 3
+
+    def test_training_pool_run_steps(self):
+        # Each computation receives the results of its own batches, whatever the order of completion.
+        def powers(base, rounds):
+            total = 0
+            for i in range(0, rounds):
+                results = yield [(pow, (base, e), e) for e in range(i, i + 3)]
+                total += sum(results)
+            return total
+
+        expected = [sum(pow(b, e) for i in range(0, r) for e in range(i, i + 3)) for b, r in [(2, 3), (3, 1), (5, 2)]]
+        with TrainingPool(2) as pool:
+            assert pool.run_steps([powers(2, 3), powers(3, 1), powers(5, 2)]) == expected
+        assert run_steps(powers(5, 2)) == expected[2]
+
+    def test_training_pool_run_steps_failure(self, tmp_path):
+        # When a job fails, the queued jobs of its batch are cancelled and the running ones are waited for, before the
+        # computation is closed; the shared frames they return are unlinked.
+        closed = []
+
+        def computation():
+            try:
+                yield [(shared_after, (0.5, str(tmp_path / "shared")), 3), (int, ("x", ), 2),
+                       (os.mkdir, (str(tmp_path / "queued"), ), 1)]
+            finally:
+                closed.append(os.path.exists(tmp_path / "shared"))
+
+        with TrainingPool(2) as pool:
+            with pytest.raises(ValueError):
+                pool.run_steps([computation()])
+            assert pool.run([(pow, (2, 3))]) == [8]
+
+        assert closed == [True]
+        assert not os.path.exists(tmp_path / "queued")
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=(tmp_path / "shared").read_text())
+
+    @pytest.mark.parametrize("start_method", ["fork", "spawn"])
+    def test_training_pool_resource_policy(self, start_method):
+        cpus = sorted(os.sched_getaffinity(0))
+        with TrainingPool(2, threads_per_worker=1, cpu_affinity=True, start_method=start_method) as pool:
+            assert pool.run([(os.getenv, ("OMP_NUM_THREADS", )), (os.getenv, ("OPENBLAS_NUM_THREADS", ))]) == ["1", "1"]
+            affinities = pool.run([(os.sched_getaffinity, (0, )) for _ in range(0, 2)])
+            assert all(len(a) == 1 and a <= set(cpus) for a in affinities)
+
+            # Models can be trained by workers which do not share the memory of this process.
+            df = get_fake_df(20)
+            param_config = {"model_parameters": {"test_values": 2, "delta_training_percentage": 20,
+                                                 "prediction_lags": 5, "transformation": "none",
+                                                 "main_accuracy_estimator": "mae"}}
+            model_result = MockUpModel(param_config).launch_model(df, max_threads=2, pool=pool)
+            assert len(model_result.results) == 5
+
+    def test_memory_estimator(self):
+        estimator = MemoryEstimator()
+        assert estimator.estimate("fit", 10) is None
+
+        estimator.update("fit", 10, 100)
+        estimator.update("fit", 20, 300)
+        assert estimator.estimate("fit", 10) == 100 + 10 * 10
+        assert estimator.estimate("fit", 40) == 100 + 10 * 40
+        assert estimator.estimate("other", 10) is None
+
+    @pytest.mark.parametrize("memory_limit,overlap", [(None, True), (1, False)])
+    def test_training_pool_memory_limit(self, memory_limit, overlap):
+        # With a memory limit lower than the footprint of a worker, jobs can only run one at a time.
+        with TrainingPool(2, memory_limit=memory_limit) as pool:
+            pool.run([(timed_sleep, (0.0, ))])
+            times = sorted(pool.run([(timed_sleep, (0.5, )) for _ in range(0, 2)]))
+            assert len(pool.memory.observations) == 1
+
+        assert (times[1][0] < times[0][1]) == overlap
+
+    def test_training_pool_timeout(self, caplog):
+        with TrainingPool(2, job_timeout=0.5) as pool:
+            start = time.monotonic()
+            results = pool.run([(timed_sleep, (30, )), (pow, (2, 3)), (job_time_left, ())], [2, 1, 0])
+            assert time.monotonic() - start < 10
+
+            # The stuck job fails, without stopping the others; jobs can see their deadline.
+            assert isinstance(results[0], JobTimeout)
+            assert results[1] == 8
+            assert 0 < results[2] <= 0.5
+            assert pool.run([(pow, (2, 2))]) == [4]
+
+            # Interrupted jobs are expected outcomes, not errors; failed jobs are.
+            assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+            with pytest.raises(ValueError):
+                pool.run([(int, ("x", ))])
+            assert [r.levelno for r in caplog.records if r.levelno >= logging.ERROR] == [logging.ERROR]
+
+    def test_training_pool_run_budget(self, caplog):
+        # Once the budget has run out, the queued jobs are cancelled, with a single warning; the running one is
+        # completed.
+        with TrainingPool(1, run_budget=0.5) as pool:
+            results = pool.run([(timed_sleep, (1, )), (pow, (2, 3)), (pow, (2, 4))], [2, 1, 0])
+            assert isinstance(results[0], tuple)
+            assert isinstance(results[1], JobCancelled) and isinstance(results[2], JobCancelled)
+            assert len([r for r in caplog.records if r.levelno >= logging.WARNING]) == 1
+            assert isinstance(pool.run([(pow, (2, 2))])[0], JobCancelled)
+
+            pool.reset_budget()
+            assert pool.run([(pow, (2, 2))]) == [4]
+
+    def test_launch_models_run_budget(self):
+        param_config = {"model_parameters": {"test_values": 2, "delta_training_percentage": 20, "prediction_lags": 10,
+                                             "transformation": "none", "main_accuracy_estimator": "mae"}}
+        df = get_fake_df(30)
+        slow = SlowMockUpModel(param_config)
+        slow.slow_trainings = {length: 1 for length in range(0, 30)}
+
+        # The budget runs out during the first training: the model whose windows have all been cancelled is skipped,
+        # instead of stopping the computation.
+        with TrainingPool(1, run_budget=0.5) as pool:
+            results = launch_models([(slow, df.copy(), None), (MockUpModel(param_config), df.copy(), None)], 2, pool)
+            assert results[0].characteristics["best_prediction"] == "best training window"
+            assert results[1] is None
+
+            pool.reset_budget()
+            assert launch_models([(MockUpModel(param_config), df.copy(), None)], 2, pool)[0] is not None
+
+    def test_launch_model_timeout(self):
+        param_config = {
+            "model_parameters": {
+                "test_values": 2,
+                "delta_training_percentage": 20,
+                "prediction_lags": 10,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae"
+            },
+        }
+
+        df = get_fake_df(30)
+        predictor = SlowMockUpModel(param_config)
+        # The training on the second window never ends.
+        predictor.slow_trainings = {12: 60}
+
+        with TrainingPool(2, job_timeout=1) as pool:
+            model_result = predictor.launch_model(df.copy(), max_threads=2, pool=pool)
+
+        # The window is recorded as failed, and never chosen as the best one.
+        assert len(model_result.results) == 5
+        assert model_result.characteristics["failed_windows"] == 1
+        assert model_result.results[1].prediction is None
+        assert np.isnan(model_result.table.metrics["MAE"][1])
+        assert model_result.table.best("mae") != 1
+        assert model_result.best_prediction.index[-1] == df.index[-1] + 10 * df.index.freq
+
+    def test_lstm_parallel(self):
+        # LSTM windows are trained by spawn-started workers; the trained network travels as a state_dict.
+        param_config = {
+            "model_parameters": {
+                "test_values": 5,
+                "delta_training_percentage": 30,
+                "prediction_lags": 5,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae"
+            },
+        }
+        assert LSTMModel.required_start_method() in [None, "spawn"]
+
+        df = get_fake_df(40)
+        with TrainingPool(2, start_method="fork") as pool:
+            assert not LSTMModel(param_config).can_use_pool(pool)
+
+        model_result = LSTMModel(param_config).launch_model(df.copy(), max_threads=2)
+        assert len(model_result.results) == 3
+        assert model_result.best_prediction.index[-1] == df.index[-1] + pd.Timedelta(days=5)
+
+        model = LSTMModel(param_config)
+        model.train(df.copy())
+        future = DataFrame(index=pd.date_range(df.index[0], periods=45), columns=["yhat"], dtype=float)
+        restored = pickle.loads(pickle.dumps(model))
+        assert restored.predict(future.copy()).equals(model.predict(future.copy()))
+
+    def test_univariate_predictions_shared_pool(self):
+        # All the fits of all the time-series are scheduled together; results do not depend on the number of workers.
+        param_config = {
+            "model_parameters": {
+                "test_values": 2,
+                "delta_training_percentage": 20,
+                "prediction_lags": 10,
+                "possible_transformations": "none,log_modified",
+                "models": "mockup",
+                "main_accuracy_estimator": "mae"
+            },
+        }
+
+        df = get_fake_df(30)
+        df["b"] = np.arange(0, 30, dtype=float) * 2
+
+        results = []
+        for max_threads in [1, 3]:
+            param_config["max_threads"] = max_threads
+            results.append(get_best_univariate_predictions(df, param_config))
+
+        assert results[0][0] == results[1][0]
+        for c1, c3 in zip(results[0][1], results[1][1]):
+            r1, r3 = c1.models["mockup"], c3.models["mockup"]
+            assert r1.best_prediction.equals(r3.best_prediction)
+            assert np.array_equal(r1.table.first_used_index, r3.table.first_used_index)
+            assert r1.characteristics["name"] == r3.characteristics["name"]
+
+
+class TestResultTable:
+    def test_result_table_views(self):
+        # The table has to give back the same results it was built from, as SingleResult views.
+        results = []
+        errors = [3.0, 1.0, 2.0]
+        for i, error in enumerate(errors):
+            prediction = DataFrame(data={"yhat": np.arange(10 - i * 2, dtype=float)},
+                                   index=pd.date_range(start=pd.Timestamp('2000-01-01') + pd.Timedelta(days=i * 2),
+                                                       end='2000-01-10'))
+            tp = ValidationPerformance(prediction.index[0])
+            tp.MAE = error
+            tp.MSE = error ** 2
+            results.append(SingleResult(prediction, tp))
+
+        table = ResultTable.from_results(results)
+
+        assert len(table) == 3
+        assert table.forecasts["yhat"].shape == (3, 10)
+        assert list(table.argsort("mae")) == [1, 2, 0]
+        assert table.best("MAE") == 1
+        assert table.metrics["MSE"][table.best("mae")] == 1.0
+
+        for r, view in zip(results, table.to_results()):
+            assert r.prediction.equals(view.prediction)
+            assert r.testing_performances.get_dict() == view.testing_performances.get_dict()
+
+    def test_model_result_table(self):
+        param_config = {
+            "model_parameters": {
+                "test_values": 5,
+                "delta_training_percentage": 20,
+                "prediction_lags": 10,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae"
+            },
+        }
+
+        df = get_fake_df(100)
+        predictor = MockUpModel(param_config)
+        model_result = predictor.launch_model(df.copy(), max_threads=2)
+
+        assert len(model_result.table) == 5
+        assert model_result.table.metrics.dtype.names == ResultTable.metric_names
+        assert len(model_result.table.index) == 95 + 5 + 10
+
+        for i, r in enumerate(model_result.results):
+            start, stop = model_result.table.spans[i]
+            assert len(r.prediction) == stop - start
+            assert r.testing_performances.MAE == model_result.table.metrics["MAE"][i]
+
+    @pytest.mark.parametrize(
+        "results_retention,expected_kept_forecasts,expected_length",
+        [("all", 5, None),
+         ("metrics", 0, None),
+         ("top_k", 2, None),
+         ("horizon", 5, 15),
+         ("top_k,horizon", 2, 15)]
+    )
+    def test_results_retention(self, results_retention, expected_kept_forecasts, expected_length):
+        param_config = {
+            "model_parameters": {
+                "test_values": 5,
+                "delta_training_percentage": 20,
+                "prediction_lags": 10,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae",
+                "results_retention": results_retention,
+                "results_retention_top_k": 2
+            },
+        }
+
+        df = get_fake_df(100)
+        predictor = MockUpModel(param_config)
+        model_result = predictor.launch_model(df.copy(), max_threads=1)
+
+        results = model_result.results
+        assert len(results) == 5
+        assert len([r for r in results if r.prediction is not None]) == expected_kept_forecasts
+
+        if "top_k" in results_retention:
+            best = model_result.table.argsort("mae")[:2]
+            assert all(results[i].prediction is not None for i in best)
+
+        if expected_length is not None:
+            for r in results:
+                if r.prediction is not None:
+                    assert len(r.prediction) == expected_length
+                    assert r.prediction.index[-1] == model_result.best_prediction.index[-1]
+
 
 class Test_Models_Specific:
     @pytest.mark.parametrize(
@@ -469,6 +1066,424 @@ class Test_Models_Specific:
 
             assert not result.equals(result_with_extra_regressors)
 
+    def test_prophet_warm_start(self):
+        class RecordingProphet(FBProphetModel):
+            def _stan_init(self, input_data):
+                self.init = super()._stan_init(input_data)
+                return self.init
+
+        # The short window has fewer changepoints and no yearly seasonality.
+        short_model = FBProphetModel({})
+        short_model.train(get_fake_df(20))
+        initial_parameters = short_model.fitted_parameters()
+
+        model = RecordingProphet({})
+        model.initial_parameters = initial_parameters
+        model.train(get_fake_df(800))
+        fitted = model.fitted_parameters()
+
+        assert len(initial_parameters["delta"]) != len(fitted["delta"])
+        assert len(initial_parameters["beta"]) != len(fitted["beta"])
+        assert len(model.init["delta"]) == len(fitted["delta"])
+        assert len(model.init["beta"]) == len(fitted["beta"])
+        assert model.init["k"] == initial_parameters["k"]
+
+        # Parameters of the same shape are kept.
+        same_model = RecordingProphet({})
+        same_model.initial_parameters = fitted
+        same_model.train(get_fake_df(800))
+        assert np.array_equal(same_model.init["beta"], fitted["beta"])
+
+    def test_arima_search_space(self):
+        df = get_fake_df(60)
+        arima_parameters = {"p": "0,1,2", "d": "1", "q": "0,1", "P": "0", "D": "0", "Q": "0"}
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 100, "prediction_lags": 5,
+                                             "transformation": "none", "main_accuracy_estimator": "mae",
+                                             "arima_parameters": arima_parameters}}
+        model = ARIMAModel(param_config)
+        model.train(df.copy())
+
+        assert len(model.grid_parameters) == 6
+        assert {o for o, _ in model.grid_parameters} == {(p, 1, q) for p in range(3) for q in range(2)}
+        # The fitted results of the best configuration are kept.
+        aic = {c: arima_predictor._fit_configuration(df.copy(), *c).aic for c in model.grid_parameters}
+        best = min(aic, key=aic.get)
+        assert model.model.aic == aic[best]
+        assert np.array_equal(np.asarray(model.model.params), model.grid_parameters[best])
+
+    def test_arima_parallel_search(self):
+        df = get_fake_df(60)
+        future_df = pd.DataFrame(index=pd.date_range(freq="1d", start=df.index.values[0], periods=70),
+                                 columns=["yhat"], dtype=float)
+        arima_parameters = {"p": "0,1", "d": "0,1", "q": "0", "P": "0,1", "D": "0", "Q": "0", "seasonal_period": 7}
+
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 100, "prediction_lags": 5,
+                                             "transformation": "none", "main_accuracy_estimator": "mae",
+                                             "arima_parameters": arima_parameters}}
+
+        model = ARIMAModel(param_config)
+        model.train(df.copy())
+        expected = model.predict(future_df.copy())
+
+        param_config["model_parameters"]["arima_parameters"] = {**arima_parameters, "processes": 2}
+        parallel_model = ARIMAModel(param_config)
+        parallel_model.train(df.copy())
+        assert parallel_model.grid_parameters.keys() == model.grid_parameters.keys()
+        assert np.allclose(parallel_model.predict(future_df.copy()).iloc[-10:, 0], expected.iloc[-10:, 0])
+
+        # The following trainings re-use the same workers; copies of the model do not share them.
+        pool = parallel_model._grid_pool
+        workers = [*pool.workers]
+        parallel_model.train(df.iloc[10:].copy())
+        assert parallel_model._grid_pool is pool and pool.workers == workers
+        assert pickle.loads(pickle.dumps(parallel_model))._grid_pool is None
+
+    def test_arima_timeouts(self, monkeypatch):
+        df = get_fake_df(60)
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 100, "prediction_lags": 5,
+                                             "transformation": "none", "main_accuracy_estimator": "mae",
+                                             "arima_parameters": {"p": "1", "q": "1", "P": "0,1", "fit_timeout": 0}}}
+        with pytest.raises(ValueError, match="SARIMAX"):
+            ARIMAModel(param_config).train(df.copy())
+
+        # The grid search stops when the job which runs it is about to time out.
+        monkeypatch.setattr(arima_predictor, "job_time_left", lambda: 0)
+        with pytest.raises(JobTimeout):
+            ARIMAModel({}).train(df.copy())
+
+    def test_lstm_split_sequences(self):
+        data = np.stack([np.arange(10), np.arange(10, 20)], axis=1)
+        x, y = split_sequences(data, n_in=4, n_out=2)
+
+        assert x.shape == (5, 4, 2)
+        assert y.shape == (5, 2)
+        assert x.dtype == np.float32 and y.dtype == np.float32
+        assert x.flags['C_CONTIGUOUS']
+        for i in range(5):
+            assert np.array_equal(x[i], data[i:i + 4])
+            assert np.array_equal(y[i], data[i + 4:i + 6, 0])
+
+        x, y = split_sequences(np.arange(3), n_in=3, n_out=1)
+        assert x.shape == (0, 3, 1)
+        assert y.shape == (0, 1)
+
+    def test_lstm_parameters(self):
+        df = get_fake_df(60)
+        future_df = pd.DataFrame(index=pd.date_range(freq="1d", start=df.index.values[0], periods=65),
+                                 columns=["yhat"], dtype=float)
+
+        model = LSTMModel({})
+        assert (model.epochs, model.batch_size, model.hidden_size, model.num_layers) == (10, 32, 20, 1)
+
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 100, "prediction_lags": 5,
+                                             "transformation": "none", "main_accuracy_estimator": "mae",
+                                             "lstm_parameters": {"epochs": 2, "batch_size": 4, "hidden_size": 8,
+                                                                 "num_layers": 2, "learning_rate": 0.05}}}
+        model = LSTMModel(param_config)
+        model.train(df.copy())
+        assert model.model.lstm.hidden_size == 8
+        assert model.model.lstm.num_layers == 2
+        assert model.model.lstm.batch_first
+
+        result = model.predict(future_df.copy())
+        assert not result.iloc[-5:, 0].isnull().any()
+
+        restored = pickle.loads(pickle.dumps(model))
+        assert restored.model.lstm.num_layers == 2
+        assert restored.predict(future_df.copy()).iloc[-5:, 0].notnull().all()
+
+    def test_lstm_early_stopping(self, monkeypatch):
+        df = get_fake_df(60)
+        lstm_parameters = {"epochs": 200, "batch_size": 8, "validation_split": 0.2, "patience": 2, "lr_patience": 1}
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 100, "prediction_lags": 5,
+                                             "transformation": "none", "main_accuracy_estimator": "mae",
+                                             "lstm_parameters": lstm_parameters}}
+        model = LSTMModel(param_config)
+        model.train(df.copy())
+        assert 3 <= model.model_characteristics["epochs"] < 200
+        assert model.model_characteristics["training_time"] > 0
+
+        # Without early stopping, the training is stopped by its time budget...
+        param_config["model_parameters"]["lstm_parameters"] = {"epochs": 100000, "max_fit_time": 0.5}
+        model = LSTMModel(param_config)
+        model.train(df.copy())
+        assert model.model_characteristics["epochs"] < 100000
+        assert model.model_characteristics["training_time"] < 5
+
+        # ... or by the timeout of the job which runs it.
+        monkeypatch.setattr(lstm_predictor, "job_time_left", lambda: 0.5)
+        param_config["model_parameters"]["lstm_parameters"] = {"epochs": 100000}
+        model = LSTMModel(param_config)
+        model.train(df.copy())
+        assert model.model_characteristics["training_time"] < 5
+
+    def test_lstm_stateful_inference(self):
+        df = get_fake_df(60)
+        future_df = pd.DataFrame(index=pd.date_range(freq="1d", start=df.index.values[0], periods=80),
+                                 columns=["yhat"], dtype=float)
+        model = LSTMModel({})
+        model.train(df.copy())
+
+        result = model.predict(future_df.copy())
+        assert not result.iloc[-20:, 0].isnull().any()
+        # Predictions do not change the state of the model.
+        assert result.equals(model.predict(future_df.copy()))
+
+        # The first predicted value is computed from the same context, from zero state, in both ways.
+        model.stateful_inference = False
+        windowed_result = model.predict(future_df.copy())
+        assert windowed_result.equals(model.predict(future_df.copy()))
+        assert windowed_result.iloc[60, 0] == pytest.approx(result.iloc[60, 0])
+
+    def test_lstm_global_model(self, monkeypatch):
+        dates = pd.date_range('1/1/2000', periods=60)
+        df = DataFrame({"a": np.arange(60) % 7, "b": 2 * (np.arange(60) % 7) + 10, "c": np.sin(np.arange(60))},
+                       index=dates)
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 50, "prediction_lags": 5,
+                                             "transformation": "none", "main_accuracy_estimator": "mae",
+                                             "lstm_parameters": {"global": True, "epochs": 5}}}
+
+        global_model = LSTMModel(param_config)
+        assert global_model.global_model
+        # The global network is trained in the main process, which must not initialize CUDA.
+        devices = []
+        with monkeypatch.context() as m:
+            m.setattr(torch.cuda, "is_available", lambda: True)
+            m.setattr(LSTMModel, "_fit_network", lambda self, *args: devices.append(args[-1]))
+            global_model.train_global(df)
+        assert devices == ["cpu"]
+        global_model.train_global(df)
+        assert global_model.global_parameters is not None
+
+        # The models of the single time-series use the global network, without training it again, and its context
+        # length; the global network is trained on the shortest time-series without validation values.
+        assert global_model.global_parameters["n_in"] == round(55 / 4)
+        model = LSTMModel(param_config)
+        model.global_parameters = global_model.global_parameters
+        monkeypatch.setattr(lstm_predictor, "split_sequences", None)
+        model.train(df[["b"]].iloc[:40].copy())
+        assert model.model_characteristics["global_model"]
+        assert "epochs" not in model.model_characteristics
+        assert len(model.values_for_prediction) == global_model.global_parameters["n_in"]
+        for k, v in model.model.state_dict().items():
+            assert torch.equal(v, global_model.global_parameters["weights"][k])
+
+        future_df = pd.DataFrame(index=pd.date_range(freq="1d", start=dates[0], periods=45), columns=["yhat"],
+                                 dtype=float)
+        assert model.predict(future_df).iloc[-5:, 0].notnull().all()
+
+    def test_lstm_global_predictions(self):
+        dates = pd.date_range('1/1/2000', periods=40)
+        df = DataFrame({"a": np.arange(40) % 7, "b": 2 * (np.arange(40) % 7) + 10}, index=dates)
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 50, "prediction_lags": 5,
+                                             "possible_transformations": "none,log_modified", "models": "LSTM",
+                                             "main_accuracy_estimator": "mae",
+                                             "lstm_parameters": {"global": True, "epochs": 5}},
+                        "max_threads": 1}
+
+        best_transformations, containers = get_best_univariate_predictions(df, param_config)
+        assert [c.timeseries_data.columns[0] for c in containers] == ["a", "b"]
+        for container in containers:
+            result = container.models["LSTM"]
+            assert result.characteristics["global_model"]
+            assert len(result.table.metrics) == 2
+            assert result.best_prediction.index[-1] == dates[-1] + pd.Timedelta(days=5)
+            assert result.best_prediction.iloc[-5:, 0].notnull().all()
+
+    @pytest.mark.parametrize("stateful_inference", [True, False])
+    def test_lstm_export(self, tmp_path, stateful_inference):
+        df = get_fake_df(60)
+        future_df = pd.DataFrame(index=pd.date_range(freq="1d", start=df.index.values[0], periods=70),
+                                 columns=["yhat"], dtype=float)
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 100, "prediction_lags": 5,
+                                             "transformation": "log_modified", "main_accuracy_estimator": "mae",
+                                             "lstm_parameters": {"stateful_inference": stateful_inference}}}
+        model = LSTMModel(param_config)
+        model.train(model.transformation.apply(df.iloc[:, 0]).to_frame())
+        expected = model.predict(future_df.copy())
+
+        model.export(str(tmp_path / "lstm.pt"))
+        forecaster = load_lstm(str(tmp_path / "lstm.pt"))
+        assert np.allclose(forecaster.predict(future_df.copy()).iloc[-10:, 0], expected.iloc[-10:, 0])
+        assert np.allclose(forecaster.forecast(future_df.copy()).iloc[-10:, 0],
+                           model.transformation.inverse(expected.iloc[:, 0]).iloc[-10:])
+
+        # Once loaded from a file, only its path is pickled; otherwise, the whole archive.
+        assert len(pickle.dumps(forecaster)) < 1000
+        unpickled = pickle.loads(pickle.dumps(forecaster))
+        assert np.allclose(unpickled.predict(future_df.copy()).iloc[-10:, 0], expected.iloc[-10:, 0])
+        forecaster.path = None
+        os.remove(tmp_path / "lstm.pt")
+        unpickled = pickle.loads(pickle.dumps(forecaster))
+        assert np.allclose(unpickled.predict(future_df.copy()).iloc[-10:, 0], expected.iloc[-10:, 0])
+
+    def test_lstm_export_after_pooled_launch(self, tmp_path):
+        # The best prediction is trained by a worker, which sends back the trained model.
+        df = get_fake_df(40)
+        param_config = {"model_parameters": {"test_values": 5, "delta_training_percentage": 50, "prediction_lags": 5,
+                                             "transformation": "none", "main_accuracy_estimator": "mae",
+                                             "lstm_parameters": {"epochs": 5}}}
+        model = LSTMModel(param_config)
+        with model._create_training_pool(2) as pool:
+            model_result = model.launch_model(df.copy(), max_threads=2, pool=pool)
+
+        model.export(str(tmp_path / "lstm.pt"))
+        future_df = pd.DataFrame(index=model_result.best_prediction.index, columns=["yhat"], dtype=float)
+        forecast = load_lstm(str(tmp_path / "lstm.pt")).forecast(future_df)
+        assert np.allclose(forecast.iloc[-5:, 0], model_result.best_prediction.iloc[-5:, 0])
+
+    def test_lstm_export_with_extra_regressors(self, tmp_path):
+        df = get_fake_df(60)
+        dates = pd.date_range(freq="1d", start=df.index.values[0], periods=70)
+        extra_regressors = DataFrame({"b": np.sin(np.arange(70)), "c": np.arange(70) % 5}, index=dates)
+        future_df = pd.DataFrame(index=dates, columns=["yhat"], dtype=float)
+        model = LSTMModel({})
+        model.train(df.copy(), extra_regressors.iloc[:60].copy())
+        expected = model.predict(future_df.copy(), extra_regressors.copy())
+
+        model.export(str(tmp_path / "lstm.pt"))
+        forecaster = load_lstm(str(tmp_path / "lstm.pt"))
+        assert np.allclose(forecaster.predict(future_df.copy(), extra_regressors.copy()).iloc[-10:, 0],
+                           expected.iloc[-10:, 0])
+
+    def test_lstm_export_without_training_code(self, tmp_path):
+        model = LSTMModel({})
+        model.train(get_fake_df(60))
+        model.export(str(tmp_path / "lstm.pt"))
+
+        code = "import sys, pandas as pd; " \
+               "from timexseries.data_prediction.models.lstm_inference import load_lstm; " \
+               f"f = load_lstm({str(tmp_path / 'lstm.pt')!r}); " \
+               "df = pd.DataFrame(index=pd.date_range('1/1/2000', periods=70), columns=['yhat'], dtype=float); " \
+               "print(f.forecast(df).iloc[-10:, 0].notnull().all(), " \
+               "'timexseries.data_prediction.models.lstm_predictor' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+        assert output.stdout.strip() == "True False"
+
+
+class TestConfig:
+    param_config = {
+        "model_parameters": {"test_values": 2, "delta_training_percentage": 20, "prediction_lags": 5,
+                             "possible_transformations": "none,log_modified", "models": "mockup,arima",
+                             "main_accuracy_estimator": "mae", "results_retention": "top_k,horizon",
+                             "fbprophet_parameters": {"holiday_country": "IT"}},
+        "xcorr_parameters": {"xcorr_max_lags": 2, "xcorr_mode": "pearson,kendall"},
+        "max_threads": 2
+    }
+
+    def test_compile_config(self):
+        config = compile_config(self.param_config)
+        assert config == self.param_config
+        assert config.model.models == ("mockup", "arima")
+        assert config.model.possible_transformations == ("none", "log_modified")
+        assert config.model.results_retention == ("top_k", "horizon")
+        assert config.model.window_search == "exhaustive"
+        assert config.model.test_percentage is None
+        assert config.xcorr_modes == ("pearson", "kendall")
+        assert config.max_threads == 2
+        assert compile_config(config) is config
+
+        with pytest.raises(TypeError):
+            config["max_threads"] = 1
+        with pytest.raises(TypeError):
+            config["model_parameters"]["fbprophet_parameters"]["holiday_country"] = "US"
+        with pytest.raises(AttributeError):
+            config.model.models = ("mockup",)
+
+        restored = pickle.loads(pickle.dumps(config))
+        assert type(restored) is Config
+        assert restored == config
+        assert restored.model.models == config.model.models
+
+        # The models share the compiled parameters.
+        model = MockUpModel(config, "none")
+        assert model.model_parameters is config.model.parameters
+        assert model.results_retention == ("top_k", "horizon")
+
+    @pytest.mark.parametrize(
+        "section, entry, value",
+        [("model_parameters", "possible_transformations", "none,sqrt"),
+         ("model_parameters", "main_accuracy_estimator", "mape"),
+         ("model_parameters", "prediction_lags", "5"),
+         ("model_parameters", "results_retention", "best"),
+         ("model_parameters", "window_search", "random"),
+         ("model_parameters", "test_values", -1),
+         ("xcorr_parameters", "xcorr_mode", "pearson,cosine"),
+         (None, "max_threads", 0)]
+    )
+    def test_compile_config_errors(self, section, entry, value):
+        param_config = {**self.param_config, "model_parameters": {**self.param_config["model_parameters"]},
+                        "xcorr_parameters": {**self.param_config["xcorr_parameters"]}}
+        if section is None:
+            param_config[entry] = value
+        else:
+            param_config[section][entry] = value
+
+        with pytest.raises(ConfigurationError, match=entry):
+            compile_config(param_config)
+
+        # The configuration errors are found before any training.
+        with pytest.raises(ConfigurationError, match=entry):
+            get_best_predictions(get_fake_df(10), param_config)
+
+    def test_missing_entry(self):
+        param_config = {"model_parameters": {**self.param_config["model_parameters"]}}
+        del param_config["model_parameters"]["prediction_lags"]
+        with pytest.raises(ConfigurationError, match="prediction_lags"):
+            compile_config(param_config)
+
+        # Without transformation, the models need the one of the configuration.
+        with pytest.raises(ConfigurationError, match="transformation"):
+            MockUpModel(self.param_config)
+
+    def test_default_model_parameters(self):
+        assert default_model_parameters("LSTM") is default_model_parameters("LSTM")
+        model = LSTMModel({})
+        assert model.model_parameters is default_model_parameters("LSTM").parameters
+        assert model.test_values == -1
+        assert model.test_percentage == 10
+
+
+class TestModelRegistry:
+    def test_model_factory(self):
+        param_config = {"model_parameters": {"test_values": 2, "delta_training_percentage": 20, "prediction_lags": 5,
+                                             "transformation": "none", "main_accuracy_estimator": "mae"}}
+        assert type(model_factory("mockup", param_config)) is MockUpModel
+        assert type(model_factory("LSTM", param_config)) is LSTMModel
+        assert type(model_factory("arima", param_config)) is ARIMAModel
+        # Unknown models are ARIMA, as they have always been.
+        assert type(model_factory("unknown", param_config)) is ARIMAModel
+
+    def test_lazy_import(self):
+        # Importing the pipeline does not import the libraries of the models.
+        code = "import sys, timexseries.data_prediction.pipeline; " \
+               "print(any(m in sys.modules for m in ['torch', 'fbprophet', 'prophet', " \
+               "'timexseries.data_prediction.models.lstm_predictor']))"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+        assert output.stdout.strip() == "False"
+
+    def test_entry_points(self, monkeypatch):
+        class EntryPoints(list):
+            def select(self, group):
+                return [e for e in self if e.group == group]
+
+        entry_points = EntryPoints([
+            importlib.metadata.EntryPoint("plugin_mockup", "tests.utilities:SlowMockUpModel", registry.ENTRY_POINT_GROUP),
+            importlib.metadata.EntryPoint("other", "tests.utilities:get_fake_df", "other.group")])
+        monkeypatch.setattr(registry.metadata, "entry_points", lambda: entry_points)
+        monkeypatch.setattr(registry, "_entry_points_loaded", False)
+        monkeypatch.setattr(registry, "_models", {**registry._models})
+
+        assert "plugin_mockup" in registry.available_models()
+        assert "other" not in registry.available_models()
+        assert registry.model_class("plugin_mockup") is SlowMockUpModel
+
+        registry.register_model("registered", MockUpModel)
+        assert registry.model_path("registered") == "timexseries.data_prediction.models.mockup_predictor:MockUpModel"
+        assert registry.model_class("registered") is MockUpModel
+
 
 class TestGetPredictions:
 
@@ -847,6 +1862,75 @@ class TestGetPredictions:
         # Cleanup.
         os.remove("test_hist_pred_saves/test3.pkl")
 
+    @pytest.mark.parametrize("delta", [1, 3])
+    def test_compute_predictions_accumulated_errors(self, delta):
+        # Check that the error statistics accumulated during the computation of the historical predictions are the same
+        # which would be obtained computing them from scratch, also after a restart from file, and after a re-run on
+        # the same data, which re-computes the last `delta` points.
+        param_config = {
+            "input_parameters": {},
+            "model_parameters": {
+                "test_values": 2,
+                "delta_training_percentage": 100,
+                "prediction_lags": 10,
+                "possible_transformations": "none",
+                "models": "mockup",
+                "main_accuracy_estimator": "mae",
+            },
+            "historical_prediction_parameters": {
+                "initial_index": "2000-01-20",
+                "save_path": "test_hist_pred_saves/test_accumulated_errors.pkl",
+                "delta": delta
+            }
+        }
+
+        try:
+            os.remove("test_hist_pred_saves/test_accumulated_errors.pkl")
+        except FileNotFoundError:
+            pass
+
+        for periods in [30, 30, 32]:
+            ing_data = DataFrame({"a": pandas.date_range('2000-01-01', periods=periods),
+                                  "b": np.arange(30, 30 + periods), "c": np.arange(60, 60 + periods) ** 2})
+            ing_data.set_index("a", inplace=True)
+            ing_data = add_freq(ing_data, "D")
+
+            timeseries_containers = compute_historical_predictions(ingested_data=ing_data, param_config=param_config)
+
+            for s in timeseries_containers:
+                name = s.timeseries_data.columns[0]
+                hist_prediction = s.historical_prediction['mockup'][name].astype(float)
+
+                expected = ValidationPerformance(hist_prediction.index[0])
+                expected.set_testing_stats(ing_data.loc[hist_prediction.index, name], hist_prediction)
+                computed = s.historical_performance['mockup']
+
+                assert computed.first_used_index == expected.first_used_index
+                for metric in ['MSE', 'RMSE', 'MAE', 'AM', 'SD']:
+                    assert np.isclose(getattr(computed, metric), getattr(expected, metric))
+
+        os.remove("test_hist_pred_saves/test_accumulated_errors.pkl")
+
+    def test_error_accumulator(self):
+        actual = Series(np.array([1.0, 4.0, 2.0, 8.0, 5.0]), index=pandas.date_range('2000-01-01', periods=5))
+        predicted = Series(np.array([2.0, 3.0, 2.5, 4.0, 1.0]), index=pandas.date_range('2000-01-01', periods=5))
+
+        expected = ValidationPerformance(actual.index[0])
+        expected.set_testing_stats(actual, predicted)
+
+        acc = ErrorAccumulator.from_series(actual, predicted)
+        computed = acc.get_validation_performance()
+        for metric in ['MSE', 'RMSE', 'MAE', 'AM', 'SD']:
+            assert np.isclose(getattr(computed, metric), getattr(expected, metric))
+
+        # Re-assigning the last point replaces its contribution.
+        acc.update(actual.index[-1], 5.0, 100.0)
+        acc.update(actual.index[-1], 5.0, 1.0)
+        computed = acc.get_validation_performance()
+        assert acc.count == 5
+        for metric in ['MSE', 'RMSE', 'MAE', 'AM', 'SD']:
+            assert np.isclose(getattr(computed, metric), getattr(expected, metric))
+
     def test_get_best_predictions(self):
         # Test that log_modified transformation is applied and that the results are the expected ones.
         # Ideally this should work the same using other models or transformations; it's just to test that pre/post
@@ -1,9 +1,52 @@
+import os
+import subprocess
+import sys
 import unittest
 import numpy as np
 from pandas import DataFrame
 
+from timexseries.data_ingestion import add_freq
+from timexseries.data_prediction.models.mockup_predictor import MockUpModel
+from timexseries.data_visualization.functions import create_timeseries_dash_children
+from timexseries.timeseries_container import TimeSeriesContainer
 
+from tests.utilities import get_fake_df
 
 
+class TestDashChildren:
+    def test_lazy_import(self):
+        # Importing the visualization functions does not import the visualization libraries.
+        code = "import sys, timexseries.data_visualization.functions; " \
+               "print(any(m in sys.modules for m in ['plotly', 'dash', 'dash_core_components', " \
+               "'dash_html_components', 'networkx']))"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+        assert output.stdout.strip() == "False"
 
+    def test_create_timeseries_dash_children_retained_metrics(self):
+        # Only the metrics of the training windows are kept: the plots use the best prediction.
+        param_config = {
+            "model_parameters": {
+                "test_values": 5,
+                "delta_training_percentage": 20,
+                "prediction_lags": 10,
+                "transformation": "none",
+                "main_accuracy_estimator": "mae",
+                "results_retention": "metrics"
+            },
+            "visualization_parameters": {}
+        }
+        df = add_freq(get_fake_df(100))
+        model_result = MockUpModel(param_config).launch_model(df.copy())
+        assert model_result.table.prediction(0) is None
 
+        container = TimeSeriesContainer(df, {"MockUp": model_result}, None)
+        children = create_timeseries_dash_children(container, param_config)
+        assert "MockUp" in [c.children for c in children if type(c).__name__ == "H4"]
+
+        # As with all the forecasts kept, except for the plot of the forecast of the best window.
+        param_config["model_parameters"]["results_retention"] = "all"
+        container = TimeSeriesContainer(df, {"MockUp": MockUpModel(param_config).launch_model(df.copy())}, None)
+        all_children = create_timeseries_dash_children(container, param_config)
+        assert len(children) == len(all_children) - 1
+        assert type(children[-1]).__name__ == type(all_children[-1]).__name__ == "Graph"
@@ -1,7 +1,12 @@
+import time
+
 import numpy as np
 import pandas
 from pandas import DataFrame
 
+from timexseries.data_prediction.models.mockup_predictor import MockUpModel
+from timexseries.data_prediction.training_pool import SharedFrame
+
 
 def get_fake_df(length: int, name: str = "value") -> DataFrame:
     dates = pandas.date_range('1/1/2000', periods=length)
@@ -9,3 +14,35 @@ def get_fake_df(length: int, name: str = "value") -> DataFrame:
     np.random.seed(0)
     df = pandas.DataFrame(np.random.randn(length), index=dates, columns=[name])
     return df
+
+
+def timed_sleep(seconds: float) -> tuple:
+    """
+    Sleep for `seconds`; return the start and end times, comparable between processes.
+    """
+    start = time.monotonic()
+    time.sleep(seconds)
+    return start, time.monotonic()
+
+
+class SlowMockUpModel(MockUpModel):
+    """
+    MockUp model whose training sleeps `slow_trainings[length]` seconds when the training set has that length.
+    """
+    slow_trainings = {}
+
+    def train(self, input_data: DataFrame, extra_regressors: DataFrame = None):
+        super().train(input_data, extra_regressors)
+        time.sleep(self.slow_trainings.get(len(input_data), 0))
+
+
+def shared_after(seconds: float, path: str):
+    """
+    Sleep for `seconds`, then publish a DataFrame in shared memory, writing the name of its block in `path`; return its
+    `SharedFrame`.
+    """
+    time.sleep(seconds)
+    frame = SharedFrame(get_fake_df(10))
+    with open(path, "w") as file:
+        file.write(frame.name)
+    return frame
@@ -0,0 +1,370 @@
+import json
+import logging
+import pkgutil
+from functools import lru_cache
+from numbers import Integral, Real
+
+from timexseries.data_prediction.transformation import TRANSFORMATIONS
+from timexseries.data_prediction.window_search import STRATEGIES
+
+log = logging.getLogger(__name__)
+
+# Error metrics which can be used as `main_accuracy_estimator`.
+ACCURACY_ESTIMATORS = ("mse", "rmse", "mae", "am", "sd")
+
+# Possible entries of the comma-separated `results_retention` of `model_parameters`.
+RESULTS_RETENTIONS = ("all", "metrics", "top_k", "horizon")
+
+# Possible entries of the comma-separated `xcorr_mode` of `xcorr_parameters`.
+XCORR_MODES = ("pearson", "kendall", "spearman", "matlab_normalized", "granger")
+
+
+class ConfigurationError(ValueError):
+    """
+    Raised when a TIMEX configuration dictionary is not valid, before any model is trained.
+    """
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return value if type(value) is FrozenDict else FrozenDict(value)
+    elif isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, dict):
+        return {k: _thaw(v) for k, v in value.items()}
+    elif isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class FrozenDict(dict):
+    """
+    Read-only dictionary: nested dictionaries are frozen as well, and lists become tuples.
+
+    It is still a `dict`, so it can be used wherever a configuration dictionary is expected (e.g. it can be passed
+    as keyword arguments or serialized to JSON), but any attempt to change it raises a `TypeError`.
+
+    Examples
+    --------
+    >>> parameters = FrozenDict({"a": 1, "b": {"c": [1, 2]}})
+    >>> parameters["b"]
+    {'c': (1, 2)}
+    >>> parameters["a"] = 2
+    TypeError: 'FrozenDict' object does not support item assignment
+    """
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__((k, _freeze(v)) for k, v in dict(*args, **kwargs).items())
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' object does not support item assignment")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _immutable
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def to_dict(self) -> dict:
+        """
+        Return a mutable copy of this dictionary, with mutable copies of the nested dictionaries and lists.
+        """
+        return _thaw(self)
+
+
+def _check(condition: bool, section: str, entry: str, message: str):
+    if not condition:
+        raise ConfigurationError(f"Invalid '{entry}' in '{section}': {message}.")
+
+
+def _is_integer(value) -> bool:
+    return isinstance(value, Integral) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, Real) and not isinstance(value, bool)
+
+
+def _split(parameters: dict, section: str, entry: str, choices: tuple = None, default: str = None) -> tuple:
+    try:
+        value = parameters[entry]
+    except KeyError:
+        if default is None:
+            return ()
+        value = default
+
+    _check(isinstance(value, str), section, entry, "expected a comma-separated string")
+    names = tuple(name.strip() for name in value.split(","))
+    if choices is not None:
+        unknown = [name for name in names if name not in choices]
+        _check(len(unknown) == 0, section, entry, f"unknown {unknown}, expected some of {list(choices)}")
+    return names
+
+
+class ModelParameters:
+    """
+    Compiled, read-only version of the `model_parameters` section of a TIMEX configuration dictionary: each entry is
+    parsed, validated and completed with its default value once, instead of every time a model is created.
+
+    Parameters
+    ----------
+    model_parameters : dict
+        The `model_parameters` section of a TIMEX configuration dictionary.
+
+    Attributes
+    ----------
+    parameters : FrozenDict
+        Frozen copy of `model_parameters`, including the model specific entries (e.g. `fbprophet_parameters`).
+    models : (str)
+        Models to use, from the comma-separated `models` entry.
+    possible_transformations : (str)
+        Transformations to test, from the comma-separated `possible_transformations` entry.
+    test_values : int
+        Number of values of the validation set; -1 if it is given as `test_percentage`.
+    test_percentage : float
+        Percentage of values of the validation set; None if it is given as `test_values`.
+    transformation : str
+        Default transformation of the models; None if not specified.
+    results_retention : (str)
+        Results which should be kept, from the comma-separated `results_retention` entry.
+
+    The other attributes are the corresponding entries of `model_parameters`, e.g. `prediction_lags`, with the default
+    value of the optional ones (e.g. `window_search` is "exhaustive", `fit_cache` is None...).
+
+    Raises
+    ------
+    ConfigurationError
+        If a required entry is missing or an entry is not valid.
+    """
+    __slots__ = ('parameters', 'models', 'possible_transformations', 'test_values', 'test_percentage',
+                 'transformation', 'prediction_lags', 'delta_training_percentage', 'main_accuracy_estimator',
+                 'results_retention', 'results_retention_top_k', 'window_search', 'window_search_patience',
+                 'window_search_eta', 'window_search_ratio', 'warm_start', 'fit_cache', 'fit_cache_size')
+
+    def __init__(self, model_parameters: dict):
+        section = "model_parameters"
+        _check(isinstance(model_parameters, dict), section, section, "expected a dictionary")
+        p = FrozenDict(model_parameters)
+        values = {"parameters": p}
+
+        values["models"] = _split(p, section, "models")
+        values["possible_transformations"] = _split(p, section, "possible_transformations", TRANSFORMATIONS)
+
+        if "test_values" in p:
+            _check(_is_integer(p["test_values"]) and p["test_values"] >= 0, section, "test_values",
+                   "expected a non-negative integer")
+            values["test_values"], values["test_percentage"] = p["test_values"], None
+        else:
+            _check("test_percentage" in p, section, "test_values", "one of 'test_values' and 'test_percentage' "
+                                                                   "is required")
+            _check(_is_number(p["test_percentage"]) and 0 <= p["test_percentage"] < 100, section, "test_percentage",
+                   "expected a number in [0, 100)")
+            values["test_values"], values["test_percentage"] = -1, p["test_percentage"]
+
+        values["transformation"] = p.get("transformation")
+        if values["transformation"] is not None:
+            _check(values["transformation"] in TRANSFORMATIONS, section, "transformation",
+                   f"expected one of {list(TRANSFORMATIONS)}")
+
+        for entry in ("prediction_lags", "delta_training_percentage", "main_accuracy_estimator"):
+            _check(entry in p, section, entry, "entry is required")
+
+        _check(_is_integer(p["prediction_lags"]) and p["prediction_lags"] >= 0, section, "prediction_lags",
+               "expected a non-negative integer")
+        _check(_is_number(p["delta_training_percentage"]) and p["delta_training_percentage"] > 0, section,
+               "delta_training_percentage", "expected a positive number")
+        _check(isinstance(p["main_accuracy_estimator"], str)
+               and p["main_accuracy_estimator"].lower() in ACCURACY_ESTIMATORS, section, "main_accuracy_estimator",
+               f"expected one of {list(ACCURACY_ESTIMATORS)}")
+        values["prediction_lags"] = p["prediction_lags"]
+        values["delta_training_percentage"] = p["delta_training_percentage"]
+        values["main_accuracy_estimator"] = p["main_accuracy_estimator"]
+
+        values["results_retention"] = _split(p, section, "results_retention", RESULTS_RETENTIONS, default="all")
+
+        for entry, default in (("results_retention_top_k", 1), ("window_search_patience", 3),
+                               ("window_search_eta", 3)):
+            value = p.get(entry, default)
+            _check(_is_integer(value) and value >= 1, section, entry, "expected a positive integer")
+            values[entry] = value
+
+        values["window_search"] = p.get("window_search", "exhaustive")
+        _check(values["window_search"] in STRATEGIES, section, "window_search", f"expected one of {list(STRATEGIES)}")
+
+        values["window_search_ratio"] = p.get("window_search_ratio", 2)
+        _check(_is_number(values["window_search_ratio"]) and values["window_search_ratio"] > 1, section,
+               "window_search_ratio", "expected a number greater than 1")
+
+        values["warm_start"] = p.get("warm_start", False)
+        _check(isinstance(values["warm_start"], bool), section, "warm_start", "expected a boolean")
+
+        values["fit_cache"] = p.get("fit_cache")
+        _check(values["fit_cache"] is None or isinstance(values["fit_cache"], str), section, "fit_cache",
+               "expected the path of a directory")
+
+        values["fit_cache_size"] = p.get("fit_cache_size", 1024)
+        _check(_is_number(values["fit_cache_size"]) and values["fit_cache_size"] > 0, section, "fit_cache_size",
+               "expected a positive number of MB")
+
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return f"ModelParameters({dict(self.parameters)})"
+
+
+class Config(FrozenDict):
+    """
+    Compiled, read-only TIMEX configuration dictionary, obtained with `compile_config`.
+
+    It can be used as the original configuration dictionary; in addition, the sections used by the predictions are
+    parsed and validated once, and available as attributes. It is cheap to pickle, so it can be sent as it is to the
+    workers of a `timexseries.data_prediction.training_pool.TrainingPool`.
+
+    Attributes
+    ----------
+    model : ModelParameters
+        Compiled `model_parameters` section; None if it is not specified.
+    xcorr_modes : (str)
+        Modes of the cross-correlation, from the comma-separated `xcorr_mode` of `xcorr_parameters`; None if
+        `xcorr_parameters` is not specified.
+    max_threads : int
+        The `max_threads` entry; None if it is not specified.
+    """
+    __slots__ = ('model', 'xcorr_modes', 'max_threads')
+
+    def __init__(self, param_config: dict):
+        _check(isinstance(param_config, dict), "param_config", "param_config", "expected a dictionary")
+        super().__init__(param_config)
+
+        model = ModelParameters(self["model_parameters"]) if "model_parameters" in self else None
+
+        xcorr_modes = None
+        if "xcorr_parameters" in self:
+            section = "xcorr_parameters"
+            xcorr_parameters = self[section]
+            xcorr_modes = _split(xcorr_parameters, section, "xcorr_mode", XCORR_MODES, default="pearson")
+            if "xcorr_max_lags" in xcorr_parameters:
+                _check(_is_integer(xcorr_parameters["xcorr_max_lags"]) and xcorr_parameters["xcorr_max_lags"] >= 0,
+                       section, "xcorr_max_lags", "expected a non-negative integer")
+            if "xcorr_mode_target" in xcorr_parameters:
+                _check(xcorr_parameters["xcorr_mode_target"] in XCORR_MODES, section, "xcorr_mode_target",
+                       f"expected one of {list(XCORR_MODES)}")
+
+        max_threads = self.get("max_threads")
+        _check(max_threads is None or (_is_integer(max_threads) and max_threads >= 1), "param_config", "max_threads",
+               "expected a positive integer")
+
+        object.__setattr__(self, "model", model)
+        object.__setattr__(self, "xcorr_modes", xcorr_modes)
+        object.__setattr__(self, "max_threads", max_threads)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __reduce__(self):
+        # The compiled sections are pickled as they are, so that they are not parsed and validated again.
+        return _restore_config, (dict(self), self.model, self.xcorr_modes, self.max_threads)
+
+
+def _restore_config(param_config: dict, model: ModelParameters, xcorr_modes: tuple, max_threads: int) -> Config:
+    config = Config.__new__(Config)
+    dict.update(config, param_config)
+    object.__setattr__(config, "model", model)
+    object.__setattr__(config, "xcorr_modes", xcorr_modes)
+    object.__setattr__(config, "max_threads", max_threads)
+    return config
+
+
+def compile_config(param_config: dict) -> Config:
+    """
+    Parse and validate `param_config` once, returning its compiled, read-only version. Configuration errors are found
+    here, before any model is trained.
+
+    Parameters
+    ----------
+    param_config : dict
+        TIMEX configuration dictionary. If it is already a `Config`, it is returned as it is.
+
+    Returns
+    -------
+    Config
+        Compiled configuration.
+
+    Raises
+    ------
+    ConfigurationError
+        If `param_config` is not valid.
+
+    Examples
+    --------
+    >>> param_config = {
+    ...     "model_parameters": {
+    ...         "test_values": 2,
+    ...         "delta_training_percentage": 20,
+    ...         "prediction_lags": 10,
+    ...         "possible_transformations": "log_modified,none",
+    ...         "models": "fbprophet,LSTM",
+    ...         "main_accuracy_estimator": "mae",
+    ...     }
+    ... }
+    >>> config = compile_config(param_config)
+    >>> config.model.models
+    ('fbprophet', 'LSTM')
+    >>> compile_config(config) is config
+    True
+
+    Errors are reported before any training:
+    >>> param_config["model_parameters"]["possible_transformations"] = "log_modified,sqrt"
+    >>> compile_config(param_config)
+    ConfigurationError: Invalid 'possible_transformations' in 'model_parameters': unknown ['sqrt'], expected some of
+    ['log', 'log_modified', 'none', 'diff', 'yeo_johnson'].
+    """
+    if isinstance(param_config, Config):
+        return param_config
+    return Config(param_config)
+
+
+@lru_cache(maxsize=None)
+def default_model_parameters(name: str) -> ModelParameters:
+    """
+    Return the compiled default `model_parameters` of the model `name`, read from its JSON file in
+    `timexseries/data_prediction/models/default_prediction_parameters` the first time it is requested.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model, e.g. "LSTM".
+
+    Returns
+    -------
+    ModelParameters
+        Default parameters of the model, shared by all its instances.
+    """
+    log.debug(f"Loading default settings of {name}...")
+    parsed = pkgutil.get_data("timexseries.data_prediction.models",
+                              "default_prediction_parameters/" + name + ".json")
+    return ModelParameters(json.loads(parsed))
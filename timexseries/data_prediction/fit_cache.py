@@ -0,0 +1,270 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+log = logging.getLogger(__name__)
+
+# Caches opened by this process, by directory; see `fit_cache`.
+_caches = {}
+
+
+def _hash_part(digest, part):
+    if isinstance(part, (DataFrame, Series)):
+        digest.update(repr(part.shape).encode())
+        digest.update(repr([*part.columns] if isinstance(part, DataFrame) else part.name).encode())
+        digest.update(repr([str(t) for t in (part.dtypes if isinstance(part, DataFrame) else [part.dtype])]).encode())
+        digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+    elif isinstance(part, dict):
+        # Values are hashed one by one, so that e.g. arrays of parameters are hashed entirely and not by their
+        # (possibly summarized) string representation.
+        digest.update(b"{")
+        for key, value in sorted(part.items(), key=lambda item: repr(item[0])):
+            _hash_part(digest, key)
+            _hash_part(digest, value)
+        digest.update(b"}")
+    elif isinstance(part, (list, tuple)):
+        digest.update(b"[")
+        for value in part:
+            _hash_part(digest, value)
+        digest.update(b"]")
+    elif hasattr(part, "detach") and hasattr(part, "numpy"):
+        # torch tensors, without importing torch.
+        _hash_part(digest, part.detach().cpu().numpy())
+    elif isinstance(part, np.ndarray):
+        digest.update(part.dtype.str.encode())
+        digest.update(np.ascontiguousarray(part).tobytes())
+    elif part is None or isinstance(part, (str, int, float, bool, np.generic)):
+        digest.update(repr(part).encode())
+    else:
+        digest.update(pickle.dumps(part, protocol=pickle.HIGHEST_PROTOCOL))
+    # Separator, so that different sequences of parts never give the same stream of bytes.
+    digest.update(b"\x00")
+
+
+def fit_key(*parts) -> str:
+    """
+    Return the content address of a fit, i.e. a SHA-256 digest of `parts`.
+
+    DataFrames and Series are hashed by value, together with their index, column names and dtypes; dictionaries, e.g.
+    configuration parameters, are hashed independently of the order of their keys; any other object is hashed through
+    its pickled representation.
+
+    Parameters
+    ----------
+    parts
+        Everything the result of the fit depends on, e.g. model name, parameters, transformation and training data.
+
+    Returns
+    -------
+    str
+        Hexadecimal digest.
+
+    Examples
+    --------
+    >>> ds = pd.date_range('2000-01-01', periods=3)
+    >>> fit_key("LSTM", {"a": 1, "b": 2}, DataFrame({"a": [1, 2, 3]}, index=ds)) == \
+    ...     fit_key("LSTM", {"b": 2, "a": 1}, DataFrame({"a": [1, 2, 3]}, index=ds))
+    True
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        _hash_part(digest, part)
+    return digest.hexdigest()
+
+
+class FitCache:
+    """
+    Persistent, content-addressed cache of the results of model fits (forecasts, validation performances, fitted
+    parameters...), stored on disk in `directory`, one pickle file per entry.
+
+    Entries are addressed by the `fit_key` of everything the fit depends on, so they never need to be invalidated: a
+    change in the data or in the configuration simply gives a different key. Hence, the cache is useful across runs,
+    e.g. when the same data is processed again with the same configuration. The steps of the historical predictions
+    do not share fits: each one moves forward the end of all the training windows and the validation set.
+
+    The size of the cache is bounded by `max_size`: when it is exceeded, the least recently used entries are evicted.
+    The last use of an entry is its modification time, which is updated on each hit. The size is read from the
+    directory only once, then tracked in memory as entries are stored; the directory is scanned again only when the
+    tracked size exceeds `max_size`, and the entries stored meanwhile by other processes are counted at that time.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the cache; it is created if it does not exist.
+    max_size : int, optional, default None
+        Maximum size of the cache, in bytes. None means no limit.
+
+    Attributes
+    ----------
+    hits : int
+        Number of lookups of this process which found their entry.
+    misses : int
+        Number of lookups of this process which did not find their entry.
+    """
+
+    def __init__(self, directory: str, max_size: int = None):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # Size of the entries, in bytes, as tracked by `put`; None until it is first read from the directory.
+        self._size = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".pkl")
+
+    def get(self, key: str):
+        """
+        Return the value stored with `key`, or None if there is no such entry.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                value = pickle.load(file)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # Entries written by another version of the libraries may not be readable anymore.
+            log.debug(f"Discarding unreadable fit cache entry {key}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value):
+        """
+        Store `value` with `key`, then evict the least recently used entries if the cache is too large. The entry is
+        written to a temporary file and moved in place, so that concurrent readers never see a partial entry.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if self.max_size is not None and self._size is None:
+            self._size = self.size()
+
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(temporary_path)
+            try:
+                replaced_size = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced_size = 0
+            os.replace(temporary_path, path)
+        except Exception as e:
+            log.warning(f"Can not store the fit cache entry {key}: {e}")
+            self._remove(temporary_path)
+            return
+
+        if self._size is not None:
+            self._size += size - replaced_size
+        if self.max_size is not None and self._size > self.max_size:
+            self.evict(self.max_size)
+
+    def entries(self) -> [tuple]:
+        """
+        Return the entries of the cache as `(last use, size, path)` tuples, from the least recently used.
+        """
+        entries = []
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                if entry.name.endswith(".pkl"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def size(self) -> int:
+        """
+        Return the total size of the entries of the cache, in bytes.
+        """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_size: int):
+        """
+        Remove the least recently used entries, until the size of the cache is at most `max_size` bytes.
+        """
+        entries = self.entries()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_size <= max_size:
+                break
+            self._remove(path)
+            total_size -= size
+        self._size = total_size
+
+    def clear(self):
+        """
+        Remove all the entries of the cache.
+        """
+        self.evict(0)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of the lookups of this process which found their entry; 0 if there was no lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def stats(self) -> dict:
+        """
+        Return the statistics of the cache: hits, misses, hit rate, number of entries and size in bytes.
+
+        Examples
+        --------
+        >>> cache = fit_cache("fit_cache")
+        >>> cache.stats()
+        {'hits': 4, 'misses': 6, 'hit_rate': 0.4, 'entries': 6, 'size': 91514}
+        """
+        entries = self.entries()
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate, "entries": len(entries),
+                "size": sum(size for _, size, _ in entries)}
+
+
+def fit_cache(directory: str, max_size: int = None) -> FitCache:
+    """
+    Return the `FitCache` of `directory`, shared by all the models of this process, so that its statistics cover the
+    whole run.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the cache.
+    max_size : int, optional, default None
+        Maximum size of the cache, in bytes. None means no limit.
+
+    Returns
+    -------
+    FitCache
+        Cache stored in `directory`.
+    """
+    directory = os.path.abspath(directory)
+    if directory not in _caches:
+        _caches[directory] = FitCache(directory, max_size)
+    else:
+        _caches[directory].max_size = max_size
+    return _caches[directory]
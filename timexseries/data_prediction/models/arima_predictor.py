@@ -1,49 +1,236 @@
+import logging
+import multiprocessing
+import time
+import weakref
+
 from pandas import DataFrame
 import warnings
 import itertools
 import statsmodels.api as sm
 import pandas as pd
+import numpy as np
 
 from timexseries.data_prediction import PredictionModel
+from timexseries.data_prediction.training_pool import TrainingPool, JobInterrupted, JobTimeout, job_time_left
+log = logging.getLogger(__name__)
+
+
+class _FitTimeout(Exception):
+    pass
+
+
+def _fit_configuration(input_data: DataFrame, order: tuple, seasonal_order: tuple, start_params=None,
+                       maxiter: int = 50, timeout: float = None):
+    """
+    Fit a SARIMAX model with the given orders on `input_data`.
+
+    The fit is stopped, from the callback of the optimizer, after `timeout` seconds, or when the job of the
+    `TrainingPool` which runs it is about to time out.
+
+    Returns
+    -------
+    SARIMAXResults or None
+        Fitted results, or None if the configuration can not be fitted or has run out of time.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    job_left = job_time_left()
+    if job_left is not None:
+        # Leave some time to send back the result before the job times out.
+        deadline = min(deadline or np.inf, time.monotonic() + 0.9 * job_left)
+
+    def check_deadline(_):
+        if deadline is not None and time.monotonic() > deadline:
+            raise _FitTimeout()
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            mod = sm.tsa.statespace.SARIMAX(input_data, order=order, seasonal_order=seasonal_order,
+                                            enforce_stationarity=False, enforce_invertibility=False)
+            if start_params is not None and len(start_params) != len(mod.start_params):
+                start_params = None
+            return mod.fit(start_params=start_params, maxiter=maxiter, disp=0, callback=check_deadline)
+    except _FitTimeout:
+        log.debug(f"SARIMAX{order}x{seasonal_order} stopped after its time limit.")
+    except Exception as e:
+        log.debug(f"SARIMAX{order}x{seasonal_order} can not be fitted: {e}")
+    return None
+
+
+def _fit_configuration_job(input_data: DataFrame, order: tuple, seasonal_order: tuple, start_params=None,
+                           maxiter: int = 50, timeout: float = None):
+    """
+    `_fit_configuration` for the workers of a `TrainingPool`: only the AIC and the parameters are sent back, because
+    the results object also holds the data and the matrices of the state space, and it is far bigger.
+    """
+    result = _fit_configuration(input_data, order, seasonal_order, start_params, maxiter, timeout)
+    if result is None:
+        return None
+    return result.aic, np.asarray(result.params)
+
+
+def _orders(arima_parameters: dict, entry: str) -> [int]:
+    try:
+        value = arima_parameters[entry]
+    except KeyError:
+        return [0, 1]
+    if isinstance(value, str):
+        return [int(v) for v in value.split(",")]
+    if isinstance(value, int):
+        return [value]
+    return [int(v) for v in value]
 
 
 class ARIMAModel(PredictionModel):
-    """ARIMA prediction model."""
+    """
+    ARIMA prediction model.
 
-    # NOT WORKING
+    Each training fits a grid of SARIMAX(p, d, q)x(P, D, Q, m) configurations and keeps the one with the lowest AIC.
+    The grid and its fits are configured by the `arima_parameters` entry of `model_parameters`, a dictionary with:
+
+    - `p`, `d`, `q`, `P`, `D`, `Q`: orders to try, as comma-separated strings, e.g. "0,1,2". Default "0,1" for all
+    - `seasonal_period`: number of periods of a season (m). Default 12
+    - `maxiter`: maximum number of iterations of the optimizer of each fit. Default 50
+    - `fit_timeout`: maximum duration of the fit of a configuration, in seconds; a configuration which is still being
+      fitted is discarded. None for no limit. Default None
+    - `processes`: number of processes which fit the configurations of the grid in parallel, in a `TrainingPool`
+      started by the first training and re-used by the following ones of the same model. It only applies to the
+      trainings executed in this process, e.g. all the training windows with `max_threads` 1: the trainings executed
+      by the workers of a `TrainingPool` (e.g. the training windows of the pipeline, with `max_threads` greater than 1)
+      always fit the grid sequentially, in their own process. Default 1
+
+    The grid is also stopped, keeping the best configuration found so far, when the `TrainingPool` job which runs the
+    training is about to time out.
+    """
+    # Each training fits the whole grid of SARIMAX configurations.
+    cost_factor = 20.0
+    local_attributes = PredictionModel.local_attributes + ("_grid_pool", )
 
     def __init__(self, params: dict, transformation: str = None):
         super().__init__(params, name="ARIMA", transformation=transformation)
+        self.grid_parameters = {}
+
+        try:
+            arima_parameters = self.model_parameters["arima_parameters"]
+        except KeyError:
+            arima_parameters = {}
+
+        try:
+            seasonal_period = arima_parameters["seasonal_period"]
+        except KeyError:
+            seasonal_period = 12
+
+        self.orders = list(itertools.product(*[_orders(arima_parameters, e) for e in ["p", "d", "q"]]))
+        self.seasonal_orders = [(*o, seasonal_period)
+                                for o in itertools.product(*[_orders(arima_parameters, e) for e in ["P", "D", "Q"]])]
+
+        try:
+            self.maxiter = arima_parameters["maxiter"]
+        except KeyError:
+            self.maxiter = 50
+
+        try:
+            self.fit_timeout = arima_parameters["fit_timeout"]
+        except KeyError:
+            self.fit_timeout = None
+
+        try:
+            self.processes = arima_parameters["processes"]
+        except KeyError:
+            self.processes = 1
+
+        # Pool which fits the grid in parallel, started by the first training which needs it.
+        self._grid_pool = None
+
+    def __getstate__(self):
+        # The pool of the grid belongs to this process: a copy of the model sent to another one starts its own.
+        state = self.__dict__.copy()
+        state["_grid_pool"] = None
+        return state
 
     def train(self, input_data: DataFrame, extra_regressor: DataFrame = None):
-        p = d = q = range(0, 2)
-        pdq = list(itertools.product(p, d, q))
-        seasonal_pdq = [(x[0], x[1], x[2], 12) for x in list(itertools.product(p, d, q))]
-
-        results = []
-        for param in pdq:
-            for param_seasonal in seasonal_pdq:
-                try:
-                    with warnings.catch_warnings():
-                        warnings.simplefilter("ignore")
-                        mod = sm.tsa.statespace.SARIMAX(input_data, order=param, seasonal_order=param_seasonal,
-                                                        enforce_stationarity=False, enforce_invertibility=False)
-                        result = mod.fit(disp=0)
-                        results.append((param, param_seasonal, result.aic))
-                except:
-                    continue
-
-        results.sort(key=lambda x: x[2])
-
-        mod = sm.tsa.statespace.SARIMAX(input_data,
-                                        order=results[0][0],
-                                        seasonal_order=results[0][1],
-                                        enforce_stationarity=False,
-                                        enforce_invertibility=False)
-        # TODO: avoid re-training again
+        """Overrides PredictionModel.train()"""
+        initial_parameters = self.initial_parameters if self.initial_parameters is not None else {}
+        grid = [(order, seasonal_order) for order in self.orders for seasonal_order in self.seasonal_orders]
+        self.grid_parameters = {}
+
+        # Daemonic processes, like the workers of a TrainingPool, can not start other processes.
+        if self.processes > 1 and not multiprocessing.current_process().daemon:
+            best = self._search_parallel(input_data, grid, initial_parameters)
+        else:
+            best = self._search(input_data, grid, initial_parameters)
+
+        if best is None:
+            raise ValueError(f"None of the {len(grid)} SARIMAX configurations could be fitted.")
+        self.model = best
+
+    def _search(self, input_data: DataFrame, grid: [tuple], initial_parameters: dict):
+        """
+        Fit the configurations of `grid` one after the other, and return the fitted results of the best one.
+        """
+        best = None
+        for order, seasonal_order in grid:
+            job_left = job_time_left()
+            if job_left is not None and job_left <= 0:
+                log.warning(f"ARIMA grid search stopped after {len(self.grid_parameters)} configurations: "
+                            f"the job is about to time out.")
+                break
+
+            start_params = initial_parameters.get((order, seasonal_order))
+            result = _fit_configuration(input_data, order, seasonal_order, start_params, self.maxiter, self.fit_timeout)
+            if result is None:
+                continue
+
+            self.grid_parameters[(order, seasonal_order)] = np.asarray(result.params)
+            # The fitted results of the best configuration are kept, so that it has not to be fitted again.
+            if best is None or result.aic < best.aic:
+                best = result
+
+        if best is None and job_time_left() is not None and job_time_left() <= 0:
+            raise JobTimeout("ARIMA grid search timed out before fitting any configuration.")
+        return best
+
+    def _search_parallel(self, input_data: DataFrame, grid: [tuple], initial_parameters: dict):
+        """
+        Fit the configurations of `grid` on the `processes` workers of the pool of this model, and return the fitted
+        results of the best one.
+
+        The workers send back only the parameters of each configuration: the results of the best one are computed
+        from its parameters by a single pass of the Kalman smoother, without fitting it again.
+        """
+        if self._grid_pool is None:
+            self._grid_pool = TrainingPool(self.processes, preload=["statsmodels.api"], threads_per_worker=1,
+                                           job_timeout=self.fit_timeout)
+            weakref.finalize(self, self._grid_pool.close)
+
+        fits = self._grid_pool.run([(_fit_configuration_job,
+                                     (input_data, order, seasonal_order,
+                                      initial_parameters.get((order, seasonal_order)), self.maxiter, self.fit_timeout))
+                                    for order, seasonal_order in grid])
+
+        best = None
+        for (order, seasonal_order), fit in zip(grid, fits):
+            if fit is None or isinstance(fit, JobInterrupted):
+                continue
+            aic, params = fit
+            self.grid_parameters[(order, seasonal_order)] = params
+            if best is None or aic < best[0]:
+                best = (aic, order, seasonal_order, params)
+
+        if best is None:
+            return None
+
+        _, order, seasonal_order, params = best
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
-            self.model = mod.fit(disp=0)
+            mod = sm.tsa.statespace.SARIMAX(input_data, order=order, seasonal_order=seasonal_order,
+                                            enforce_stationarity=False, enforce_invertibility=False)
+            return mod.smooth(params)
+
+    def fitted_parameters(self):
+        """Overrides PredictionModel.fitted_parameters()"""
+        # Starting parameters for each configuration of the grid.
+        return self.grid_parameters if len(self.grid_parameters) > 0 else None
 
     def predict(self, future_dataframe: DataFrame, extra_regressor: DataFrame = None) -> DataFrame:
         """Overrides PredictionModel.predict()"""
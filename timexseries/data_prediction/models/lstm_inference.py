@@ -0,0 +1,220 @@
+import io
+import json
+import logging
+import pickle
+import warnings
+
+import numpy as np
+import torch
+from pandas import DataFrame
+
+log = logging.getLogger(__name__)
+
+# Files stored in the TorchScript archive together with the network.
+METADATA_FILE = "timex.json"
+TRANSFORMATION_FILE = "transformation.pkl"
+FORMAT_VERSION = 1
+
+
+def forecast_steps(network, context: torch.Tensor, horizon: int, regressors: torch.Tensor = None,
+                   stateful: bool = True) -> np.ndarray:
+    """
+    Forecast, autoregressively, the `horizon` values which follow `context`, with a network which returns, for a batch
+    of sequences and an initial state, the prediction of the next value of each sequence and its final state.
+
+    Parameters
+    ----------
+    network : torch.nn.Module
+        Network, e.g. `timexseries.data_prediction.models.lstm_predictor.LSTM` or its TorchScript version.
+    context : Tensor
+        Last known values, of shape (n_in, features), already scaled; the target is the first feature.
+    horizon : int
+        Number of values to forecast.
+    regressors : Tensor, optional, default None
+        Scaled values of the extra regressors in the forecast period, of shape (horizon, features - 1).
+    stateful : bool, optional, default True
+        If True, the hidden state is warmed up once on `context` and then advanced by one step for each value, so that
+        the forecast costs `horizon` steps of the network. If False, each value is predicted from zero state on the
+        last n_in values, which costs n_in steps per value.
+
+    Returns
+    -------
+    ndarray
+        Forecast values, still scaled.
+    """
+    dev = context.device
+    n_in, n_features = context.shape
+    predictions = torch.empty(horizon, device=dev)
+
+    with torch.no_grad():
+        if stateful:
+            # Warm up the hidden state on the context window once, then advance it by one step per prediction.
+            step = torch.empty(1, 1, n_features, device=dev)
+            result, hidden_cell = network(context.unsqueeze(0))
+            for i in range(horizon):
+                predictions[i] = result[0, 0]
+                if i == horizon - 1:
+                    break
+                step[0, 0, 0] = result[0, 0]
+                if regressors is not None:
+                    step[0, 0, 1:] = regressors[i]
+                result, hidden_cell = network(step, hidden_cell)
+        else:
+            # Each prediction is computed from zero state, on the last n_in values, as the network was trained.
+            window = torch.empty(n_in + horizon, n_features, device=dev)
+            window[:n_in] = context
+            for i in range(horizon):
+                result, _ = network(window[i:i + n_in].unsqueeze(0))
+                predictions[i] = result[0, 0]
+                window[n_in + i, 0] = result[0, 0]
+                if regressors is not None:
+                    window[n_in + i, 1:] = regressors[i]
+
+    return predictions.cpu().numpy()
+
+
+def _scale(values: np.ndarray) -> np.ndarray:
+    # Same as `MinMaxScaler(feature_range=(-1, 1)).fit_transform`, column by column, as done by `LSTMModel.predict`.
+    data_min = np.nanmin(values, axis=0)
+    data_range = np.nanmax(values, axis=0) - data_min
+    data_range[data_range == 0.0] = 1.0
+    return (values - data_min) * (2 / data_range) - 1
+
+
+def save_lstm(path, network: torch.nn.Module, metadata: dict, transformation):
+    """
+    Save `network` as TorchScript in `path`, together with the `metadata` needed to forecast with it and the
+    `transformation` of the data. Use `LSTMModel.export`, which collects them, instead of calling this directly.
+    """
+    with warnings.catch_warnings():
+        # TorchScript is deprecated by the most recent versions of torch, in favor of `torch.export`, which is not
+        # available in the older versions supported by TIMEX.
+        warnings.simplefilter("ignore", FutureWarning)
+        scripted = torch.jit.script(network.cpu().eval())
+        torch.jit.save(scripted, path, _extra_files={
+            METADATA_FILE: json.dumps({"format_version": FORMAT_VERSION, **metadata}),
+            TRANSFORMATION_FILE: pickle.dumps(transformation, protocol=pickle.HIGHEST_PROTOCOL)})
+
+
+def _load_archive(source) -> tuple:
+    extra_files = {METADATA_FILE: "", TRANSFORMATION_FILE: ""}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        network = torch.jit.load(source, map_location="cpu", _extra_files=extra_files)
+    metadata = json.loads(extra_files[METADATA_FILE])
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported LSTM export format: {metadata.get('format_version')}.")
+    return network, metadata, pickle.loads(extra_files[TRANSFORMATION_FILE])
+
+
+class LSTMForecaster:
+    """
+    Predict-only LSTM, as exported by `timexseries.data_prediction.models.lstm_predictor.LSTMModel.export` and loaded
+    with `load_lstm`. It contains the TorchScript network, the scaling of the time-series, the last values of the
+    training set and the transformation of the data, so it can forecast without the training code: neither
+    `lstm_predictor` nor the other models are imported.
+
+    It can be pickled, e.g. to send it to worker processes: if it has been loaded from a file, only the path of the
+    file is pickled, and each process loads the network from it; otherwise, the whole archive is pickled.
+
+    Parameters
+    ----------
+    network : torch.jit.ScriptModule
+        The TorchScript network.
+    metadata : dict
+        Metadata of the export.
+    transformation : Transformation
+        Transformation of the data used to train the network.
+    path : str, optional, default None
+        File from which the forecaster has been loaded, if any.
+
+    Examples
+    --------
+    >>> model.train(timeseries_dataframe)
+    >>> model.export("lstm.pt")
+    >>> forecaster = load_lstm("lstm.pt")
+    >>> forecaster.forecast(future_dataframe)
+    """
+
+    def __init__(self, network, metadata: dict, transformation, path: str = None):
+        self.network = network
+        self.metadata = metadata
+        self.transformation = transformation
+        self.path = path
+
+        self.len_train_set = metadata["len_train_set"]
+        self.stateful_inference = metadata["stateful_inference"]
+        self.values_for_prediction = torch.tensor(metadata["values_for_prediction"], dtype=torch.float32)
+        self.y_min, self.y_scale = metadata["y_scaler"]
+
+    def __getstate__(self):
+        if self.path is not None:
+            return {"path": self.path}
+
+        archive = io.BytesIO()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            torch.jit.save(self.network, archive, _extra_files={
+                METADATA_FILE: json.dumps(self.metadata),
+                TRANSFORMATION_FILE: pickle.dumps(self.transformation, protocol=pickle.HIGHEST_PROTOCOL)})
+        return {"archive": archive.getvalue()}
+
+    def __setstate__(self, state):
+        if "path" in state:
+            self.__init__(*_load_archive(state["path"]), path=state["path"])
+        else:
+            self.__init__(*_load_archive(io.BytesIO(state["archive"])))
+
+    def predict(self, future_dataframe: DataFrame, extra_regressors: DataFrame = None) -> DataFrame:
+        """
+        Fill the last values of the first column of `future_dataframe`, after the `len_train_set` values of the
+        training set, as `LSTMModel.predict` of the exported model: the values are still transformed.
+
+        Parameters
+        ----------
+        future_dataframe : DataFrame
+            DataFrame with the index of the training set and of the forecast period.
+        extra_regressors : DataFrame, optional, default None
+            Values of the extra regressors, if the model has been trained with them.
+
+        Returns
+        -------
+        DataFrame
+            `future_dataframe`, with the forecast.
+        """
+        requested_prediction = len(future_dataframe) - self.len_train_set
+
+        regressors = None
+        if extra_regressors is not None:
+            values = extra_regressors.iloc[-requested_prediction:].to_numpy(dtype=np.float64)
+            regressors = torch.from_numpy(_scale(values).astype(np.float32))
+
+        results = forecast_steps(self.network, self.values_for_prediction, requested_prediction, regressors,
+                                 self.stateful_inference)
+        future_dataframe.iloc[-requested_prediction:, 0] = (results.astype(np.float64) - self.y_min) / self.y_scale
+        return future_dataframe
+
+    def forecast(self, future_dataframe: DataFrame, extra_regressors: DataFrame = None) -> DataFrame:
+        """
+        As `predict`, but the forecast is transformed back to the original values of the time-series.
+        """
+        future_dataframe = self.predict(future_dataframe, extra_regressors)
+        future_dataframe.iloc[:, 0] = self.transformation.inverse(future_dataframe.iloc[:, 0])
+        return future_dataframe
+
+
+def load_lstm(path) -> LSTMForecaster:
+    """
+    Load an LSTM exported with `timexseries.data_prediction.models.lstm_predictor.LSTMModel.export`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the exported file.
+
+    Returns
+    -------
+    LSTMForecaster
+        Predict-only model.
+    """
+    return LSTMForecaster(*_load_archive(path), path=path)
@@ -1,62 +1,222 @@
 import logging
+import math
+import time
+from typing import Optional, Tuple
 
 from pandas import DataFrame
 import numpy as np
 import torch
 import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
 from sklearn.preprocessing import MinMaxScaler
 
 from timexseries.data_prediction import PredictionModel
+from timexseries.data_prediction.models.lstm_inference import forecast_steps, save_lstm
+from timexseries.data_prediction.training_pool import job_time_left
 log = logging.getLogger(__name__)
 
 
-def split_sequences(df, n_in, n_out, n_features):
-    in_out_sequence = []
-
-    for i in range(len(df)):
-        # find the end of this pattern
-        end_ix = i + n_in
-        out_end_ix = end_ix + n_out
-        # check if we are beyond the sequence
-        if out_end_ix > len(df):
-            break
-        # gather input and output parts of the pattern
-        seq_x = []
-        for j in range(i, end_ix):
-            this_x = []
-            for k in range(0, n_features):
-                this_x.append(df.iloc[j, k])
-                seq_x.append(this_x)
-
-        seq_y = list(df.iloc[end_ix:out_end_ix, 0].values)
-        in_out_sequence.append((seq_x, seq_y))
-    return in_out_sequence
+def split_sequences(data: np.ndarray, n_in: int, n_out: int) -> (np.ndarray, np.ndarray):
+    """
+    Split a multivariate time-series in the sliding windows used to train the LSTM: each sample is made of `n_in`
+    consecutive values of all the time-series (input) and the following `n_out` values of the first one (output).
+
+    The windows are obtained as a strided view of `data`, without any Python loop, and then copied in two contiguous
+    arrays.
+
+    Parameters
+    ----------
+    data : ndarray
+        Array of shape (length of the time-series, number of features); the target time-series is the first column.
+    n_in : int
+        Length of the input of each sample.
+    n_out : int
+        Length of the output of each sample.
+
+    Returns
+    -------
+    ndarray, ndarray
+        Inputs, of shape (samples, `n_in`, features), and outputs, of shape (samples, `n_out`), as float32.
+
+    Examples
+    --------
+    >>> x, y = split_sequences(np.arange(6).reshape(-1, 1), n_in=3, n_out=1)
+    >>> x[:, :, 0]
+    array([[0., 1., 2.],
+           [1., 2., 3.],
+           [2., 3., 4.]], dtype=float32)
+    >>> y
+    array([[3.],
+           [4.],
+           [5.]], dtype=float32)
+    """
+    data = np.asarray(data, dtype=np.float32)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+
+    length, n_features = data.shape
+    samples = max(0, length - n_in - n_out + 1)
+    data = np.ascontiguousarray(data)
+    row_stride, feature_stride = data.strides
+
+    x = np.lib.stride_tricks.as_strided(data, shape=(samples, n_in, n_features),
+                                        strides=(row_stride, row_stride, feature_stride), writeable=False)
+    y = np.lib.stride_tricks.as_strided(data[n_in:, 0], shape=(samples, n_out),
+                                        strides=(row_stride, row_stride), writeable=False)
+    return x.copy(), y.copy()
 
 
 class LSTM(nn.Module):
-    def __init__(self, input_size=1, hidden_layer_size=20):
+    def __init__(self, input_size=1, hidden_layer_size=20, num_layers=1):
         super().__init__()
         self.hidden_layer_size = hidden_layer_size
 
-        self.lstm = nn.LSTM(input_size, hidden_layer_size, num_layers=1)
+        self.lstm = nn.LSTM(input_size, hidden_layer_size, num_layers=num_layers, batch_first=True)
 
         self.linear = nn.Linear(hidden_layer_size, 1)
 
-        self.hidden_cell = (torch.zeros(1, 1, self.hidden_layer_size),
-                            torch.zeros(1, 1, self.hidden_layer_size))
-
-    def forward(self, input_seq):
-        lstm_out, self.hidden_cell = self.lstm(input_seq.view(len(input_seq), 1, -1), self.hidden_cell)
-        predictions = self.linear(lstm_out.view(len(input_seq), -1))
-        return predictions[-1]
+    def forward(self, input_seq, hidden_cell: Optional[Tuple[torch.Tensor, torch.Tensor]] = None):
+        # input_seq is a batch of shape (batch, seq, features); hidden_cell is the state to start from, None for zeros.
+        # The network does not keep any state: the final one is returned with the prediction of the next value of each
+        # sequence, so that it can be carried over to the next call.
+        lstm_out, hidden_cell = self.lstm(input_seq, hidden_cell)
+        predictions = self.linear(lstm_out[:, -1])
+        return predictions, hidden_cell
 
 
 class LSTMModel(PredictionModel):
-    """LSTM prediction model."""
+    """
+    LSTM prediction model.
+
+    The network and its training are configured by the `lstm_parameters` entry of `model_parameters`, a dictionary
+    with:
+
+    - `epochs`: number of passes over the training samples. Default 10
+    - `batch_size`: number of samples of each optimizer step. Default 32
+    - `hidden_size`: number of features of the hidden state. Default 20
+    - `num_layers`: number of stacked LSTM layers. Default 1
+    - `learning_rate`: learning rate of the Adam optimizer. Default 0.01
+    - `validation_split`: fraction of the training samples, the most recent ones, held out to compute the validation
+      loss after each epoch. If 0, the training loss of each epoch is used instead. Default 0
+    - `patience`: stop the training (early stopping) after this number of epochs without improvements of the
+      validation loss, restoring the weights of the best epoch. None to always train for `epochs` epochs. Default None
+    - `lr_patience`: multiply the learning rate by `lr_factor` (default 0.1) after this number of epochs without
+      improvements of the validation loss, as `torch.optim.lr_scheduler.ReduceLROnPlateau`. None to keep the learning
+      rate fixed. Default None
+    - `max_fit_time`: maximum duration of a training, in seconds. The training is also stopped before the timeout of
+      the `TrainingPool` job which runs it, if any. None for no limit. Default None
+
+    - `stateful_inference`: if True, the forecast warms up the hidden state on the last `n_in` values and then
+      advances it by one step for each predicted value, so that a horizon of h values costs h steps of the network.
+      If False, each value is predicted from zero state on the last `n_in` values, as during the training, which costs
+      `n_in` steps per value. Default True
+
+    - `global`: if True, a single network is trained on the windows of all the time-series of the ingested data, each
+      one scaled separately, instead of one network for each time-series, training window and transformation; see
+      `timexseries.data_prediction.models.predictor.PredictionModel.train_global`. Each time-series is then forecast
+      by this network, from its own context and scaling. The global network is trained on the CPU. Not used with
+      extra regressors. Default False
+
+    The number of epochs and the duration of the last training are recorded in `model_characteristics`, as `epochs`
+    and `training_time`.
+
+    A trained model can be exported with `export`, and loaded as a predict-only model, which does not need the training
+    code, with `timexseries.data_prediction.models.lstm_inference.load_lstm`.
+    """
+    cost_factor = 5.0
+    # torch can not be used in a process forked after torch has started its threads.
+    worker_start_methods = ["spawn", "forkserver"]
+
     def __init__(self, params: dict, transformation: str = None):
         super().__init__(params, name="LSTM", transformation=transformation)
         self.scalers = {}
 
+        try:
+            lstm_parameters = self.model_parameters["lstm_parameters"]
+        except KeyError:
+            lstm_parameters = {}
+
+        try:
+            self.epochs = lstm_parameters["epochs"]
+        except KeyError:
+            self.epochs = 10
+
+        try:
+            self.batch_size = lstm_parameters["batch_size"]
+        except KeyError:
+            self.batch_size = 32
+
+        try:
+            self.hidden_size = lstm_parameters["hidden_size"]
+        except KeyError:
+            self.hidden_size = 20
+
+        try:
+            self.num_layers = lstm_parameters["num_layers"]
+        except KeyError:
+            self.num_layers = 1
+
+        try:
+            self.learning_rate = lstm_parameters["learning_rate"]
+        except KeyError:
+            self.learning_rate = 0.01
+
+        try:
+            self.validation_split = lstm_parameters["validation_split"]
+        except KeyError:
+            self.validation_split = 0
+
+        try:
+            self.patience = lstm_parameters["patience"]
+        except KeyError:
+            self.patience = None
+
+        try:
+            self.lr_patience = lstm_parameters["lr_patience"]
+        except KeyError:
+            self.lr_patience = None
+
+        try:
+            self.lr_factor = lstm_parameters["lr_factor"]
+        except KeyError:
+            self.lr_factor = 0.1
+
+        try:
+            self.max_fit_time = lstm_parameters["max_fit_time"]
+        except KeyError:
+            self.max_fit_time = None
+
+        try:
+            self.stateful_inference = lstm_parameters["stateful_inference"]
+        except KeyError:
+            self.stateful_inference = True
+
+        try:
+            self.global_model = lstm_parameters["global"]
+        except KeyError:
+            self.global_model = False
+
+    def __getstate__(self):
+        # The network is exchanged with the training workers as a state_dict of CPU tensors, so that unpickling it
+        # never initializes CUDA in the receiving process.
+        state = self.__dict__.copy()
+        model = state.pop("model", None)
+        if model is not None:
+            state["model_state"] = ({k: v.cpu() for k, v in model.state_dict().items()},
+                                    model.lstm.input_size, model.hidden_layer_size, model.lstm.num_layers)
+        if "values_for_prediction" in state:
+            state["values_for_prediction"] = state["values_for_prediction"].cpu()
+        return state
+
+    def __setstate__(self, state):
+        model_state = state.pop("model_state", None)
+        self.__dict__.update(state)
+        if model_state is not None:
+            weights, input_size, hidden_layer_size, num_layers = model_state
+            self.model = LSTM(input_size=input_size, hidden_layer_size=hidden_layer_size, num_layers=num_layers)
+            self.model.load_state_dict(weights)
+            self.model.eval()
+
     def train(self, input_data: DataFrame, extra_regressors: DataFrame = None):
         """Overrides PredictionModel.train()"""
 
@@ -86,39 +246,172 @@ class LSTMModel(PredictionModel):
         self.scalers['y'] = MinMaxScaler(feature_range=(-1, 1))
         input_data['y'] = self.scalers['y'].fit_transform(input_data[['y']])
 
-        n_steps_in, n_steps_out = round(len(input_data)/4), 1
+        data = input_data.to_numpy(dtype=np.float32)
 
-        train_inout_seq = split_sequences(input_data, n_steps_in, n_steps_out, n_features=n_features)
+        self.model = LSTM(input_size=n_features, hidden_layer_size=self.hidden_size, num_layers=self.num_layers)
+        if self.global_parameters is not None and extra_regressors is None:
+            # The network has already been trained on all the time-series: only the scaling and the context of the
+            # forecast are specific to this training set, and the context has the length the network was trained on.
+            n_steps_in = self.global_parameters["n_in"]
+            self.model.load_state_dict(self.global_parameters["weights"])
+            self.model_characteristics["global_model"] = True
+        else:
+            n_steps_in, n_steps_out = round(len(input_data)/4), 1
+            x, y = split_sequences(data, n_steps_in, n_steps_out)
+            x, y = torch.from_numpy(x), torch.from_numpy(y)
 
-        for i in range(0, len(train_inout_seq)):
-            x = np.array(train_inout_seq[i][0], dtype=np.float32)
-            y = np.array(train_inout_seq[i][1], dtype=np.float32)
-            train_inout_seq[i] = (torch.from_numpy(x), torch.tensor(y))
+            if self.initial_parameters is not None:
+                try:
+                    self.model.load_state_dict(self.initial_parameters)
+                except RuntimeError:
+                    log.debug(f"Warm start weights do not fit the network: training from scratch.")
 
-        self.model = LSTM(input_size=n_features)
-        self.model.to(dev)
+            validation_samples = self._validation_samples(len(x))
+            self._fit_network(x[:len(x) - validation_samples], y[:len(x) - validation_samples],
+                              x[len(x) - validation_samples:], y[len(x) - validation_samples:], dev)
 
-        loss_function = nn.L1Loss()
-        optimizer = torch.optim.Adam(self.model.parameters(), lr=0.01)
+        self.model.eval()
+        # The forecast starts from the last n_in values, i.e. the context which precedes the first future value.
+        self.values_for_prediction = torch.from_numpy(data[-n_steps_in:].copy())
+        self.len_train_set = len(input_data)
 
-        epochs = 10
+    def train_global(self, ingested_data: DataFrame):
+        """Overrides PredictionModel.train_global()"""
+        # The global network is trained by the main process, before the training workers are started: CUDA is not
+        # initialized here, so that it is not inherited by them.
+        dev = "cpu"
+
+        series = []
+        for col in ingested_data.columns:
+            values = ingested_data[col].dropna()
+            if self.test_values == -1:
+                test_values = int(round(len(values) * (self.test_percentage / 100)))
+            else:
+                test_values = self.test_values
+            if test_values > 0:
+                values = values.iloc[:-test_values]
+            values = self.transformation.apply(values)
+            series.append(MinMaxScaler(feature_range=(-1, 1)).fit_transform(values.to_numpy().reshape(-1, 1)))
+
+        # All the samples have the same length, so that they can be stacked in the same batches.
+        n_steps_in, n_steps_out = max(1, round(min(len(s) for s in series) / 4)), 1
+
+        x_train, y_train, x_validation, y_validation = [], [], [], []
+        for values in series:
+            x, y = split_sequences(values, n_steps_in, n_steps_out)
+            validation_samples = self._validation_samples(len(x))
+            x_train.append(x[:len(x) - validation_samples])
+            y_train.append(y[:len(x) - validation_samples])
+            x_validation.append(x[len(x) - validation_samples:])
+            y_validation.append(y[len(x) - validation_samples:])
+
+        log.info(f"Training a global LSTM on {sum(len(x) for x in x_train)} samples of {len(series)} time-series...")
+        self.model = LSTM(input_size=1, hidden_layer_size=self.hidden_size, num_layers=self.num_layers)
+        self._fit_network(*[torch.from_numpy(np.concatenate(a)) for a in (x_train, y_train, x_validation, y_validation)],
+                          dev)
+        self.model.eval()
+        self.global_parameters = {"weights": self.fitted_parameters(), "n_in": n_steps_in}
+
+    def _validation_samples(self, samples: int) -> int:
+        """
+        Return how many of `samples` training samples, the most recent ones, are held out for validation, according to
+        `validation_split`; at least one is left for training.
+        """
+        if not self.validation_split:
+            return 0
+        return max(0, min(round(samples * self.validation_split), samples - 1))
+
+    def _fit_network(self, x: torch.Tensor, y: torch.Tensor, x_validation: torch.Tensor, y_validation: torch.Tensor,
+                     dev: str):
+        """
+        Train `self.model` on the samples `x`, `y`, as produced by `split_sequences`, with early stopping on
+        `x_validation`, `y_validation` if they are not empty. The number of epochs and the duration of the training are
+        stored in `model_characteristics`.
+        """
+        self.model.to(dev)
 
-        for i in range(epochs):
-            for seq, labels in train_inout_seq:
-                seq = seq.to(dev)
-                labels = labels.to(dev)
+        loss_function = nn.L1Loss()
+        optimizer = torch.optim.Adam(self.model.parameters(), lr=self.learning_rate)
+        scheduler = None
+        if self.lr_patience is not None:
+            scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(optimizer, factor=self.lr_factor,
+                                                                   patience=self.lr_patience)
+
+        train_samples = len(x)
+        validation_samples = len(x_validation)
+        x_validation, y_validation = x_validation.to(dev), y_validation.to(dev)
+
+        # The samples are already in memory, as a single tensor: the loader only shuffles and slices them in batches.
+        loader = DataLoader(TensorDataset(x.to(dev), y.to(dev)), batch_size=self.batch_size, shuffle=True)
+
+        start = time.monotonic()
+        time_budget = self.max_fit_time
+        job_left = job_time_left()
+        if job_left is not None:
+            # Leave some time to predict and return the result before the job times out.
+            time_budget = min(time_budget or math.inf, 0.9 * job_left)
+        deadline = start + time_budget if time_budget is not None else None
+
+        best_loss = math.inf
+        best_weights = None
+        epochs_without_improvement = 0
+        epochs = 0
+        out_of_time = False
+
+        for i in range(self.epochs):
+            self.model.train()
+            epoch_loss = 0.0
+            for seq, labels in loader:
                 optimizer.zero_grad()
-                self.model.hidden_cell = (torch.zeros(1, 1, self.model.hidden_layer_size).to(dev),
-                                          torch.zeros(1, 1, self.model.hidden_layer_size).to(dev))
 
-                y_pred = self.model(seq)
+                y_pred, _ = self.model(seq)
 
-                single_loss = loss_function(y_pred, labels)
-                single_loss.backward()
+                batch_loss = loss_function(y_pred, labels)
+                batch_loss.backward()
                 optimizer.step()
-
-        self.values_for_prediction = train_inout_seq[-1][0]
-        self.len_train_set = len(input_data)
+                epoch_loss += batch_loss.item() * len(seq)
+
+                if deadline is not None and time.monotonic() > deadline:
+                    out_of_time = True
+                    break
+            epochs += 1
+
+            if out_of_time:
+                log.debug(f"LSTM training stopped after {epochs} epochs: time budget of {time_budget:.1f}s exceeded.")
+                break
+
+            if validation_samples > 0:
+                self.model.eval()
+                with torch.no_grad():
+                    loss = loss_function(self.model(x_validation)[0], y_validation).item()
+            else:
+                loss = epoch_loss / train_samples
+
+            if scheduler is not None:
+                scheduler.step(loss)
+
+            if loss < best_loss:
+                best_loss = loss
+                epochs_without_improvement = 0
+                if self.patience is not None:
+                    best_weights = {k: v.detach().clone() for k, v in self.model.state_dict().items()}
+            else:
+                epochs_without_improvement += 1
+                if self.patience is not None and epochs_without_improvement >= self.patience:
+                    log.debug(f"LSTM training stopped early after {epochs} epochs.")
+                    break
+
+        if best_weights is not None:
+            self.model.load_state_dict(best_weights)
+
+        self.model_characteristics["epochs"] = epochs
+        self.model_characteristics["training_time"] = round(time.monotonic() - start, 3)
+
+    def fitted_parameters(self):
+        """Overrides PredictionModel.fitted_parameters()"""
+        if getattr(self, "model", None) is None:
+            return None
+        return {k: v.detach().cpu().clone() for k, v in self.model.state_dict().items()}
 
     def predict(self, future_dataframe: DataFrame, extra_regressors: DataFrame = None) -> DataFrame:
         """Overrides PredictionModel.predict()"""
@@ -129,6 +422,7 @@ class LSTMModel(PredictionModel):
 
         requested_prediction = len(future_dataframe) - self.len_train_set
 
+        regressors = None
         if extra_regressors is not None:
             extra_regressors = extra_regressors.iloc[-requested_prediction:].copy()
 
@@ -136,32 +430,36 @@ class LSTMModel(PredictionModel):
                 self.scalers[col] = MinMaxScaler(feature_range=(-1, 1))
                 extra_regressors[col] = self.scalers[col].fit_transform(extra_regressors[[col]])
 
-            tensors_to_append = []
-            for i in range(0, requested_prediction):
-                val = np.array(extra_regressors.iloc[i, :], dtype=np.float32)
-                tensors_to_append.append(torch.tensor(val))
+            regressors = torch.from_numpy(extra_regressors.to_numpy(dtype=np.float32)).to(dev)
 
-        x_input = self.values_for_prediction
-        x_input = x_input.to(dev)
+        self.model.to(dev)
         self.model.eval()
 
-        for i in range(requested_prediction):
-            seq = x_input[i:]
-            with torch.no_grad():
-                self.model.hidden = (torch.zeros(1, 1, self.model.hidden_layer_size),
-                                     torch.zeros(1, 1, self.model.hidden_layer_size))
-                result = self.model(seq)
-                if extra_regressors is not None:
-                    result = torch.cat((result, tensors_to_append[i].to(dev)))
-                x_input = torch.cat((x_input, result.view(1, -1)))
-
-
-        results = x_input[-requested_prediction:]
-        results = results.to("cpu")
-        results = [x[0] for x in results]
+        results = forecast_steps(self.model, self.values_for_prediction.to(dev), requested_prediction, regressors,
+                                 self.stateful_inference)
         actual_predictions = self.scalers['y'].inverse_transform(np.array(results).reshape(-1, 1))
         future_dataframe.iloc[-requested_prediction:, 0] = np.array(actual_predictions).flatten()
 
         return future_dataframe
 
-
+    def export(self, path):
+        """
+        Export the trained model in `path`, as a TorchScript network together with the scaling of the time-series, the
+        last values of the training set and the transformation of the data: everything needed to forecast, without
+        the training code. Load it with `timexseries.data_prediction.models.lstm_inference.load_lstm`.
+
+        Parameters
+        ----------
+        path : str or file-like object
+            Destination of the export.
+        """
+        if getattr(self, "model", None) is None:
+            raise ValueError("Only a trained LSTMModel can be exported.")
+
+        metadata = {
+            "len_train_set": self.len_train_set,
+            "stateful_inference": self.stateful_inference,
+            "values_for_prediction": self.values_for_prediction.cpu().tolist(),
+            "y_scaler": [float(self.scalers['y'].min_[0]), float(self.scalers['y'].scale_[0])],
+        }
+        save_lstm(path, self.model, metadata, self.transformation)
@@ -13,8 +13,10 @@ class MockUpModel(PredictionModel):
     This dataframe predicts always 0 is no extra regressors have been given, 1 otherwise.
 
     This can be useful in tests because it runs in very low time and is useful to understand if higher-level functions
-    work as intended.
+    work as intended. Its fitted parameters (see `fitted_parameters`) are the length of the training set, so that warm
+    start can be tested too.
     """
+    cost_factor = 0.01
 
     def __init__(self, params: dict, transformation: str = None):
         super().__init__(params, name="MockUp", transformation=transformation)
@@ -22,12 +24,18 @@ class MockUpModel(PredictionModel):
         self.extra_regressors_in_predict = None
         self.len_train_set = 0
         self.requested_predictions = 0
+        self.initial_parameters_in_training = None
 
     def train(self, input_data: DataFrame, extra_regressors: DataFrame = None):
         """Overrides PredictionModel.train()"""
         self.extra_regressors_in_training = extra_regressors
+        self.initial_parameters_in_training = self.initial_parameters
         self.len_train_set = len(input_data)
 
+    def fitted_parameters(self):
+        """Overrides PredictionModel.fitted_parameters()"""
+        return self.len_train_set
+
     def predict(self, future_dataframe: DataFrame, extra_regressors: DataFrame = None) -> DataFrame:
         """Overrides PredictionModel.predict()"""
         self.extra_regressors_in_training = extra_regressors
@@ -1,18 +1,27 @@
-import json
 import logging
 import math
 import multiprocessing
-import pkgutil
 from functools import reduce
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
+from timexseries.data_prediction.config import compile_config, default_model_parameters, ConfigurationError
+from timexseries.data_prediction.fit_cache import fit_cache, fit_key
+from timexseries.data_prediction.training_pool import TrainingPool, share_frame, read_frame, unlink_frame, run_steps, \
+    available_cpus, JobInterrupted
 from timexseries.data_prediction.transformation import transformation_factory
 from timexseries.data_prediction.validation_performances import ValidationPerformance
+from timexseries.data_prediction.window_search import window_search_factory
 
 log = logging.getLogger(__name__)
 
+# Entries of `model_parameters` which do not change the result of a fit, hence are not part of its fit cache key.
+FIT_CACHE_IGNORED_PARAMETERS = ("models", "possible_transformations", "main_accuracy_estimator", "window_search",
+                                "window_search_patience", "window_search_eta", "window_search_ratio",
+                                "results_retention", "results_retention_top_k", "fit_cache", "fit_cache_size")
+
 
 class SingleResult:
     """
@@ -26,28 +35,263 @@ class SingleResult:
         Testing performance (`timexseries.data_prediction.validation_performances.ValidationPerformance`), on the validation
         set, obtained using this training set to train the model.
     """
+    __slots__ = ('prediction', 'testing_performances')
 
     def __init__(self, prediction: DataFrame, testing_performances: ValidationPerformance):
         self.prediction = prediction
         self.testing_performances = testing_performances
 
 
+class ResultTable:
+    """
+    Compact, columnar collection of the results of a model trained on a set of different training windows.
+
+    Instead of keeping one `SingleResult` object (with its own DataFrame and its own `ValidationPerformance`) for each
+    training window, the error metrics of all the windows are stored in a single structured NumPy array, with one row
+    per window, and the forecasts are stored, column by column, in 2D arrays aligned to a common index.
+    `SingleResult` objects can still be obtained, as views, with indexing or `to_results`.
+
+    Parameters
+    ----------
+    first_used_index : ndarray
+        For each training window, the index of the first value used to train the model.
+    metrics : ndarray
+        Structured array with one row per training window and one field for each of the metrics in `metric_names`.
+    index : Index
+        Common index of the forecasts of all the training windows.
+    forecasts : dict
+        Dictionary with an entry for each forecast column (e.g. `yhat`). Each entry is a 2D float array of shape
+        (number of kept forecasts, length of `index`); positions not covered by the forecast of a window are NaN.
+    spans : ndarray
+        Integer array of shape (number of windows, 2): for each window, start and stop positions in `index` of its
+        forecast.
+    rows : ndarray
+        For each window, the row of its forecast in the arrays of `forecasts`; -1 if the forecast has not been kept.
+    dtypes : dict, optional, default None
+        Original dtype of each forecast column, restored when a forecast is rebuilt.
+
+    Examples
+    --------
+    Usually a `ResultTable` is obtained from a `ModelResult`, through its `table` attribute:
+    >>> table = model_result.table
+    >>> table.metrics['MAE']
+    array([2.77, 0.53, 1.01, 4.2 , 3.12])
+
+    The best training window, according to an error metric, is found with an `argsort`:
+    >>> table.argsort("mae")
+    array([1, 2, 0, 4, 3])
+    >>> best_result = table[table.best("mae")]
+    """
+    __slots__ = ('first_used_index', 'metrics', 'index', 'forecasts', 'spans', 'rows', 'dtypes')
+
+    metric_names = ('MSE', 'RMSE', 'MAE', 'AM', 'SD')
+    metrics_dtype = np.dtype([(name, np.float64) for name in metric_names])
+
+    def __init__(self, first_used_index: np.ndarray, metrics: np.ndarray, index: pd.Index, forecasts: dict,
+                 spans: np.ndarray, rows: np.ndarray, dtypes: dict = None):
+        self.first_used_index = first_used_index
+        self.metrics = metrics
+        self.index = index
+        self.forecasts = forecasts
+        self.spans = spans
+        self.rows = rows
+        self.dtypes = dtypes if dtypes is not None else {}
+
+    @classmethod
+    def from_results(cls, results: [SingleResult]) -> 'ResultTable':
+        """
+        Build a `ResultTable` from a list of `SingleResult`. Only the numeric columns of the predictions are kept.
+
+        Parameters
+        ----------
+        results : [SingleResult]
+            Results of a model, one for each training window.
+
+        Returns
+        -------
+        ResultTable
+            Compact version of `results`.
+        """
+        first_used_index = np.array([r.testing_performances.first_used_index for r in results])
+        metrics = np.array([tuple(getattr(r.testing_performances, name) for name in cls.metric_names)
+                            for r in results], dtype=cls.metrics_dtype)
+
+        predictions = [r.prediction for r in results]
+        available = [p for p in predictions if p is not None and len(p) > 0]
+        spans = np.zeros((len(results), 2), dtype=np.int64)
+        rows = np.full(len(results), -1, dtype=np.int64)
+
+        if len(available) == 0:
+            return cls(first_used_index, metrics, pd.Index([]), {}, spans, rows)
+
+        index = reduce(lambda x, y: x.union(y), [p.index for p in available[1:]], available[0].index)
+        numeric = available[0].select_dtypes(include=[np.number])
+        dtypes = {col: numeric[col].dtype for col in numeric.columns}
+        forecasts = {col: np.full((len(available), len(index)), np.nan) for col in dtypes}
+
+        row = 0
+        for i, prediction in enumerate(predictions):
+            if prediction is None or len(prediction) == 0:
+                continue
+            positions = index.get_indexer(prediction.index)
+            spans[i] = positions.min(), positions.max() + 1
+            rows[i] = row
+            for col in forecasts:
+                if col in prediction.columns:
+                    forecasts[col][row, positions] = prediction[col].to_numpy(dtype=np.float64)
+            row += 1
+
+        return cls(first_used_index, metrics, index, forecasts, spans, rows, dtypes)
+
+    def __len__(self) -> int:
+        return len(self.metrics)
+
+    def __getitem__(self, i: int) -> SingleResult:
+        return SingleResult(self.prediction(i), self.performance(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def argsort(self, estimator: str) -> np.ndarray:
+        """
+        Return the positions of the training windows, sorted from the best to the worst according to `estimator`.
+
+        Parameters
+        ----------
+        estimator : str
+            Error metric to use, e.g. "mae". Case insensitive.
+
+        Returns
+        -------
+        ndarray
+            Positions of the training windows. NaN errors are sorted last.
+        """
+        return np.argsort(self.metrics[estimator.upper()], kind='stable')
+
+    def best(self, estimator: str) -> int:
+        """
+        Return the position of the best training window according to `estimator`.
+
+        Parameters
+        ----------
+        estimator : str
+            Error metric to use, e.g. "mae". Case insensitive.
+
+        Returns
+        -------
+        int
+            Position of the best training window.
+        """
+        return int(self.argsort(estimator)[0])
+
+    def performance(self, i: int) -> ValidationPerformance:
+        """
+        Return the `ValidationPerformance` of the `i`-th training window.
+        """
+        tp = ValidationPerformance(self.first_used_index[i])
+        for name in self.metric_names:
+            setattr(tp, name, float(self.metrics[name][i]))
+        return tp
+
+    def prediction(self, i: int) -> DataFrame:
+        """
+        Return the prediction obtained with the `i`-th training window, or None if it has not been kept.
+        """
+        row = self.rows[i]
+        start, stop = self.spans[i]
+        if row < 0 or start == stop:
+            return None
+
+        prediction = DataFrame({col: self.forecasts[col][row, start:stop] for col in self.forecasts},
+                               index=self.index[start:stop])
+        try:
+            prediction = prediction.astype(self.dtypes)
+        except (ValueError, TypeError):
+            pass
+
+        return prediction
+
+    def retain_windows(self, windows: [int]):
+        """
+        Keep the forecasts of the training windows in `windows` only, discarding the others. Error metrics of all the
+        windows are kept.
+
+        Parameters
+        ----------
+        windows : [int]
+            Positions of the windows whose forecast should be kept.
+        """
+        windows = [w for w in sorted(set(windows)) if self.rows[w] >= 0]
+        kept_rows = self.rows[windows]
+
+        self.forecasts = {col: self.forecasts[col][kept_rows] for col in self.forecasts}
+        self.rows = np.full(len(self), -1, dtype=np.int64)
+        self.rows[windows] = np.arange(len(windows))
+
+        if len(windows) == 0:
+            self.forecasts = {}
+            self.index = self.index[:0]
+
+    def retain_horizon(self, length: int, columns: [str] = ('yhat', 'yhat_lower', 'yhat_upper')):
+        """
+        Keep only the last `length` points of the forecasts, and only the `columns` forecast columns.
+
+        Parameters
+        ----------
+        length : int
+            Number of points, at the end of the common index, to keep. Usually the number of validation points plus the
+            number of prediction lags.
+        columns : [str], optional, default ('yhat', 'yhat_lower', 'yhat_upper')
+            Forecast columns to keep, if available.
+        """
+        cut = max(len(self.index) - length, 0)
+
+        self.index = self.index[cut:]
+        self.forecasts = {col: self.forecasts[col][:, cut:].copy() for col in self.forecasts if col in columns}
+        self.dtypes = {col: self.dtypes[col] for col in self.forecasts}
+        self.spans = np.clip(self.spans - cut, 0, None)
+
+    def to_results(self) -> [SingleResult]:
+        """
+        Return the content of this table as a list of `SingleResult`, one for each training window.
+        """
+        return [self[i] for i in range(len(self))]
+
+
 class ModelResult:
     """
     Class for to collect the global results of a model trained on a time-series.
 
     Parameters
     ----------
-    results : [SingleResult]
+    results : [SingleResult], ResultTable
         List of all the results obtained using all the possible training set for this model, on the time series.
         This is useful to create plots which show how the performance vary changing the training data (e.g.
-        `timexseries.data_visualization.functions.performance_plot`).
+        `timexseries.data_visualization.functions.performance_plot`). Results are stored in the compact `table`
+        attribute, a `ResultTable`; a list is converted.
     characteristics : dict
         Model parameters. This dictionary collects human-readable characteristics of the model, e.g. the used number of
         validation points used, the length of the sliding training window, etc.
     best_prediction : DataFrame
         Prediction obtained using the best training window and _all_ the available points in the time-series. This is
         the prediction that users are most likely to want.
+
+    Attributes
+    ----------
+    table : ResultTable
+        Compact storage of the results.
+
+    Notes
+    -----
+    `results` is built from `table` at each access, so changing the returned list or its `SingleResult` in place
+    (e.g. `model_result.results.sort(...)`, or assigning the `prediction` of a result) has no effect on the stored
+    results. To change them, assign a new list to `results`, or use the methods of `table` (e.g.
+    `ResultTable.retain_windows`):
+
+    >>> results = model_result.results
+    >>> results.sort(key=lambda r: r.testing_performances.MAE)
+    >>> model_result.results = results
     """
 
     def __init__(self, results: [SingleResult], characteristics: dict, best_prediction: DataFrame):
@@ -55,6 +299,30 @@ class ModelResult:
         self.characteristics = characteristics
         self.best_prediction = best_prediction
 
+    @property
+    def results(self) -> [SingleResult]:
+        """
+        List of `SingleResult`, one for each training window. They are views built from `table`, hence modifying
+        them does not change the stored results.
+        """
+        if self.table is None:
+            return None
+        return self.table.to_results()
+
+    @results.setter
+    def results(self, results):
+        if results is None or isinstance(results, ResultTable):
+            self.table = results
+        else:
+            self.table = ResultTable.from_results(results)
+
+    def __setstate__(self, state):
+        # Objects pickled before the introduction of `ResultTable` store the plain list of results.
+        if "results" in state:
+            results = state.pop("results")
+            state["table"] = None if results is None else ResultTable.from_results(results)
+        self.__dict__.update(state)
+
 
 class PredictionModel:
     """
@@ -66,7 +334,9 @@ class PredictionModel:
         A dictionary corresponding to a TIMEX JSON configuration file.
         The various attributes, described below, will be extracted from this.
         If `params` does not contain the entry `model_parameters`, then TIMEX will attempt to load a default
-        configuration parameter dictionary.
+        configuration parameter dictionary. `params` is compiled with
+        `timexseries.data_prediction.config.compile_config`, unless it is already compiled: passing the same compiled
+        configuration to many models avoids parsing and validating it again for each of them.
     name : str
         Class of the model.
     transformation : str, None, optional
@@ -93,35 +363,121 @@ class PredictionModel:
         Error metric to use when deciding which prediction is better. Default: MAE.
     model_characteristics : dict
         Dictionary of values containing the main characteristics and parameters of the model. Default {}
+    results_retention : [str]
+        Which part of the results of each training window should be kept once the model has been launched, read from the
+        comma-separated `results_retention` entry of `model_parameters`. The possible choices are:
+
+        - `all`: keep everything;
+        - `metrics`: keep only the error metrics of each window, discarding all the forecasts;
+        - `top_k`: keep the forecasts of the best `results_retention_top_k` (default 1) windows only;
+        - `horizon`: keep only `yhat`, `yhat_lower` and `yhat_upper`, on the validation set and the prediction lags.
+
+        `top_k` and `horizon` can be combined, e.g. "top_k,horizon". Default "all".
+    results_retention_top_k : int
+        Number of windows whose forecast is kept when the `top_k` retention is used. Default 1
+    window_search : str
+        Strategy used to choose which training windows are evaluated, read from the `window_search` entry of
+        `model_parameters`. The possible choices are:
+
+        - `exhaustive`: evaluate all of them;
+        - `patience`: evaluate them from the shortest to the longest, stopping after `window_search_patience`
+          (default 3) consecutive windows which did not improve the validation error;
+        - `successive_halving`: coarse-to-fine search, which evaluates a sparse subset of the windows first and then
+          refines only around the best `1 / window_search_eta` (default 3) of them;
+        - `geometric`: evaluate only the windows whose lengths grow geometrically, by a factor `window_search_ratio`
+          (default 2);
+        - `golden_section`: golden-section search of the window with the lowest validation error, which assumes that
+          the error has a single minimum.
+
+        `geometric` and `golden_section` evaluate a number of windows which grows with the logarithm of the length of
+        the time-series, so they allow a small `delta_training_percentage` on long time-series.
+
+        See `timexseries.data_prediction.window_search`. Default "exhaustive".
+    warm_start : bool
+        If True, each training is initialized with the parameters fitted on the nearest training window already
+        evaluated (see `fitted_parameters`), and the final training with the ones of the best window. Training windows
+        are nested, so a warm-started optimizer usually converges in a fraction of the iterations. To maximize reuse,
+        windows are visited from the shortest to the longest, in waves of as many windows as the available processes.
+        Models which do not support warm start ignore it. Default False
+    fit_cache : FitCache
+        Cache of the fits, read from the `fit_cache` entry of `model_parameters`, the path of its directory. The fits
+        of the training windows and of the best prediction are looked up in the cache, by a hash of the model, of its
+        parameters, of the transformation and of the training and validation data, before being computed, and stored
+        in it afterwards, so they are re-used only on the same data, e.g. by a later run. The size of the cache, in
+        MB, is given by `fit_cache_size` (default 1024); the least recently used fits are evicted when it is exceeded.
+        See `timexseries.data_prediction.fit_cache.FitCache`. Default None, i.e. no cache.
+    initial_parameters
+        Parameters used to initialize the next `train`, as returned by `fitted_parameters` of a model trained on a
+        similar training set; None to train from scratch. Default None
+    global_model : bool
+        True if the model is fitted once on all the time-series of the ingested data, with `train_global`, instead of
+        once per time-series and training window. Default False
+    global_parameters
+        Parameters fitted by `train_global` of another instance of the same model, used by `train` instead of fitting
+        the training set from scratch; None if the model is not global. Default None
+    cost_factor : float
+        Class attribute: relative cost of training the model on one value of a time-series, used to estimate the cost
+        of each training and schedule the most expensive ones first. Default 1.0
+    parallel_training : bool
+        Class attribute: False if the trainings of the model can not be run in other processes. Default True
+    worker_start_methods : [str]
+        Class attribute: start methods of the worker processes with which the model can be trained safely, in order of
+        preference, e.g. `["spawn", "forkserver"]` for models whose libraries can not be used after a fork. None if any
+        start method is fine. Default None
+    local_attributes : tuple
+        Class attribute: attributes which belong to the process of the model (e.g. `fit_cache`), hence are kept when
+        the model is made trained as a copy trained by another process. Default ("fit_cache", "model_characteristics")
     """
+    cost_factor = 1.0
+    parallel_training = True
+    worker_start_methods = None
+    local_attributes = ("fit_cache", "model_characteristics")
 
     def __init__(self, params: dict, name: str, transformation: str = None) -> None:
         self.name = name
 
         log.info(f"Creating a {self.name} model...")
 
-        if "model_parameters" not in params:
+        config = compile_config(params)
+        if config.model is None:
             log.debug(f"Loading default settings...")
-            parsed = pkgutil.get_data(__name__, "default_prediction_parameters/" + self.name + ".json")
-            model_parameters = json.loads(parsed)
+            model_parameters = default_model_parameters(self.name)
         else:
             log.debug(f"Loading user settings...")
-            model_parameters = params["model_parameters"]
-
-        if "test_values" in model_parameters:
-            self.test_values = model_parameters["test_values"]
+            model_parameters = config.model
+
+        self.test_values = model_parameters.test_values
+        self.test_percentage = model_parameters.test_percentage
+
+        if transformation is None:
+            transformation = model_parameters.transformation
+            if transformation is None:
+                raise ConfigurationError(f"Invalid 'transformation' in 'model_parameters': entry is required, "
+                                         f"if the transformation of the {self.name} model is not given.")
+        self.transformation = transformation_factory(transformation)
+
+        self.prediction_lags = model_parameters.prediction_lags
+        self.delta_training_percentage = model_parameters.delta_training_percentage
+        self.main_accuracy_estimator = model_parameters.main_accuracy_estimator
+        self.results_retention = model_parameters.results_retention
+        self.results_retention_top_k = model_parameters.results_retention_top_k
+        self.window_search = model_parameters.window_search
+        self.window_search_patience = model_parameters.window_search_patience
+        self.window_search_eta = model_parameters.window_search_eta
+        self.window_search_ratio = model_parameters.window_search_ratio
+        self.warm_start = model_parameters.warm_start
+
+        if model_parameters.fit_cache is not None:
+            self.fit_cache = fit_cache(model_parameters.fit_cache, int(model_parameters.fit_cache_size * 1024 * 1024))
         else:
-            self.test_percentage = model_parameters["test_percentage"]
-            self.test_values = -1
+            self.fit_cache = None
 
-        if transformation is not None:
-            self.transformation = transformation_factory(transformation)
-        else:
-            self.transformation = transformation_factory(model_parameters["transformation"])
+        self.model_parameters = model_parameters.parameters
+        self.initial_parameters = None
+        self.window_parameters = {}
+        self.global_model = False
+        self.global_parameters = None
 
-        self.prediction_lags = model_parameters["prediction_lags"]
-        self.delta_training_percentage = model_parameters["delta_training_percentage"]
-        self.main_accuracy_estimator = model_parameters["main_accuracy_estimator"]
         self.delta_training_values = 0
         self.model_characteristics = {}
 
@@ -234,110 +590,317 @@ class PredictionModel:
         """
         pass
 
-    def _compute_trainings(self, train_ts: DataFrame, test_ts: DataFrame, extra_regressors: DataFrame, max_threads: int):
+    def fitted_parameters(self):
         """
-        Compute the training of a model on a set of different training sets, of increasing length.
-        `train_ts` is split in `n` different training sets, according to the length of `train_ts` and the value of
-        `self.delta_training_values`. The computation is split across different processes, according to the value of
-        max_threads which indicates the maximum number of usable processes.
+        Return the parameters fitted by the last `train`, in a picklable form which can be used as
+        `initial_parameters` of another instance of the same model, to warm-start its training. Models which support
+        warm start override this; the base implementation returns None.
+
+        Returns
+        -------
+        Fitted parameters, or None.
+        """
+        return None
+
+    def train_global(self, ingested_data: DataFrame):
+        """
+        Fit a single model on all the time-series (columns) of `ingested_data`, leaving out of each one its validation
+        set, and store the fitted parameters in `global_parameters`. Given to the models of the single time-series, these
+        parameters replace the fit of each training window, so that the cost of the training grows with the total
+        amount of data, not with the number of time-series.
+
+        Only models with `global_model` True support this.
 
         Parameters
         ----------
+        ingested_data : DataFrame
+            Time-series, one for each column; each one is transformed with `transformation` and scaled separately.
+        """
+        raise NotImplementedError(f"{self.name} can not be trained on many time-series at once.")
+
+    def _fit_window(self, window: int, train_ts: DataFrame, test_ts: DataFrame, extra_regressors: DataFrame,
+                    initial_parameters=None) -> SingleResult:
+        """
+        Train the model on the training window `window`, i.e. on the last `(window + 1) * self.delta_training_values`
+        values of `train_ts`, and compute its performances on `test_ts`.
+
+        Parameters
+        ----------
+        window : int
+            Index of the training window.
         train_ts : DataFrame
-            The entire training set which can be used; it will be split in different training sets, in order to test
-            which sub-training-set performs better.
+            The entire training set.
         test_ts : DataFrame
-            Testing set to be used to compute the models' performances.
+            Testing set to be used to compute the model performances.
         extra_regressors : DataFrame
             Additional time-series to pass to `train` in order to improve the performances.
-        max_threads : int
-            Maximum number of threads to use in the training phase.
+        initial_parameters : optional, default None
+            Parameters used to warm-start the training; see `initial_parameters`.
 
         Returns
         -------
-        results : list
-            List of SingleResult. Each one is the result relative to the use of a specific train set.
+        SingleResult
+            Result of the model trained on this window.
         """
-        train_sets_number = math.ceil(len(train_ts) / self.delta_training_values)
-        log.info(f"Model will use {train_sets_number} different training sets...")
+        tr = train_ts.iloc[-(window + 1) * self.delta_training_values:]
 
-        def c(targets: [int], _return_dict: dict, thread_number: int):
-            _results = []
+        log.debug(f"Trying with last {len(tr)} values as training set...")
 
-            for _i in range(targets[0], targets[1]):
-                tr = train_ts.iloc[-(_i+1) * self.delta_training_values:]
+        self.initial_parameters = initial_parameters
+        self.train(tr.copy(), extra_regressors)
 
-                log.debug(f"Trying with last {len(tr)} values as training set, in thread {thread_number}")
+        future_df = pd.DataFrame(index=pd.date_range(freq=self.freq,
+                                                     start=tr.index.values[0],
+                                                     periods=len(tr) + self.test_values + self.prediction_lags),
+                                 columns=["yhat"], dtype=tr.iloc[:, 0].dtype)
 
-                self.train(tr.copy(), extra_regressors)
+        forecast = self.predict(future_df, extra_regressors)
 
-                future_df = pd.DataFrame(index=pd.date_range(freq=self.freq,
-                                                             start=tr.index.values[0],
-                                                             periods=len(tr) + self.test_values + self.prediction_lags),
-                                         columns=["yhat"], dtype=tr.iloc[:, 0].dtype)
+        forecast.loc[:, 'yhat'] = self.transformation.inverse(forecast['yhat'])
+        try:
+            forecast.loc[:, 'yhat_lower'] = self.transformation.inverse(forecast['yhat_lower'])
+            forecast.loc[:, 'yhat_upper'] = self.transformation.inverse(forecast['yhat_upper'])
+        except:
+            pass
 
-                forecast = self.predict(future_df, extra_regressors)
+        testing_prediction = forecast.iloc[-self.prediction_lags - self.test_values:-self.prediction_lags]
 
-                forecast.loc[:, 'yhat'] = self.transformation.inverse(forecast['yhat'])
-                try:
-                    forecast.loc[:, 'yhat_lower'] = self.transformation.inverse(forecast['yhat_lower'])
-                    forecast.loc[:, 'yhat_upper'] = self.transformation.inverse(forecast['yhat_upper'])
-                except:
-                    pass
+        first_used_index = tr.index.values[0]
+
+        tp = ValidationPerformance(first_used_index)
+        tp.set_testing_stats(test_ts.iloc[:, 0], testing_prediction["yhat"])
+        return SingleResult(forecast, tp)
 
-                testing_prediction = forecast.iloc[-self.prediction_lags - self.test_values:-self.prediction_lags]
+    def window_cost(self, window: int) -> float:
+        """
+        Estimated cost of training the model on the training window `window`, used to schedule the trainings: it is the
+        length of the window times `cost_factor`.
+
+        Parameters
+        ----------
+        window : int
+            Index of the training window.
+
+        Returns
+        -------
+        float
+            Estimated cost, in arbitrary units.
+        """
+        return (window + 1) * self.delta_training_values * self.cost_factor
+
+    def _fit_key(self, *parts) -> str:
+        """
+        Return the key, in `fit_cache`, of a fit of this model which depends on `parts` (e.g. the training data), in
+        addition to the class and parameters of the model, the transformation, the number of validation values and of
+        prediction lags, the frequency of the time-series and the parameters of the global model, if any.
+        """
+        parameters = {k: v for k, v in self.model_parameters.items() if k not in FIT_CACHE_IGNORED_PARAMETERS}
+        return fit_key(type(self).__module__, type(self).__qualname__, self.name, parameters, self.transformation,
+                       self.test_values, self.prediction_lags, self.freq, self.global_parameters, *parts)
+
+    def _fit_window_job(self, window: int, train_ts, test_ts, extra_regressors, initial_parameters=None,
+                        shared: bool = False) -> tuple:
+        """
+        Job which runs `_fit_window`, executed by the workers of a `TrainingPool` or by this process. The input
+        DataFrames may be `SharedFrame` handles; if `shared`, the forecast is returned in a `SharedFrame` if possible.
+        Return the `SingleResult` and, if `warm_start`, the fitted parameters.
+        """
+        result = self._fit_window(window, read_frame(train_ts), read_frame(test_ts), read_frame(extra_regressors),
+                                  initial_parameters)
+        if shared:
+            result = SingleResult(share_frame(result.prediction), result.testing_performances)
+        return result, self.fitted_parameters() if self.warm_start else None
+
+    @classmethod
+    def required_start_method(cls):
+        """
+        Return the start method which the worker processes must use to train this model, if the default one of the
+        platform is not safe for it (see `worker_start_methods`); otherwise, None.
+        """
+        if cls.worker_start_methods is None or \
+                multiprocessing.get_context().get_start_method() in cls.worker_start_methods:
+            return None
+        return cls.worker_start_methods[0]
 
-                first_used_index = tr.index.values[0]
+    def can_use_pool(self, pool: TrainingPool) -> bool:
+        """
+        Return True if the trainings of this model can be executed by the workers of `pool`.
+        """
+        return self.parallel_training and \
+            (self.worker_start_methods is None or pool.start_method in self.worker_start_methods)
 
-                tp = ValidationPerformance(first_used_index)
-                tp.set_testing_stats(test_ts.iloc[:, 0], testing_prediction["yhat"])
-                _results.append(SingleResult(forecast, tp))
+    def _usable_threads(self, max_threads: int, pool: TrainingPool = None) -> int:
+        if not self.parallel_training:
+            log.info(f"{self.name} model. Cant use multiprocessing.")
+            return 1
 
-            _return_dict[thread_number] = _results
+        if pool is not None and not self.can_use_pool(pool):
+            log.info(f"{self.name} model can not be trained by workers started with {pool.start_method}.")
+            return 1
 
-        manager = multiprocessing.Manager()
-        return_dict = manager.dict()
-        processes = []
+        return max_threads
 
-        if self.name == 'LSTM' or self.name == 'NeuralProphet':
-            log.info(f"LSTM/NeuralProphet model. Cant use multiprocessing.")
-            return_d = {}
-            distributions = [[0, train_sets_number]]
-            c(distributions[0], return_d, 0)
-            return return_d[0]
+    def _create_training_pool(self, max_threads: int) -> TrainingPool:
+        return TrainingPool(max_threads, threads_per_worker=max(1, available_cpus() // max_threads),
+                            start_method=self.required_start_method())
 
-        if max_threads == 1:
-            distributions = [[0, train_sets_number]]
-            n_threads = 1
+    def _training_steps(self, train_ts: DataFrame, test_ts: DataFrame, extra_regressors: DataFrame, batch_size: int,
+                        parallel: bool):
+        """
+        Steps of `_compute_trainings`, as a generator: it yields the batches of training windows to fit, as lists of
+        `(function, args, cost)` jobs, receives back their results, and returns the `ResultTable`. See
+        `timexseries.data_prediction.training_pool.TrainingPool.run_steps`.
+
+        If `warm_start`, the fitted parameters of each window are stored in `window_parameters`, by first used index.
+
+        If `parallel`, the jobs are meant to be executed by other processes: the data is published once in shared
+        memory (see `timexseries.data_prediction.training_pool.SharedFrame`), and the workers send back the forecasts in
+        the same way, so no time-series is pickled between processes.
+        """
+        train_sets_number = math.ceil(len(train_ts) / self.delta_training_values)
+        log.info(f"Model will use up to {train_sets_number} different training sets...")
+
+        search = window_search_factory(self.window_search, train_sets_number, batch_size,
+                                       patience=self.window_search_patience, eta=self.window_search_eta,
+                                       ratio=self.window_search_ratio)
+
+        if parallel:
+            inputs = [share_frame(train_ts), share_frame(test_ts), share_frame(extra_regressors)]
         else:
-            distributions = []
+            inputs = [train_ts, test_ts, extra_regressors]
 
-            if train_sets_number % max_threads == 0:
-                n_threads = max_threads
-                subtraining_dim = train_sets_number // n_threads
-                for i in range(0, n_threads):
-                    distributions.append([i*subtraining_dim, i*subtraining_dim + subtraining_dim])
-            else:
-                n_threads = min(max_threads, train_sets_number)
-                subtraining_dim = train_sets_number // n_threads
-                for i in range(0, n_threads):
-                    distributions.append([i*subtraining_dim, i*subtraining_dim+subtraining_dim])
-                for k in range(0, (train_sets_number % n_threads)):
-                    distributions[k][1] += 1
-                    distributions[k+1::] = [ [x+1, y+1] for x, y in distributions[k+1::]]
+        results = {}
+        fitted_parameters = {}
+        failed_windows = 0
+        try:
+            windows = search.ask()
+            while len(windows) > 0:
+                if self.warm_start:
+                    # Shortest windows first, so that each wave can start from the parameters of the previous one.
+                    windows = sorted(windows)
+                    waves = [windows[i:i + batch_size] for i in range(0, len(windows), batch_size)]
+                else:
+                    waves = [windows]
+
+                for wave in waves:
+                    outcomes = {}
+                    keys = {}
+                    jobs = []
+                    for window in wave:
+                        initial_parameters = self._nearest_parameters(fitted_parameters, window)
+                        if self.fit_cache is not None:
+                            keys[window] = self._fit_key("window",
+                                                         train_ts.iloc[-(window + 1) * self.delta_training_values:],
+                                                         test_ts, extra_regressors, initial_parameters)
+                            outcomes[window] = self.fit_cache.get(keys[window])
+                        if outcomes.get(window) is None:
+                            jobs.append((window, (self._fit_window_job,
+                                                  (window, *inputs, initial_parameters, parallel),
+                                                  self.window_cost(window))))
+
+                    batch = (yield [job for _, job in jobs]) if len(jobs) > 0 else []
+                    for (window, _), outcome in zip(jobs, batch):
+                        if isinstance(outcome, JobInterrupted):
+                            log.warning(f"{self.name} model: training window {window} has not been evaluated: "
+                                        f"{outcome}")
+                            failed_windows += 1
+                            results[window] = self._failed_window(window, train_ts)
+                            outcomes[window] = (results[window], None)
+                            continue
+
+                        result, parameters = outcome
+                        results[window] = result
+                        outcomes[window] = (result, parameters)
+                        if self.fit_cache is not None:
+                            self.fit_cache.put(keys[window], (SingleResult(read_frame(result.prediction, copy=True),
+                                                                           result.testing_performances), parameters))
+
+                    for window in wave:
+                        result, parameters = outcomes[window]
+                        results[window] = result
+                        if parameters is not None:
+                            fitted_parameters[window] = parameters
+                        search.tell(window, getattr(result.testing_performances, self.main_accuracy_estimator.upper()))
+                windows = search.ask()
+
+            table = ResultTable.from_results([SingleResult(read_frame(results[window].prediction, copy=True),
+                                                           results[window].testing_performances)
+                                              for window in sorted(results)])
+        finally:
+            for frame in inputs + [r.prediction for r in results.values()]:
+                unlink_frame(frame)
+
+        self.window_parameters = {results[window].testing_performances.first_used_index: parameters
+                                  for window, parameters in fitted_parameters.items()}
+
+        log.info(f"Window search ({self.window_search}) has used {len(results)} training sets.")
+        self.model_characteristics["window_search"] = self.window_search
+        self.model_characteristics["evaluated_windows"] = len(results)
+        if failed_windows > 0:
+            self.model_characteristics["failed_windows"] = failed_windows
+
+        return table
+
+    def _failed_window(self, window: int, train_ts: DataFrame) -> SingleResult:
+        """
+        Return the result of the training window `window` when its training has not been completed, e.g. because it
+        timed out: it has no prediction, and NaN error metrics, so that it is never chosen as the best window.
+        """
+        tp = ValidationPerformance(train_ts.iloc[-(window + 1) * self.delta_training_values:].index.values[0])
+        for metric in ResultTable.metric_names:
+            setattr(tp, metric, math.nan)
+        return SingleResult(None, tp)
+
+    @staticmethod
+    def _nearest_parameters(fitted_parameters: dict, window: int):
+        """
+        Return the parameters fitted on the evaluated window nearest to `window`, or None.
+        """
+        if len(fitted_parameters) == 0:
+            return None
+        return fitted_parameters[min(fitted_parameters, key=lambda w: (abs(w - window), -w))]
+
+    def _compute_trainings(self, train_ts: DataFrame, test_ts: DataFrame, extra_regressors: DataFrame, max_threads: int,
+                           pool: TrainingPool = None):
+        """
+        Compute the training of a model on a set of different training sets, of increasing length.
+        `train_ts` is split in `n` different training sets, according to the length of `train_ts` and the value of
+        `self.delta_training_values`. Which of them are actually used depends on `self.window_search`: the windows
+        suggested by the search strategy are trained in batches, on the workers of `pool`, and their validation error
+        is given back to the strategy, until it decides to stop.
+
+        Parameters
+        ----------
+        train_ts : DataFrame
+            The entire training set which can be used; it will be split in different training sets, in order to test
+            which sub-training-set performs better.
+        test_ts : DataFrame
+            Testing set to be used to compute the models' performances.
+        extra_regressors : DataFrame
+            Additional time-series to pass to `train` in order to improve the performances.
+        max_threads : int
+            Maximum number of threads to use in the training phase.
+        pool : TrainingPool, optional, default None
+            Pool of worker processes to use; if None, a temporary one is created when needed.
 
-        for i in range(0, n_threads):
-            processes.append(multiprocessing.Process(target=c, args=(distributions[i], return_dict, i)))
-            processes[-1].start()
+        Returns
+        -------
+        results : ResultTable
+            Results of the model, one row for each of the used train sets, from the shortest to the longest.
+        """
+        max_threads = self._usable_threads(max_threads, pool)
 
-        for p in processes:
-            p.join()
+        if max_threads > 1 and pool is None:
+            with self._create_training_pool(max_threads) as pool:
+                return self._compute_trainings(train_ts, test_ts, extra_regressors, max_threads, pool)
 
-        results = reduce(lambda x, y: x+y, [return_dict[key] for key in return_dict])
+        if max_threads == 1:
+            pool = None
 
-        return results
+        return run_steps(self._training_steps(train_ts, test_ts, extra_regressors, max_threads, pool is not None),
+                         pool)
 
-    def _compute_best_prediction(self, ingested_data: DataFrame, training_results: [SingleResult],
+    def _compute_best_prediction(self, ingested_data: DataFrame, training_results: ResultTable,
                                  extra_regressors: DataFrame = None):
         """
         Given the ingested data and the training results, identify the best training window and compute a prediction
@@ -346,8 +909,8 @@ class PredictionModel:
         ----------
         ingested_data : DataFrame
             Initial time-series data, in a DataFrame. The first column of the DataFrame is the time-series.
-        training_results : [SingleResult]
-            List of `SingleResult` object: each one is the result of the model on a specific training-set.
+        training_results : ResultTable
+            Results of the model, one row for each of the used training-sets.
         extra_regressors : DataFrame, optional, default None
             Additional time-series to use for better predictions.
         Returns
@@ -355,13 +918,42 @@ class PredictionModel:
         DataFrame
             Best available prediction for this time-series, with this model.
         """
-        training_results.sort(key=lambda x: getattr(x.testing_performances, self.main_accuracy_estimator.upper()))
-        best_starting_index = training_results[0].testing_performances.first_used_index
+        best_starting_index = training_results.first_used_index[training_results.best(self.main_accuracy_estimator)]
+        initial_parameters = self.window_parameters.get(best_starting_index)
+
+        if self.fit_cache is not None:
+            key = self._best_prediction_key(ingested_data, best_starting_index, extra_regressors, initial_parameters)
+            cached = self.fit_cache.get(key)
+            if cached is not None:
+                forecast, characteristics = cached
+                self.model_characteristics.update(characteristics)
+                return forecast
 
+        forecast = self._fit_best_prediction(ingested_data, best_starting_index, extra_regressors, initial_parameters)
+
+        if self.fit_cache is not None:
+            self.fit_cache.put(key, (forecast, self.model_characteristics))
+        return forecast
+
+    def _best_prediction_key(self, ingested_data: DataFrame, best_starting_index, extra_regressors: DataFrame,
+                             initial_parameters) -> str:
+        """
+        Return the key, in `fit_cache`, of the fit of the best prediction; see `_compute_best_prediction`.
+        """
+        return self._fit_key("best_prediction", ingested_data.loc[best_starting_index:], extra_regressors,
+                             initial_parameters)
+
+    def _fit_best_prediction(self, ingested_data: DataFrame, best_starting_index, extra_regressors: DataFrame = None,
+                             initial_parameters=None):
+        """
+        Train the model on the data of `ingested_data` starting from `best_starting_index`, and return the prediction.
+        See `_compute_best_prediction`.
+        """
         training_data = ingested_data.copy().loc[best_starting_index:]
 
         training_data.iloc[:, 0] = self.transformation.apply(training_data.iloc[:, 0])
 
+        self.initial_parameters = initial_parameters
         self.train(training_data.copy(), extra_regressors)
 
         future_df = pd.DataFrame(index=pd.date_range(freq=self.freq,
@@ -380,11 +972,70 @@ class PredictionModel:
 
         return forecast
 
-    def launch_model(self, ingested_data: DataFrame, extra_regressors: DataFrame = None, max_threads: int = 1):
+    def _fit_shared_best_prediction(self, ingested_data, best_starting_index, extra_regressors,
+                                    initial_parameters=None) -> tuple:
+        """
+        Same as `_fit_best_prediction`, but the input DataFrames may be `SharedFrame` handles. This is the job executed
+        by the workers of a `TrainingPool`; it returns the forecast, in a `SharedFrame` if possible, the model
+        characteristics set by the training and the trained model itself, to be restored with `_restore_trained`.
+        """
+        forecast = self._fit_best_prediction(read_frame(ingested_data), best_starting_index,
+                                             read_frame(extra_regressors), initial_parameters)
+        return share_frame(forecast), self.model_characteristics, self
+
+    def _restore_trained(self, trained: 'PredictionModel'):
+        """
+        Make this model trained as `trained`, a copy of it trained by another process, e.g. by a worker of a
+        `TrainingPool`, so that it can be used (e.g. to predict or to be exported) as if it had been trained here. The
+        `local_attributes` of this model are kept.
+        """
+        self.__dict__.update({k: v for k, v in trained.__dict__.items() if k not in self.local_attributes})
+
+    def _interrupted_best_prediction(self, training_results: ResultTable, error: JobInterrupted) -> DataFrame:
+        """
+        Return the prediction to use when the training of the best prediction has been interrupted by `error`: the
+        prediction of the best training window, which does not use the validation set. If it is not available either,
+        `error` is raised.
+        """
+        best_prediction = training_results.prediction(training_results.best(self.main_accuracy_estimator))
+        if best_prediction is None:
+            raise error
+
+        log.warning(f"{self.name} model: the best prediction has not been computed ({error}). Using the prediction "
+                    f"of the best training window instead.")
+        self.model_characteristics["best_prediction"] = "best training window"
+        return best_prediction
+
+    def _apply_results_retention(self, training_results: ResultTable):
+        """
+        Discard, from `training_results`, the forecasts which should not be kept according to `results_retention`.
+
+        Parameters
+        ----------
+        training_results : ResultTable
+            Results of the model, one row for each of the used training-sets.
+        """
+        if "metrics" in self.results_retention:
+            training_results.retain_windows([])
+            return
+
+        if "top_k" in self.results_retention:
+            best_windows = training_results.argsort(self.main_accuracy_estimator)[:self.results_retention_top_k]
+            training_results.retain_windows(best_windows)
+
+        if "horizon" in self.results_retention:
+            training_results.retain_horizon(self.test_values + self.prediction_lags)
+
+    def launch_model(self, ingested_data: DataFrame, extra_regressors: DataFrame = None, max_threads: int = 1,
+                     pool: TrainingPool = None):
         """
         Train the model on `ingested_data` and returns a `ModelResult` object.
         This function is at the highest possible level of abstraction to train a model on a time-series.
 
+        Afterwards, the model is trained on the data of the best prediction, also when the training has been done by
+        the workers of a pool, so it can e.g. predict or be exported; it is not if the best prediction has been read
+        from `fit_cache`, or if its training has been interrupted.
+
         Parameters
         ----------
         ingested_data : DataFrame
@@ -393,6 +1044,9 @@ class PredictionModel:
             Additional time-series to passed to `train` in order to improve the performances.
         max_threads : int, optional, default 1
             Maximum number of threads to use in the training phase.
+        pool : TrainingPool, optional, default None
+            Pool of worker processes to use in the training phase, shared with other models. If None and `max_threads`
+            is greater than 1, a temporary pool is created.
 
         Returns
         -------
@@ -456,6 +1110,45 @@ class PredictionModel:
         on the validation set (in this case, composed by the last 3 values of `timeseries_dataframe`) and
         `testing_performances` which recaps the performance, in terms of MAE, MSE, etc. of that `SingleResult` on the
         validation set.
+
+        The same results are stored, in compact form, in the `table` attribute:
+        >>> model_output.table.metrics['MAE']
+        array([0.        , 0.        , 0.        , 0.        , 0.        ])
+        """
+        max_threads = self._usable_threads(max_threads, pool)
+
+        if max_threads > 1 and pool is None:
+            with self._create_training_pool(max_threads) as pool:
+                return self.launch_model(ingested_data, extra_regressors, max_threads, pool)
+
+        if max_threads == 1:
+            pool = None
+
+        return run_steps(self.launch_model_steps(ingested_data, extra_regressors, max_threads, pool is not None), pool)
+
+    def launch_model_steps(self, ingested_data: DataFrame, extra_regressors: DataFrame = None, batch_size: int = 1,
+                           parallel: bool = False):
+        """
+        Steps of `launch_model`, as a generator: it yields batches of training jobs, as lists of `(function, args,
+        cost)` tuples, receives back their results, and returns the `ModelResult`. This allows to run many models at
+        the same time on the same `TrainingPool`, with `TrainingPool.run_steps`.
+
+        Parameters
+        ----------
+        ingested_data : DataFrame
+            DataFrame containing the historical time series value; it will be split in training and test parts.
+        extra_regressors : DataFrame, optional, default None
+            Additional time-series to passed to `train` in order to improve the performances.
+        batch_size : int, optional, default 1
+            Preferred number of training windows in each batch of jobs.
+        parallel : bool, optional, default False
+            True if the jobs will be executed by other processes. Otherwise, the jobs have to be executed in this
+            process, and the last training (the one of the best prediction) is not yielded but done directly.
+
+        Returns
+        -------
+        ModelResult
+            `ModelResult` containing the results of the model, trained on ingested_data.
         """
         model_characteristics = self.model_characteristics
 
@@ -473,9 +1166,50 @@ class PredictionModel:
 
         train_ts.iloc[:, 0] = self.transformation.apply(train_ts.iloc[:, 0])
 
-        model_training_results = self._compute_trainings(train_ts, test_ts, extra_regressors, max_threads)
+        model_training_results = yield from self._training_steps(train_ts, test_ts, extra_regressors, batch_size,
+                                                                 parallel)
+
+        if parallel:
+            best_starting_index = model_training_results.first_used_index[
+                model_training_results.best(self.main_accuracy_estimator)]
+            initial_parameters = self.window_parameters.get(best_starting_index)
+            cached = None
+            if self.fit_cache is not None:
+                key = self._best_prediction_key(ingested_data, best_starting_index, extra_regressors,
+                                                initial_parameters)
+                cached = self.fit_cache.get(key)
+
+            if cached is not None:
+                best_prediction, characteristics = cached
+                model_characteristics.update(characteristics)
+            else:
+                cost = len(ingested_data.loc[best_starting_index:]) * self.cost_factor
+                inputs = [share_frame(ingested_data), share_frame(extra_regressors)]
+                shared_prediction = None
+                try:
+                    [outcome] = yield [(self._fit_shared_best_prediction,
+                                        (inputs[0], best_starting_index, inputs[1], initial_parameters), cost)]
+                    if not isinstance(outcome, JobInterrupted):
+                        shared_prediction, characteristics, trained = outcome
+                        model_characteristics.update(characteristics)
+                        self._restore_trained(trained)
+                        best_prediction = read_frame(shared_prediction, copy=True)
+                finally:
+                    for frame in inputs + [shared_prediction]:
+                        unlink_frame(frame)
+
+                if isinstance(outcome, JobInterrupted):
+                    best_prediction = self._interrupted_best_prediction(model_training_results, outcome)
+                elif self.fit_cache is not None:
+                    self.fit_cache.put(key, (best_prediction, characteristics))
+        else:
+            best_prediction = self._compute_best_prediction(ingested_data, model_training_results, extra_regressors)
+
+        if self.fit_cache is not None:
+            log.info(f"Fit cache: {self.fit_cache.hits} hits, {self.fit_cache.misses} misses so far "
+                     f"(hit rate {self.fit_cache.hit_rate:.0%}).")
 
-        best_prediction = self._compute_best_prediction(ingested_data, model_training_results, extra_regressors)
+        self._apply_results_retention(model_training_results)
 
         if extra_regressors is not None:
             model_characteristics["extra_regressors"] = ', '.join([*extra_regressors.columns])
@@ -1,3 +1,4 @@
+import copy
 import itertools
 import json
 import pkgutil
@@ -70,8 +71,12 @@ class FBProphetModel(PredictionModel):
             input_data.reset_index(inplace=True)
             input_data.columns = ['ds', 'y']
 
+        fit_arguments = {}
+        if self.initial_parameters is not None:
+            fit_arguments["init"] = self._stan_init(input_data)
+
         with self.suppress_stdout_stderr():
-            self.fbmodel.fit(input_data)
+            self.fbmodel.fit(input_data, **fit_arguments)
 
         #######################
         # param_grid = {
@@ -121,6 +126,44 @@ class FBProphetModel(PredictionModel):
         # with self.suppress_stdout_stderr():
         #     self.fbmodel.fit(input_data)
 
+    def _stan_init(self, input_data: DataFrame) -> dict:
+        """
+        Return the Stan initialization for the fit of `self.fbmodel` on `input_data`, from `self.initial_parameters`.
+
+        The number of changepoints (length of `delta`) and of seasonality features (length of `beta`) depend on the
+        length of the training window, e.g. the yearly seasonality is enabled only on windows longer than two years;
+        Stan does not check the shapes of its initialization, so the entries which do not match this fit are replaced by
+        the zeros Prophet would use.
+        """
+        # The shapes are computed as `Prophet.fit` does, on a copy, because a Prophet object can be fitted only once.
+        probe = copy.deepcopy(self.fbmodel)
+        history = input_data[input_data['y'].notnull()].copy()
+        probe.history = probe.setup_dataframe(history, initialize_scales=True)
+        probe.set_auto_seasonalities()
+        seasonal_features, _, _, _ = probe.make_all_seasonality_features(probe.history)
+        probe.set_changepoints()
+        shapes = {"delta": len(probe.changepoints_t), "beta": seasonal_features.shape[1]}
+
+        init = dict(self.initial_parameters)
+        for name, length in shapes.items():
+            if name not in init or len(np.atleast_1d(init[name])) != length:
+                init[name] = np.zeros(length)
+        return init
+
+    def fitted_parameters(self):
+        """Overrides PredictionModel.fitted_parameters()"""
+        params = self.fbmodel.params
+        if not params:
+            return None
+
+        return {
+            "k": params["k"][0][0],
+            "m": params["m"][0][0],
+            "sigma_obs": params["sigma_obs"][0][0],
+            "delta": params["delta"][0],
+            "beta": params["beta"][0]
+        }
+
     def predict(self, future_dataframe: DataFrame, extra_regressors: DataFrame = None) -> DataFrame:
         """Overrides PredictionModel.predict()"""
         future = future_dataframe.reset_index()
@@ -0,0 +1,131 @@
+import importlib
+import logging
+
+try:
+    from importlib import metadata
+except ImportError:  # Python < 3.8
+    try:
+        import importlib_metadata as metadata
+    except ImportError:
+        metadata = None
+
+log = logging.getLogger(__name__)
+
+# Entry point group through which other packages can register their models.
+ENTRY_POINT_GROUP = "timexseries.models"
+
+# Models known to the registry, by name: either the `module:class` path of the class, not imported yet, or the class.
+_models = {
+    "fbprophet": "timexseries.data_prediction.models.prophet_predictor:FBProphetModel",
+    "LSTM": "timexseries.data_prediction.models.lstm_predictor:LSTMModel",
+    "mockup": "timexseries.data_prediction.models.mockup_predictor:MockUpModel",
+    "arima": "timexseries.data_prediction.models.arima_predictor:ARIMAModel",
+}
+
+# Model used for the names which are not registered, for compatibility with the configurations written when every
+# unknown model was an ARIMA.
+DEFAULT_MODEL = "arima"
+
+_entry_points_loaded = False
+
+
+def _load_entry_points():
+    global _entry_points_loaded
+    if _entry_points_loaded or metadata is None:
+        return
+    _entry_points_loaded = True
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        group = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = entry_points.get(ENTRY_POINT_GROUP, [])
+
+    for entry_point in group:
+        # The value of an entry point is its `module:class` path, so nothing is imported yet.
+        _models.setdefault(entry_point.name, entry_point.value)
+
+
+def register_model(name: str, model):
+    """
+    Register a model, so that it can be used in the `models` entry of `model_parameters` with the name `name`.
+
+    Models of other packages can also be registered through the `timexseries.models` entry point group, e.g. in
+    `pyproject.toml`:
+
+    .. code-block:: toml
+
+        [tool.poetry.plugins."timexseries.models"]
+        "mymodel" = "mypackage.mymodule:MyModel"
+
+    Parameters
+    ----------
+    name : str
+        Name of the model.
+    model : type, str
+        Subclass of `timexseries.data_prediction.models.predictor.PredictionModel`, or its `module:class` path: in this
+        case the module is imported only when the model is used for the first time.
+
+    Examples
+    --------
+    >>> register_model("mymodel", "mypackage.mymodule:MyModel")
+    >>> "mymodel" in available_models()
+    True
+    """
+    _models[name] = model
+
+
+def available_models() -> [str]:
+    """
+    Return the names of the registered models, including the ones registered through entry points.
+    """
+    _load_entry_points()
+    return [*_models]
+
+
+def model_path(name: str) -> str:
+    """
+    Return the `module:class` path of the model `name`, without importing it.
+    """
+    _load_entry_points()
+    if name not in _models:
+        log.warning(f"Model {name} is not registered: using {DEFAULT_MODEL}.")
+        name = DEFAULT_MODEL
+
+    model = _models[name]
+    if isinstance(model, str):
+        return model
+    return f"{model.__module__}:{model.__qualname__}"
+
+
+def model_class(name: str) -> type:
+    """
+    Return the class of the model `name`, importing its module if it is the first time it is used.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model, e.g. "fbprophet".
+
+    Returns
+    -------
+    type
+        Subclass of `timexseries.data_prediction.models.predictor.PredictionModel`.
+
+    Examples
+    --------
+    >>> model_class("mockup")
+    <class 'timexseries.data_prediction.models.mockup_predictor.MockUpModel'>
+    """
+    path = model_path(name)
+    if name in _models and not isinstance(_models[name], str):
+        return _models[name]
+
+    module, _, qualname = path.partition(":")
+    model = importlib.import_module(module)
+    for attribute in qualname.split("."):
+        model = getattr(model, attribute)
+
+    if name in _models:
+        _models[name] = model
+    return model
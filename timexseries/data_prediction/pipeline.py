@@ -9,11 +9,11 @@ from pandas import DataFrame
 
 from timexseries.data_ingestion import ingest_additional_regressors
 from timexseries.data_prediction import PredictionModel
-from timexseries.data_prediction.models.arima_predictor import ARIMAModel
-from timexseries.data_prediction.models.lstm_predictor import LSTMModel
-from timexseries.data_prediction.models.mockup_predictor import MockUpModel
-# from timexseries.data_prediction.models.neuralprophet_predictor import NeuralProphetModel
-from timexseries.data_prediction.models.prophet_predictor import FBProphetModel
+from timexseries.data_prediction.config import compile_config
+from timexseries.data_prediction.validation_performances import ErrorAccumulator
+from timexseries.data_prediction.models.predictor import ModelResult
+from timexseries.data_prediction.models import registry
+from timexseries.data_prediction.training_pool import TrainingPool, JobInterrupted, available_cpus, available_memory
 from timexseries.data_prediction.xcorr import calc_all_xcorr
 from timexseries.timeseries_container import TimeSeriesContainer
 
@@ -55,8 +55,8 @@ def prepare_extra_regressor(container: TimeSeriesContainer, model: str) -> DataF
     return best_entire_forecast
 
 
-def get_best_univariate_predictions(ingested_data: DataFrame, param_config: dict, total_xcorr: dict = None) -> \
-        Tuple[dict, list]:
+def get_best_univariate_predictions(ingested_data: DataFrame, param_config: dict, total_xcorr: dict = None,
+                                    pool: TrainingPool = None) -> Tuple[dict, list]:
     """
     Compute, for every column in `ingested_data` (every time-series) the best univariate prediction possible.
     This is done using the models specified in `param_config` and testing the effect of the different transformations
@@ -75,9 +75,15 @@ def get_best_univariate_predictions(ingested_data: DataFrame, param_config: dict
         - `main_accuracy_estimator`: error metric which will be minimized as target by the procedure. E.g. "mae".
         - `models`: comma-separated list of the models to use (e.g. "fbprophet,arima").
 
+        Global models (see `timexseries.data_prediction.models.predictor.PredictionModel.train_global`, e.g. the LSTM
+        with the `global` entry of `lstm_parameters`) are first fitted once on all the time-series, for each
+        transformation; the result of each time-series is still a separate `ModelResult`.
+
     total_xcorr : dict, optional, default None
         Cross-correlation dictionary computed by `calc_all_xcorr`. The cross-correlation is actually not used in this
         function, however it is used to build the returned `timexseries.timeseries_container.TimeSeriesContainer`, if given.
+    pool : TrainingPool, optional, default None
+        Pool of worker processes used to train the models. See `create_training_pool`.
 
     Returns
     -------
@@ -127,16 +133,16 @@ def get_best_univariate_predictions(ingested_data: DataFrame, param_config: dict
 
     This is the `timexseries.data_prediction.models.predictor.ModelResult` object for FBProphet that we have just computed.
     """
-    transformations_to_test = [*param_config["model_parameters"]["possible_transformations"].split(",")]
-    main_accuracy_estimator = param_config["model_parameters"]["main_accuracy_estimator"]
-    models = [*param_config["model_parameters"]["models"].split(",")]
+    param_config = compile_config(param_config)
+    transformations_to_test = param_config.model.possible_transformations
+    main_accuracy_estimator = param_config.model.main_accuracy_estimator
+    models = param_config.model.models
 
-    best_transformations = dict.fromkeys(models, {})
+    best_transformations = {model: {} for model in models}
     timeseries_containers = []
 
-    try:
-        max_threads = param_config['max_threads']
-    except KeyError:
+    max_threads = param_config.max_threads
+    if max_threads is None:
         try:
             max_threads = len(os.sched_getaffinity(0))
         except:
@@ -144,6 +150,29 @@ def get_best_univariate_predictions(ingested_data: DataFrame, param_config: dict
 
     columns = ingested_data.columns
 
+    # Global models are fitted once on all the time-series, for each transformation; the models of the single
+    # time-series start from their parameters.
+    global_parameters = {}
+    for model in models:
+        for transf in transformations_to_test:
+            predictor = model_factory(model, param_config=param_config, transformation=transf)
+            if predictor.global_model:
+                predictor.train_global(ingested_data)
+                global_parameters[(model, transf)] = predictor.global_parameters
+
+    def create_predictor(model, transf):
+        predictor = model_factory(model, param_config=param_config, transformation=transf)
+        predictor.global_parameters = global_parameters.get((model, transf))
+        return predictor
+
+    # All the fits of all the time-series are scheduled together, so that the workers are kept busy until the end.
+    fits = [(col, model, transf) for col in columns for model in models for transf in transformations_to_test]
+    log.info(f"Computing {len(fits)} univariate predictions...")
+    all_results = launch_models([(create_predictor(model, transf), ingested_data[[col]].copy(), None)
+                                 for col, model, transf in fits],
+                                max_threads, pool)
+    all_results = dict(zip(fits, all_results))
+
     for col in columns:
         model_results = {}
         timeseries_data = ingested_data[[col]]
@@ -152,19 +181,21 @@ def get_best_univariate_predictions(ingested_data: DataFrame, param_config: dict
         for model in models:
             this_model_performances = []
 
-            log.info(f"Using model {model}...")
-
             for transf in transformations_to_test:
-                log.info(f"Computing univariate prediction for {col} using transformation: {transf}...")
-                predictor = model_factory(model, param_config=param_config, transformation=transf)
-                _result = predictor.launch_model(timeseries_data.copy(), max_threads=max_threads)
+                _result = all_results[(col, model, transf)]
+                if _result is None:
+                    continue
 
-                performances = _result.results
-                performances.sort(key=lambda x: getattr(x.testing_performances, main_accuracy_estimator.upper()))
-                performances = getattr(performances[0].testing_performances, main_accuracy_estimator.upper())
+                performances = _result.table
+                performances = performances.metrics[main_accuracy_estimator.upper()][
+                    performances.best(main_accuracy_estimator)]
 
                 this_model_performances.append((_result, performances, transf))
 
+            if len(this_model_performances) == 0:
+                log.warning(f"No result for {col} using {model}: the model is skipped.")
+                continue
+
             this_model_performances.sort(key=lambda x: x[1])
             best_tr = this_model_performances[0][2]
             [log.debug(f"Error with {t}: {e}") for t, e in zip(map(lambda x: x[2], this_model_performances),
@@ -181,7 +212,8 @@ def get_best_univariate_predictions(ingested_data: DataFrame, param_config: dict
 
 
 def get_best_multivariate_predictions(timeseries_containers: [TimeSeriesContainer], ingested_data: DataFrame,
-                                      best_transformations: dict, total_xcorr: dict, param_config: dict):
+                                      best_transformations: dict, total_xcorr: dict, param_config: dict,
+                                      pool: TrainingPool = None):
     """
     Starting from the a list of `timexseries.timeseries_container.TimeSeriesContainer`, use the available univariated
     predictions and the time-series in `ingested_data`, plus eventual user-given additional regressors to compute new
@@ -218,6 +250,8 @@ def get_best_multivariate_predictions(timeseries_containers: [TimeSeriesContaine
         Additionally, the `additional_regressors` part of the TIMEX configuration parameter dictionary can be used by
         the user to specify additional CSV paths to time-series data to use as extra-regressor.
         It should be a dictionary in the form "target time-series": "path of the additional extra-regressors".
+    pool : TrainingPool, optional, default None
+        Pool of worker processes used to train the models. See `create_training_pool`.
 
     Returns
     -------
@@ -279,6 +313,7 @@ def get_best_multivariate_predictions(timeseries_containers: [TimeSeriesContaine
 
     This means that using `b` as additional regressor for `a` made us obtain a better error.
     """
+    param_config = compile_config(param_config)
     iterations = 0
     best_forecasts_found = 0
 
@@ -291,11 +326,10 @@ def get_best_multivariate_predictions(timeseries_containers: [TimeSeriesContaine
     except KeyError:
         additional_regressors = None
 
-    models = [*param_config["model_parameters"]["models"].split(",")]
+    models = param_config.model.models
 
-    try:
-        max_threads = param_config['max_threads']
-    except KeyError:
+    max_threads = param_config.max_threads
+    if max_threads is None:
         try:
             max_threads = len(os.sched_getaffinity(0))
         except:
@@ -313,6 +347,11 @@ def get_best_multivariate_predictions(timeseries_containers: [TimeSeriesContaine
             for col in ingested_data.columns:
                 useful_extra_regressors = []
 
+                if col not in best_transformations[model]:
+                    log.debug(f"No univariate prediction of {col} with {model}: skipping...")
+                    best_forecasts_found += 1
+                    continue
+
                 log.debug(f"Look for extra regressors in other dataset's columns...")
                 try:
                     local_xcorr = total_xcorr[col][xcorr_mode_target]
@@ -353,14 +392,19 @@ def get_best_multivariate_predictions(timeseries_containers: [TimeSeriesContaine
                     tr = best_transformations[model][col]
 
                     predictor = model_factory(model, param_config, transformation=tr)
-                    _result = predictor.launch_model(timeseries_data.copy(),
-                                                     extra_regressors=useful_extra_regressors.copy(),
-                                                     max_threads=max_threads)
+                    try:
+                        _result = predictor.launch_model(timeseries_data.copy(),
+                                                         extra_regressors=useful_extra_regressors.copy(),
+                                                         max_threads=max_threads, pool=pool)
+                    except JobInterrupted as e:
+                        log.warning(f"Multivariate prediction of {col} with {model} skipped: {e}")
+                        best_forecasts_found += 1
+                        continue
                     old_this_container = next(filter(lambda x: x.timeseries_data.columns[0] == col, timeseries_containers))
 
-                    old_errors = [x.testing_performances.MAE for x in old_this_container.models[model].results]
-                    min_old_error = min(old_errors)
-                    min_new_error = min([x.testing_performances.MAE for x in _result.results])
+                    old_errors = old_this_container.models[model].table.metrics['MAE']
+                    min_old_error = old_errors.min()
+                    min_new_error = _result.table.metrics['MAE'].min()
 
                     if min_new_error < min_old_error:
                         log.info(f"Obtained a better error: {min_new_error} vs old {min_old_error}")
@@ -377,7 +421,7 @@ def get_best_multivariate_predictions(timeseries_containers: [TimeSeriesContaine
     return timeseries_containers
 
 
-def get_best_predictions(ingested_data: DataFrame, param_config: dict):
+def get_best_predictions(ingested_data: DataFrame, param_config: dict, pool: TrainingPool = None):
     """
     Starting from `ingested_data`, using the models/cross correlation settings set in `param_config`, return the best
     possible predictions in a `timexseries.timeseries_container.TimeSeriesContainer` for each time-series in `ingested_data`.
@@ -391,6 +435,10 @@ def get_best_predictions(ingested_data: DataFrame, param_config: dict):
         TIMEX configuration dictionary. `get_best_univariate_predictions` and `get_best_multivariate_predictions` will
         use the various settings in `param_config`.
 
+    pool : TrainingPool, optional, default None
+        Pool of worker processes used to train the models. If None, a new one is created with `create_training_pool`
+        and closed at the end of the computation.
+
     Returns
     -------
     list
@@ -413,6 +461,14 @@ def get_best_predictions(ingested_data: DataFrame, param_config: dict):
     Simply compute the predictions and get the returned `timexseries.timeseries_container.TimeSeriesContainer` objects:
     >>> timeseries_outputs = get_best_predictions(timeseries_dataframe, param_config)
     """
+    param_config = compile_config(param_config)
+    if pool is None:
+        with create_training_pool(param_config) as pool:
+            return get_best_predictions(ingested_data, param_config, pool)
+
+    # The run budget is given to each computation of the predictions, also when the pool is shared by many of them.
+    pool.reset_budget()
+
     if "xcorr_parameters" in param_config and len(ingested_data.columns) > 1:
         log.info(f"Computing the cross-correlation...")
         total_xcorr = calc_all_xcorr(ingested_data=ingested_data, param_config=param_config)
@@ -420,18 +476,19 @@ def get_best_predictions(ingested_data: DataFrame, param_config: dict):
         total_xcorr = None
 
     best_transformations, timeseries_containers = get_best_univariate_predictions(ingested_data, param_config,
-                                                                                  total_xcorr)
+                                                                                  total_xcorr, pool)
 
     if total_xcorr is not None or "additional_regressors" in param_config:
         timeseries_containers = get_best_multivariate_predictions(timeseries_containers=timeseries_containers, ingested_data=ingested_data,
                                                       best_transformations=best_transformations,
                                                       total_xcorr=total_xcorr,
-                                                      param_config=param_config)
+                                                      param_config=param_config,
+                                                      pool=pool)
 
     return timeseries_containers
 
 
-def compute_historical_predictions(ingested_data, param_config):
+def compute_historical_predictions(ingested_data, param_config, pool: TrainingPool = None):
     """
     Compute the historical predictions, i.e. the predictions for (part) of the history of the time-series.
 
@@ -445,7 +502,8 @@ def compute_historical_predictions(ingested_data, param_config):
 
         - `initial_index`: the point from which the historical computations will be made;
         - `save_path`: the historical computations are saved on a file, serialized with pickle. This allows the re-use
-        of these predictions if TIMEX is restarted in the future.
+        of these predictions if TIMEX is restarted in the future. The error statistics of the historical predictions,
+        accumulated while the predictions are computed, are saved in the same file.
 
         Additionally, the parameter `delta` can be specified: this indicates how many data points should be predicted
         every run. The default is `1`; a number greater than `1` will reduce the accuracy of the predictions because
@@ -453,13 +511,16 @@ def compute_historical_predictions(ingested_data, param_config):
 
         `input_parameters` will be used because the `initial_index` date will be parsed with the same format provided in
         `input_parameters`, if any. Otherwise the standard `yyyy-mm-dd` format will be used.
+    pool : TrainingPool, optional, default None
+        Pool of worker processes used to train the models, re-used for every step of the historical computation. If
+        None, a new one is created with `create_training_pool` and closed at the end of the computation.
 
     Returns
     -------
     list
         A list of `timexseries.timeseries_container.TimeSeriesContainer` objects, one for each time-series. These containers
-        have the `historical_prediction` attribute; the predictions in `model_results` are the more recent available
-        ones.
+        have the `historical_prediction` and `historical_performance` attributes; the predictions in `model_results` are
+        the more recent available ones.
 
     Notes
     -----
@@ -520,9 +581,19 @@ def compute_historical_predictions(ingested_data, param_config):
     }
 
     If multiple models were specified, `historical_prediction` dictionary would have other entries.
+
+    The error statistics of the historical predictions are updated every time a new historical prediction is computed,
+    and they are available without re-computing them over the entire history:
+    >>> timeseries_outputs[0].historical_performance['fbprophet'].MAE
+    0.1798
     """
+    param_config = compile_config(param_config)
+    if pool is None:
+        with create_training_pool(param_config) as pool:
+            return compute_historical_predictions(ingested_data, param_config, pool)
+
     input_parameters = param_config["input_parameters"]
-    models = [*param_config["model_parameters"]["models"].split(",")]
+    models = param_config.model.models
     save_path = param_config["historical_prediction_parameters"]["save_path"]
     try:
         hist_pred_delta = param_config["historical_prediction_parameters"]["delta"]
@@ -533,6 +604,19 @@ def compute_historical_predictions(ingested_data, param_config):
         with open(save_path, 'rb') as file:
             historical_prediction = pickle.load(file)
         log.info(f"Loaded historical prediction from file...")
+
+        if "historical_prediction" in historical_prediction:
+            error_accumulators = historical_prediction["error_accumulators"]
+            historical_prediction = historical_prediction["historical_prediction"]
+        else:
+            log.info(f"Historical prediction file without error statistics: computing them from the saved predictions...")
+            error_accumulators = {}
+            for model in historical_prediction:
+                error_accumulators[model] = {}
+                for col in historical_prediction[model].columns:
+                    error_accumulators[model][col] = ErrorAccumulator.from_series(
+                        ingested_data[col], historical_prediction[model][col].dropna())
+
         current_index = historical_prediction[models[0]].index[-1]
     except FileNotFoundError:
         log.info(f"Historical prediction file not found: computing from the start...")
@@ -545,8 +629,10 @@ def compute_historical_predictions(ingested_data, param_config):
             current_index = dateparser.parse(starting_index)
 
         historical_prediction = {}
+        error_accumulators = {}
         for model in models:
             historical_prediction[model] = DataFrame(columns=ingested_data.columns)
+            error_accumulators[model] = {col: ErrorAccumulator() for col in ingested_data.columns}
 
     final_index = ingested_data.index[-1]
     log.info(f"Starting index: {current_index}")
@@ -573,7 +659,7 @@ def compute_historical_predictions(ingested_data, param_config):
         available_data = ingested_data[:current_index]  # Remember: this includes current_index
         log.info(f"Using data from {available_data.index[0]} to {current_index} for training...")
 
-        timeseries_containers = get_best_predictions(available_data, param_config)
+        timeseries_containers = get_best_predictions(available_data, param_config, pool)
 
         log.info(f"Assigning the historical predictions from {current_index + delta_time} to "
                  f"{current_index + hist_pred_delta * delta_time}")
@@ -582,22 +668,28 @@ def compute_historical_predictions(ingested_data, param_config):
                 p = s.models[model].best_prediction
                 timeseries_name = s.timeseries_data.columns[0]
                 next_preds = p.loc[current_index + delta_time:current_index + hist_pred_delta * delta_time, 'yhat']
+                accumulator = error_accumulators[model].setdefault(timeseries_name, ErrorAccumulator())
 
                 for index, value in next_preds.items():
+                    # Points predicted again (e.g. re-computing the last ones) replace their old contribution.
+                    previous = historical_prediction[model].loc[index, timeseries_name] \
+                        if index in historical_prediction[model].index else None
                     historical_prediction[model].loc[index, timeseries_name] = value
+                    accumulator.update(index, ingested_data.loc[index, timeseries_name], value, previous)
 
         current_index += delta_time * hist_pred_delta
 
         log.info(f"Saving partial historical prediction to file...")
         with open(save_path, 'wb') as file:
-            pickle.dump(historical_prediction, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump({"historical_prediction": historical_prediction, "error_accumulators": error_accumulators},
+                        file, protocol=pickle.HIGHEST_PROTOCOL)
 
     if additional_computation:
         log.info(f"Remaining data less than requested delta time. Computing the best predictions with last data...")
         available_data = ingested_data[:current_index]  # Remember: this includes current_index
         log.info(f"Using data from {available_data.index[0]} to {current_index} for training...")
 
-        timeseries_containers = get_best_predictions(available_data, param_config)
+        timeseries_containers = get_best_predictions(available_data, param_config, pool)
 
         log.info(f"Assigning the historical predictions from {current_index + delta_time} to "
                  f"{final_index}")
@@ -606,23 +698,32 @@ def compute_historical_predictions(ingested_data, param_config):
                 p = s.models[model].best_prediction
                 timeseries_name = s.timeseries_data.columns[0]
                 next_preds = p.loc[current_index + delta_time:final_index, 'yhat']
+                accumulator = error_accumulators[model].setdefault(timeseries_name, ErrorAccumulator())
 
                 for index, value in next_preds.items():
+                    # Points predicted again (e.g. re-computing the last ones) replace their old contribution.
+                    previous = historical_prediction[model].loc[index, timeseries_name] \
+                        if index in historical_prediction[model].index else None
                     historical_prediction[model].loc[index, timeseries_name] = value
+                    accumulator.update(index, ingested_data.loc[index, timeseries_name], value, previous)
 
         log.info(f"Saving partial historical prediction to file...")
         with open(save_path, 'wb') as file:
-            pickle.dump(historical_prediction, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump({"historical_prediction": historical_prediction, "error_accumulators": error_accumulators},
+                        file, protocol=pickle.HIGHEST_PROTOCOL)
 
     available_data = ingested_data
-    timeseries_containers = get_best_predictions(available_data, param_config)
+    timeseries_containers = get_best_predictions(available_data, param_config, pool)
 
     for s in timeseries_containers:
         timeseries_name = s.timeseries_data.columns[0]
         timeseries_historical_predictions = {}
+        timeseries_historical_performances = {}
         for model in historical_prediction:
             timeseries_historical_predictions[model] = DataFrame(historical_prediction[model].loc[:, timeseries_name])
-        s.set_historical_prediction(timeseries_historical_predictions)
+            timeseries_historical_performances[model] = \
+                error_accumulators[model].setdefault(timeseries_name, ErrorAccumulator()).get_validation_performance()
+        s.set_historical_prediction(timeseries_historical_predictions, timeseries_historical_performances)
 
     return timeseries_containers
 
@@ -688,6 +789,7 @@ def create_timeseries_containers(ingested_data: DataFrame, param_config: dict):
     2000-01-29  58
     2000-01-30  59
     """
+    param_config = compile_config(param_config)
     if "historical_prediction_parameters" in param_config:
         log.debug(f"Requested the computation of historical predictions.")
         timeseries_containers = compute_historical_predictions(ingested_data, param_config)
@@ -713,9 +815,167 @@ def create_timeseries_containers(ingested_data: DataFrame, param_config: dict):
     return timeseries_containers
 
 
+def launch_models(fits: [tuple], max_threads: int, pool: TrainingPool = None) -> [ModelResult]:
+    """
+    Launch many models at the same time, sharing the workers of `pool`: the training jobs of all the models are
+    scheduled together, from the most expensive, and the results of each model are assembled as soon as its jobs are
+    completed. This is the same of calling `launch_model` on each model, but a few expensive models do not leave the
+    other workers idle.
+
+    Models which can not be trained in other processes (see `PredictionModel.parallel_training`), or by the workers of
+    `pool` (see `PredictionModel.can_use_pool`), are launched in this process, one after the other.
+
+    Parameters
+    ----------
+    fits : [tuple]
+        Models to launch, as `(predictor, ingested_data, extra_regressors)` tuples; see `PredictionModel.launch_model`.
+    max_threads : int
+        Maximum number of processes to use.
+    pool : TrainingPool, optional, default None
+        Pool of worker processes to use. If None and `max_threads` is greater than 1, a temporary one is created.
+
+    Returns
+    -------
+    [ModelResult]
+        Result of each model, in the same order of `fits`. None for the models whose trainings have all been
+        interrupted, e.g. cancelled because the `run_budget` of `pool` has run out.
+    """
+    parallel = [i for i, (predictor, _, _) in enumerate(fits) if predictor.parallel_training and max_threads > 1
+                and (pool is None or predictor.can_use_pool(pool))]
+
+    if len(parallel) > 0 and pool is None:
+        start_method = next(filter(None, [fits[i][0].required_start_method() for i in parallel]), None)
+        with TrainingPool(max_threads, threads_per_worker=max(1, available_cpus() // max_threads),
+                          start_method=start_method) as pool:
+            return launch_models(fits, max_threads, pool)
+
+    results = [None] * len(fits)
+    if len(parallel) > 0:
+        steps = [fits[i][0].launch_model_steps(fits[i][1], fits[i][2], max_threads, True) for i in parallel]
+        for i, result in zip(parallel, pool.run_steps(steps)):
+            results[i] = result
+
+    for i, (predictor, ingested_data, extra_regressors) in enumerate(fits):
+        if i not in parallel:
+            try:
+                results[i] = predictor.launch_model(ingested_data, extra_regressors)
+            except JobInterrupted as e:
+                results[i] = e
+
+    for i, result in enumerate(results):
+        if isinstance(result, JobInterrupted):
+            log.warning(f"{fits[i][0].name} model on {', '.join(fits[i][1].columns)} skipped: {result}")
+            results[i] = None
+
+    return results
+
+
+def create_training_pool(param_config: dict) -> TrainingPool:
+    """
+    Create the pool of worker processes which will be used to train all the models requested in `param_config`.
+    The number of workers is given by the `max_threads` entry of `param_config` (by default, the number of available
+    CPUs); each worker pre-imports the modules of the models in `model_parameters`.
+
+    The optional `resource_parameters` sub-dictionary of `param_config` sets the resource policy of the workers:
+
+    - `threads_per_worker`: size of the thread pools of the numerical libraries (OpenMP, BLAS, torch) in each worker.
+      By default, the available CPUs are split evenly among the workers.
+    - `cpu_affinity`: if true, pin each worker to its own set of CPUs. Default false.
+    - `start_method`: start method of the workers, e.g. "spawn", "forkserver" or "fork". By default, the one of the
+      platform, unless some of the models require another one (see `PredictionModel.worker_start_methods`).
+    - `memory_limit`: memory, in MB, which the running trainings can use altogether; the number of trainings run in
+      parallel is reduced when their estimated peak memory would exceed it (see `TrainingPool`). "auto" uses the
+      memory currently available. By default, "auto" if `max_threads` is not given, otherwise no limit.
+    - `job_timeout`: maximum wall-clock time, in seconds, of each training. A training window which times out is
+      recorded as failed, and the window search goes on. Default no timeout.
+    - `run_budget`: wall-clock time, in seconds, available to all the trainings of each computation of the predictions
+      (`get_best_predictions`, i.e. each step of the historical predictions); once it has run out, the queued
+      trainings are cancelled, and the models which could not be trained on any window are skipped. Default no
+      budget.
+
+    Workers are started only when the first job is submitted, so creating a pool is cheap even if it will never be
+    used, e.g. with `max_threads` equal to 1.
+
+    Parameters
+    ----------
+    param_config : dict
+        TIMEX configuration dictionary.
+
+    Returns
+    -------
+    TrainingPool
+        Pool of worker processes. It should be closed, or used as context manager, when the computation is over.
+
+    Examples
+    --------
+    >>> with create_training_pool(param_config) as pool:
+    ...     timeseries_outputs = get_best_predictions(timeseries_dataframe, param_config, pool)
+    """
+    param_config = compile_config(param_config)
+    cpus = available_cpus()
+
+    try:
+        resource_parameters = param_config["resource_parameters"]
+    except KeyError:
+        resource_parameters = {}
+
+    if param_config.max_threads is not None:
+        max_threads = param_config.max_threads
+        memory_limit = None
+    else:
+        max_threads = cpus
+        memory_limit = "auto"
+
+    try:
+        memory_limit = resource_parameters["memory_limit"]
+    except KeyError:
+        pass
+
+    if memory_limit == "auto":
+        memory_limit = available_memory()
+    elif memory_limit is not None:
+        memory_limit = int(memory_limit * 1024 * 1024)
+
+    try:
+        threads_per_worker = resource_parameters["threads_per_worker"]
+    except KeyError:
+        threads_per_worker = max(1, cpus // max(1, max_threads))
+
+    try:
+        cpu_affinity = resource_parameters["cpu_affinity"]
+    except KeyError:
+        cpu_affinity = False
+
+    try:
+        job_timeout = resource_parameters["job_timeout"]
+    except KeyError:
+        job_timeout = None
+
+    try:
+        run_budget = resource_parameters["run_budget"]
+    except KeyError:
+        run_budget = None
+
+    models = param_config.model.models if param_config.model is not None else ()
+
+    try:
+        start_method = resource_parameters["start_method"]
+    except KeyError:
+        start_method = next(filter(None, [registry.model_class(m).required_start_method() for m in models]), None)
+
+    # Module of each model, imported by the workers as soon as they start.
+    preload = [*dict.fromkeys(registry.model_path(m).partition(":")[0] for m in models)]
+
+    return TrainingPool(max_threads, preload=preload,
+                        threads_per_worker=threads_per_worker, cpu_affinity=cpu_affinity, start_method=start_method,
+                        memory_limit=memory_limit, job_timeout=job_timeout, run_budget=run_budget)
+
+
 def model_factory(model_class: str, param_config: dict, transformation: str = None) -> PredictionModel:
     """
-    Given the name of the model, return the corresponding PredictionModel.
+    Given the name of the model, return the corresponding PredictionModel. Models are looked up in the model registry
+    (see `timexseries.data_prediction.models.registry`), which imports the module of each model only when it is used
+    for the first time; models of other packages can be added to the registry through entry points.
 
     Parameters
     ----------
@@ -747,13 +1007,4 @@ def model_factory(model_class: str, param_config: dict, transformation: str = No
     >>> print(type(model))
     <class 'timexseries.data_prediction.models.prophet_predictor.FBProphetModel'>
     """
-    if model_class == "fbprophet":
-        return FBProphetModel(params=param_config, transformation=transformation)
-    if model_class == "LSTM":
-        return LSTMModel(param_config, transformation)
-    # if model_class == "neuralprophet":
-    #     return NeuralProphetModel(param_config, transformation)
-    if model_class == "mockup":
-        return MockUpModel(param_config, transformation)
-    else:
-        return ARIMAModel(params=param_config, transformation=transformation)
\ No newline at end of file
+    return registry.model_class(model_class)(param_config, transformation)
\ No newline at end of file
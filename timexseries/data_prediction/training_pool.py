@@ -0,0 +1,866 @@
+import heapq
+import importlib
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import types
+from multiprocessing.connection import wait
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # Python < 3.8
+    resource_tracker = None
+    shared_memory = None
+
+log = logging.getLogger(__name__)
+
+# Environment variables which limit the size of the thread pools of the numerical libraries (OpenMP, used by Stan and
+# torch; MKL, OpenBLAS, Accelerate and numexpr, used by numpy/scipy/statsmodels).
+THREAD_LIMIT_VARIABLES = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS",
+                          "NUMEXPR_NUM_THREADS"]
+
+# Shared memory blocks attached by this process, by name.
+_attached = {}
+
+# Wall-clock deadline (`time.monotonic()`) of the job being executed by this worker; None if it has no timeout.
+_deadline = None
+
+
+class JobInterrupted(Exception):
+    """
+    Raised, or given back as its result, for a job of a `TrainingPool` which has not been completed.
+    """
+    pass
+
+
+class JobTimeout(JobInterrupted):
+    """
+    The job has run longer than the `job_timeout` of its `TrainingPool`.
+    """
+    pass
+
+
+class JobCancelled(JobInterrupted):
+    """
+    The job has been cancelled before starting, e.g. because the `run_budget` of its `TrainingPool` has run out.
+    """
+    pass
+
+
+def job_time_left():
+    """
+    Return the seconds left to the job which is being executed by this process before its timeout, or None if it has no
+    timeout. Long jobs can check it to stop in a clean way (cooperative cancellation), e.g. returning the best result
+    found so far or raising `JobTimeout`, before the `TrainingPool` stops their worker.
+    """
+    if _deadline is None:
+        return None
+    return _deadline - time.monotonic()
+
+
+def _attach(name: str):
+    if name not in _attached:
+        _attached[name] = shared_memory.SharedMemory(name=name)
+    return _attached[name]
+
+
+def _release_attached():
+    """
+    Close the shared memory blocks attached by this process which are not referenced anymore.
+    """
+    for name in [*_attached]:
+        try:
+            _attached[name].close()
+            del _attached[name]
+        except BufferError:
+            # Some DataFrame still uses this block.
+            pass
+
+
+class SharedFrame:
+    """
+    Picklable handle to a DataFrame whose index and values are stored in a `multiprocessing.shared_memory` block.
+
+    Pickling the handle costs a few bytes whatever the size of the DataFrame: other processes can `read` the DataFrame
+    directly from the shared block, as a read-only view, without any copy. The process which created the handle is in
+    charge of calling `unlink` when the data is not needed anymore.
+
+    Only DataFrames whose columns all have the same numeric dtype can be shared; see `share_frame`.
+
+    Parameters
+    ----------
+    df : DataFrame
+        DataFrame to publish.
+    """
+
+    def __init__(self, df: DataFrame):
+        index = df.index.to_numpy()
+        values = np.ascontiguousarray(df.to_numpy().T)
+
+        self.columns = df.columns
+        self.index_name = df.index.name
+        self.freq = getattr(df.index, 'freqstr', None)
+        self.index_dtype = index.dtype
+        self.dtype = values.dtype
+        self.shape = values.shape
+
+        block = shared_memory.SharedMemory(create=True, size=max(1, index.nbytes + values.nbytes))
+        block.buf[:index.nbytes] = index.tobytes()
+        block.buf[index.nbytes:index.nbytes + values.nbytes] = values.tobytes()
+        self.name = block.name
+        _attached[self.name] = block
+
+    @staticmethod
+    def can_share(df: DataFrame) -> bool:
+        """
+        Return True if `df` can be published in shared memory.
+        """
+        return shared_memory is not None and len(df.columns) > 0 and len(set(df.dtypes)) == 1 \
+            and df.dtypes.iloc[0].kind in 'iuf' and df.index.dtype.kind in 'iuM'
+
+    def read(self, copy: bool = False) -> DataFrame:
+        """
+        Return the shared DataFrame. Its values are a read-only view on the shared memory block, unless `copy` is True.
+
+        Parameters
+        ----------
+        copy : bool, optional, default False
+            If True, return a private copy of the DataFrame, which does not keep the shared memory block attached.
+
+        Returns
+        -------
+        DataFrame
+            Shared DataFrame.
+        """
+        block = _attach(self.name)
+        length = self.shape[1]
+        index_bytes = length * self.index_dtype.itemsize
+
+        # np.frombuffer keeps the buffer exported as long as the arrays are alive, so the block can not be closed
+        # under them (np.ndarray(buffer=...) does not).
+        values_bytes = self.shape[0] * length * self.dtype.itemsize
+        index = np.frombuffer(block.buf[:index_bytes], dtype=self.index_dtype)
+        values = np.frombuffer(block.buf[index_bytes:index_bytes + values_bytes], dtype=self.dtype).reshape(self.shape)
+        index.flags.writeable = False
+        values.flags.writeable = False
+
+        if self.index_dtype.kind == 'M':
+            index = pd.DatetimeIndex(index, freq=self.freq, name=self.index_name)
+        else:
+            index = pd.Index(index, name=self.index_name)
+
+        if copy:
+            index = index.copy(deep=True)
+        return DataFrame(values.T, index=index, columns=self.columns, copy=copy)
+
+    def unlink(self):
+        """
+        Destroy the shared memory block. DataFrames already read from it remain valid in the processes which read them.
+        """
+        block = _attach(self.name)
+        block.unlink()
+        _release_attached()
+
+
+def share_frame(df: DataFrame):
+    """
+    Publish `df` in shared memory, returning its `SharedFrame` handle; if `df` can not be shared (e.g. shared memory is
+    not available, or it has non-numeric columns) `df` is returned as it is.
+    """
+    if df is not None and SharedFrame.can_share(df):
+        return SharedFrame(df)
+    else:
+        return df
+
+
+def read_frame(frame, copy: bool = False) -> DataFrame:
+    """
+    Inverse of `share_frame`: return the DataFrame corresponding to `frame`, which may be a `SharedFrame` or a
+    DataFrame. If `copy` is True, a `SharedFrame` is read in a private copy (see `SharedFrame.read`).
+    """
+    if isinstance(frame, SharedFrame):
+        return frame.read(copy)
+    else:
+        return frame
+
+
+def unlink_frame(frame):
+    """
+    Destroy the shared memory block of `frame`, if it is a `SharedFrame`.
+    """
+    if isinstance(frame, SharedFrame):
+        frame.unlink()
+
+
+def unlink_shared(result):
+    """
+    Unlink the `SharedFrame` in `result`, the result of a job which is discarded: the `SharedFrame` itself, or the ones
+    contained, also recursively, in tuples, lists, dictionaries and in the attributes of objects with `__slots__` (e.g.
+    `timexseries.data_prediction.models.predictor.SingleResult`).
+    """
+    if isinstance(result, SharedFrame):
+        result.unlink()
+    elif isinstance(result, (tuple, list)):
+        for item in result:
+            unlink_shared(item)
+    elif isinstance(result, dict):
+        for item in result.values():
+            unlink_shared(item)
+    elif hasattr(type(result), "__slots__") and not isinstance(result, (str, bytes, Exception)):
+        for slot in type(result).__slots__:
+            unlink_shared(getattr(result, slot, None))
+
+
+def _reset_peak_memory():
+    """
+    Reset the peak resident set size of this process, where supported (Linux), so that `_peak_memory` measures the
+    peak of the next job only.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_memory() -> int:
+    """
+    Return the peak resident set size of this process, in bytes, since the last `_reset_peak_memory` (or since the
+    start of the process, where the peak can not be reset). 0 if it can not be measured.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+def available_cpus() -> int:
+    """
+    Return the number of CPUs which this process can use.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory():
+    """
+    Return the memory which can be used by new processes without swapping, in bytes, or None if it is not known.
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _job_kind(function) -> str:
+    """
+    Return the kind of a job, i.e. the name of its function; for methods, the class of the object is included, so
+    that the jobs of different models have different kinds.
+    """
+    owner = getattr(function, "__self__", None)
+    if owner is not None and not isinstance(owner, types.ModuleType):
+        return f"{type(owner).__qualname__}.{function.__name__}"
+    return getattr(function, "__qualname__", repr(function))
+
+
+class MemoryEstimator:
+    """
+    Estimate of the peak memory of the jobs of a `TrainingPool`, learnt from the peak memory of the workers measured on
+    the completed jobs.
+
+    For each kind of job (see `_job_kind`) the peak memory is modelled as `base + slope * cost`: `base` is the lowest
+    peak observed, i.e. the footprint of a worker with the model libraries loaded, and `slope` is the highest growth
+    per unit of cost observed. Since the cost of a job is proportional to the length of its training data, the
+    estimates follow the length of the series used during the run. Estimates are conservative: they only grow with new
+    observations, except for the base.
+    """
+
+    def __init__(self):
+        self.observations = {}
+
+    def update(self, kind: str, cost: float, peak: int):
+        """
+        Record that a job of kind `kind` and estimated cost `cost` had a peak memory of `peak` bytes.
+        """
+        if peak > 0:
+            self.observations.setdefault(kind, []).append((cost, peak))
+
+    def estimate(self, kind: str, cost: float):
+        """
+        Return the estimated peak memory, in bytes, of a job of kind `kind` and cost `cost`; None if no job of that kind
+        has been observed yet.
+        """
+        if kind not in self.observations:
+            return None
+
+        observations = self.observations[kind]
+        base = min(peak for _, peak in observations)
+        slope = max([(peak - base) / c for c, peak in observations if c > 0], default=0.0)
+        return base + slope * cost
+
+
+def _limit_threads(threads: int):
+    """
+    Limit to `threads` the thread pools of the numerical libraries used by this process.
+
+    The environment variables are read by the libraries when they are loaded, so they are effective only for the
+    libraries not imported yet (always the case with the "spawn" and "forkserver" start methods); the thread pools of
+    the libraries already loaded are limited with `threadpoolctl`, if available, and with `torch.set_num_threads`.
+    """
+    for variable in THREAD_LIMIT_VARIABLES:
+        os.environ[variable] = str(threads)
+
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+
+def _worker_main(connection, preload: [str], threads: int = None, cpus: [int] = None):
+    """
+    Main loop of a `TrainingPool` worker: apply the resource policy, import the modules in `preload`, then execute the
+    jobs received on `connection`, sending back their results, until `None` is received.
+    """
+    global _deadline
+
+    if cpus is not None:
+        try:
+            os.sched_setaffinity(0, cpus)
+        except (AttributeError, OSError) as e:
+            log.warning(f"Can not pin the training worker to the CPUs {cpus}: {e}")
+
+    if threads is not None:
+        _limit_threads(threads)
+
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    if threads is not None and "torch" in sys.modules:
+        # torch may have been imported by the preload.
+        sys.modules["torch"].set_num_threads(threads)
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+
+        if message is None:
+            break
+
+        job_id, function, args, timeout = message
+        _deadline = time.monotonic() + timeout if timeout is not None else None
+        _reset_peak_memory()
+        try:
+            result = (job_id, True, function(*args))
+        except Exception as e:
+            result = (job_id, False, e)
+        _deadline = None
+        connection.send(result + (_peak_memory(), ))
+        del result
+        _release_attached()
+
+
+def _single_step(jobs: [tuple], costs: [float] = None):
+    """
+    Computation made of a single batch of jobs, whose result is the list of the results of the jobs.
+    """
+    if costs is None:
+        costs = [0] * len(jobs)
+    results = yield [(function, args, cost) for (function, args), cost in zip(jobs, costs)]
+    return results
+
+
+def run_steps(steps, pool: 'TrainingPool' = None):
+    """
+    Run a computation made of steps (see `TrainingPool.run_steps`) on `pool`, or in this process if `pool` is None.
+
+    Parameters
+    ----------
+    steps
+        Generator of the computation.
+    pool : TrainingPool, optional, default None
+        Pool of worker processes to use.
+
+    Returns
+    -------
+    Result of the computation. If the computation raises an exception, also a `JobInterrupted` one, it is re-raised.
+    """
+    if pool is not None:
+        result = pool.run_steps([steps])[0]
+        if isinstance(result, JobInterrupted):
+            raise result
+        return result
+
+    try:
+        batch = steps.send(None)
+        while True:
+            batch = steps.send([function(*args) for function, args, _ in batch])
+    except StopIteration as e:
+        return e.value
+
+
+class TrainingPool:
+    """
+    Long-lived pool of worker processes used to train the models.
+
+    Workers are started the first time they are needed and are then re-used for all the jobs submitted to the pool, so
+    the cost of starting a process and importing the model libraries is paid once per run and not once per
+    `launch_model`. The pool is meant to be created by the pipeline and shared across all the time-series, models and
+    transformations of a run.
+
+    Parameters
+    ----------
+    processes : int
+        Maximum number of worker processes.
+    preload : [str], optional, default None
+        Modules which each worker imports as soon as it is started, e.g. the modules of the models which will be used.
+    threads_per_worker : int, optional, default None
+        Size of the thread pools of the numerical libraries (OpenMP, BLAS, torch) in each worker. Without a limit each
+        library of each worker starts one thread per CPU, and the CPUs end up oversubscribed. If None, the libraries
+        are not limited.
+    cpu_affinity : bool, optional, default False
+        If True, each worker is pinned to its own set of `threads_per_worker` CPUs (or one CPU, if
+        `threads_per_worker` is None), taken in turn from the CPUs available to this process.
+    start_method : str, optional, default None
+        Start method of the worker processes, one of `multiprocessing.get_all_start_methods()`. "spawn" and
+        "forkserver" are safer than "fork" when this process has already initialized libraries with their own
+        threads, like torch. If None, the default start method of the platform is used.
+    memory_limit : int, optional, default None
+        Memory, in bytes, which the running jobs can use altogether. The peak memory of each job is estimated from the
+        peak memory measured on the completed jobs of the same kind (see `MemoryEstimator`), and a job is started only
+        if its estimate fits in the memory left by the running ones; the first job of each kind is a calibration job,
+        which runs alone. So, the number of running jobs can be lower than `processes`, and it changes during the run
+        with the size of the jobs. If None, memory is not taken into account.
+    job_timeout : float, optional, default None
+        Maximum wall-clock time, in seconds, of each job. Jobs can check the time they have left with `job_time_left`
+        and stop on their own; a job which is still running `kill_grace` seconds after its timeout is stopped by
+        terminating its worker, which is replaced by a new one, and it fails with `JobTimeout`. If None, jobs have no
+        timeout.
+    run_budget : float, optional, default None
+        Wall-clock time, in seconds, available to all the jobs of the pool, counted from the first submitted job, or
+        from the first one submitted after `reset_budget`. Once it has run out, the queued jobs are cancelled instead
+        of being started, and fail with `JobCancelled`; running jobs are completed. If None, there is no budget.
+
+    Attributes
+    ----------
+    kill_grace : float
+        Class attribute: seconds after its timeout after which a job is stopped. Default 1.0
+
+    Examples
+    --------
+    >>> with TrainingPool(4) as pool:
+    ...     pool.run([(pow, (2, 3)), (pow, (3, 2))])
+    [8, 9]
+    """
+
+    kill_grace = 1.0
+
+    def __init__(self, processes: int, preload: [str] = None, threads_per_worker: int = None,
+                 cpu_affinity: bool = False, start_method: str = None, memory_limit: int = None,
+                 job_timeout: float = None, run_budget: float = None):
+        self.processes = max(1, processes)
+        self.preload = preload if preload is not None else []
+        self.threads_per_worker = threads_per_worker
+        self.cpu_affinity = cpu_affinity
+        self.context = multiprocessing.get_context(start_method)
+        self.start_method = self.context.get_start_method()
+        self.memory_limit = memory_limit
+        self.memory = MemoryEstimator()
+        self.job_timeout = job_timeout
+        self.run_budget = run_budget
+        self.started_at = None
+        self.started_workers = 0
+        self.workers = []
+        self.connections = []
+
+        self.pending = []
+        self.jobs = {}
+        self.busy = {}
+        self.deadlines = {}
+        self.next_job_id = 0
+
+    def _start_worker(self):
+        if resource_tracker is not None:
+            # Workers have to share the resource tracker of this process, otherwise the shared memory blocks they
+            # attach to would be destroyed when they exit.
+            resource_tracker.ensure_running()
+
+        parent_connection, child_connection = self.context.Pipe()
+        worker = self.context.Process(target=_worker_main,
+                                      args=(child_connection, self.preload, self.threads_per_worker,
+                                            self._worker_cpus(self.started_workers)),
+                                      daemon=True)
+        worker.start()
+        child_connection.close()
+        self.started_workers += 1
+
+        self.workers.append(worker)
+        self.connections.append(parent_connection)
+
+    def _worker_cpus(self, worker_index: int):
+        """
+        Return the CPUs to which the worker number `worker_index` is pinned, or None if `cpu_affinity` is False.
+        """
+        if not self.cpu_affinity:
+            return None
+
+        try:
+            available = sorted(os.sched_getaffinity(0))
+        except AttributeError:
+            return None
+
+        size = min(max(1, self.threads_per_worker or 1), len(available))
+        first = (worker_index * size) % len(available)
+        return [available[(first + i) % len(available)] for i in range(0, size)]
+
+    def submit(self, function, args: tuple, cost: float = 0, callback=None) -> int:
+        """
+        Add a job to the queue of the pool. The job will be executed by the first idle worker, after all the pending
+        jobs with a higher cost.
+
+        Parameters
+        ----------
+        function
+            Function to execute. It must be picklable.
+        args : tuple
+            Arguments of `function`. They must be picklable.
+        cost : float, optional, default 0
+            Estimated cost of the job, in any unit.
+        callback : optional, default None
+            Function called, in this process, as `callback(ok, result)` when the job completes: `ok` is False if the
+            job raised an exception, timed out or has been cancelled, and `result` is the exception in that case.
+
+        Returns
+        -------
+        int
+            Identifier of the job.
+        """
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+        job_id = self.next_job_id
+        self.next_job_id += 1
+        self.jobs[job_id] = (function, args, cost, callback)
+        heapq.heappush(self.pending, (-cost, job_id))
+        return job_id
+
+    def _fits_in_memory(self, job_id: int) -> bool:
+        """
+        Return True if the job `job_id` can be started without exceeding `memory_limit`.
+        """
+        if self.memory_limit is None or len(self.busy) == 0:
+            return True
+
+        function, _, cost, _ = self.jobs[job_id]
+        estimate = self.memory.estimate(_job_kind(function), cost)
+        if estimate is None:
+            # Calibration job: wait for the running jobs to complete.
+            return False
+
+        running = 0
+        for running_id in self.busy.values():
+            running_function, _, running_cost, _ = self.jobs[running_id]
+            running += self.memory.estimate(_job_kind(running_function), running_cost) or 0
+
+        return running + estimate <= self.memory_limit
+
+    def budget_left(self):
+        """
+        Return the seconds left of `run_budget`, or None if there is no budget.
+        """
+        if self.run_budget is None:
+            return None
+        if self.started_at is None:
+            return self.run_budget
+        return self.run_budget - (time.monotonic() - self.started_at)
+
+    def reset_budget(self):
+        """
+        Make the whole `run_budget` available again: it is counted from the first job submitted after this call. The
+        pipeline calls it at the beginning of each computation of the predictions, so that a pool shared by many of
+        them (e.g. the steps of the historical predictions) gives the budget to each one.
+        """
+        self.started_at = None
+
+    def cancel_pending(self, job_ids: [int] = None, reason: str = "the run budget has run out"):
+        """
+        Cancel the queued jobs: they fail with `JobCancelled`, and their callbacks are called. Running jobs are not
+        affected.
+
+        Parameters
+        ----------
+        job_ids : [int], optional, default None
+            Identifiers of the jobs to cancel, if they are still queued. If None, all the queued jobs are cancelled.
+        reason : str, optional
+            Reason of the cancellation, reported in the `JobCancelled` exceptions.
+        """
+        if job_ids is None:
+            # The callbacks of the cancelled jobs may submit other jobs, which are cancelled as well.
+            while len(self.pending) > 0:
+                _, job_id = heapq.heappop(self.pending)
+                self._complete(job_id, False, JobCancelled(f"Job {job_id} cancelled: {reason}."))
+            return
+
+        job_ids = set(job_ids)
+        cancelled = [job_id for _, job_id in self.pending if job_id in job_ids]
+        self.pending = [(cost, job_id) for cost, job_id in self.pending if job_id not in job_ids]
+        heapq.heapify(self.pending)
+        for job_id in sorted(cancelled):
+            self._complete(job_id, False, JobCancelled(f"Job {job_id} cancelled: {reason}."))
+
+    def _complete(self, job_id: int, ok: bool, result, peak_memory: int = 0):
+        function, _, cost, callback = self.jobs.pop(job_id)
+        self.memory.update(_job_kind(function), cost, peak_memory)
+        if not ok and isinstance(result, JobInterrupted):
+            # Timed out or cancelled jobs are expected outcomes, reported by whoever submitted them.
+            log.debug(f"Job {job_id} interrupted: {result}")
+        elif not ok:
+            log.error(f"Job {job_id} failed: {result}")
+        if callback is not None:
+            callback(ok, result)
+
+    def _dispatch(self):
+        budget_left = self.budget_left()
+        if budget_left is not None and budget_left <= 0 and len(self.pending) > 0:
+            log.warning(f"Run budget of {self.run_budget} s exhausted: cancelling {len(self.pending)} queued jobs.")
+            self.cancel_pending()
+
+        while len(self.pending) > 0 and len(self.busy) < self.processes:
+            if not self._fits_in_memory(self.pending[0][1]):
+                log.debug(f"Memory limit reached: {len(self.busy)} jobs running.")
+                break
+
+            idle = [c for c in self.connections if c not in self.busy]
+            if len(idle) == 0:
+                self._start_worker()
+                idle = [self.connections[-1]]
+
+            _, job_id = heapq.heappop(self.pending)
+            function, args, _, _ = self.jobs[job_id]
+            idle[0].send((job_id, function, args, self.job_timeout))
+            self.busy[idle[0]] = job_id
+            if self.job_timeout is not None:
+                self.deadlines[idle[0]] = time.monotonic() + self.job_timeout + self.kill_grace
+
+    def step(self):
+        """
+        Send the pending jobs to the idle workers, then wait for at least one job to complete, or to time out, and call
+        the callbacks of the completed jobs.
+        """
+        self._dispatch()
+        if len(self.busy) == 0:
+            return
+
+        timeout = None
+        if len(self.deadlines) > 0:
+            timeout = max(0.0, min(self.deadlines.values()) - time.monotonic())
+
+        ready = wait([*self.busy], timeout)
+
+        for connection in ready:
+            try:
+                job_id, ok, result, peak_memory = connection.recv()
+            except EOFError:
+                job_id, ok, result = self.busy[connection], False, RuntimeError("Training worker died unexpectedly.")
+                peak_memory = 0
+                self._remove_worker(connection)
+            del self.busy[connection]
+            self.deadlines.pop(connection, None)
+
+            self._complete(job_id, ok, result, peak_memory)
+
+        now = time.monotonic()
+        for connection, deadline in [*self.deadlines.items()]:
+            if connection not in ready and deadline <= now:
+                job_id = self.busy.pop(connection)
+                del self.deadlines[connection]
+                # The worker may be stuck in native code: the only way to stop it is to terminate it.
+                self._remove_worker(connection)
+                self._complete(job_id, False, JobTimeout(f"Job {job_id} timed out after {self.job_timeout} s."))
+
+    def run(self, jobs: [tuple], costs: [float] = None) -> list:
+        """
+        Execute `jobs` on the workers of the pool and return their results.
+
+        Jobs are kept in a queue ordered by estimated cost, and each worker receives the most expensive pending job as
+        soon as it is idle. Starting from the longest jobs and letting the short ones fill the gaps keeps all the
+        workers busy until the end, so the completion time gets close to the total work divided by the number of
+        workers.
+
+        Parameters
+        ----------
+        jobs : [tuple]
+            Jobs to execute, as `(function, args)` tuples. `function` and `args` must be picklable.
+        costs : [float], optional, default None
+            Estimated cost of each job, in any unit. If None, jobs are executed in the given order.
+
+        Returns
+        -------
+        list
+            Result of each job, in the same order of `jobs`. If a job raised an exception, the exception is re-raised
+            once all the other jobs have completed. The result of a job which timed out or has been cancelled is its
+            `JobInterrupted` exception.
+        """
+        return self.run_steps([_single_step(jobs, costs)])[0]
+
+    def run_steps(self, steps: list) -> list:
+        """
+        Run concurrently a set of computations made of steps, sharing the workers of the pool.
+
+        Each computation is a generator which yields batches of jobs, as lists of `(function, args, cost)` tuples, and
+        receives back the list of their results; the value returned by the generator is the result of the
+        computation. The jobs of all the computations are scheduled together, from the most expensive, so many small
+        computations can keep all the workers busy.
+
+        Parameters
+        ----------
+        steps : list
+            Generators of the computations.
+
+        Returns
+        -------
+        list
+            Result of each computation, in the same order of `steps`. Jobs which timed out or have been cancelled do not
+            stop their computation: their `JobInterrupted` exception is given back as their result, and the computation
+            can go on without them; a computation which raises a `JobInterrupted` exception has it as its result.
+
+            If a job raised any other exception, the queued jobs of the same batch are cancelled and the running ones
+            are waited for; then the computation is stopped (closing its generator, so that it can clean up) and the
+            results of the other jobs of the batch are discarded, unlinking the `SharedFrame` they contain (see
+            `unlink_shared`). The exception is re-raised once all the other computations have completed.
+        """
+        outputs = [None] * len(steps)
+        errors = []
+        running = {}
+
+        def stop(index: int, error: Exception, results: list):
+            del running[index]
+            # Let the computation clean up, e.g. unlink its shared memory blocks.
+            steps[index].close()
+            for result in results:
+                unlink_shared(result)
+            errors.append(error)
+
+        def advance(index: int, results: list = None):
+            try:
+                batch = steps[index].send(results)
+            except StopIteration as e:
+                outputs[index] = e.value
+                return
+            except JobInterrupted as e:
+                outputs[index] = e
+                return
+            except Exception as e:
+                errors.append(e)
+                return
+
+            running[index] = [None] * len(batch)
+            remaining = [len(batch)]
+            failure = []
+            job_ids = []
+
+            def callback_for(position: int):
+                def callback(ok, result):
+                    if index not in running:
+                        return
+                    remaining[0] -= 1
+                    if not ok and not isinstance(result, JobInterrupted):
+                        if len(failure) == 0:
+                            failure.append(result)
+                            # The other jobs of the batch are useless now: do not start the queued ones.
+                            self.cancel_pending(job_ids, "another job of its computation has failed")
+                    else:
+                        running[index][position] = result
+
+                    # The cancellation of the other jobs may have already completed the batch.
+                    if remaining[0] == 0 and index in running:
+                        if len(failure) > 0:
+                            stop(index, failure[0], running[index])
+                        else:
+                            advance(index, running.pop(index))
+                return callback
+
+            if len(batch) == 0:
+                advance(index, running.pop(index))
+            for position, (function, args, cost) in enumerate(batch):
+                job_ids.append(self.submit(function, args, cost, callback_for(position)))
+
+        for i in range(0, len(steps)):
+            advance(i)
+
+        while len(running) > 0:
+            self.step()
+
+        if len(errors) > 0:
+            raise errors[0]
+
+        return outputs
+
+    def _remove_worker(self, connection):
+        index = self.connections.index(connection)
+        worker = self.workers.pop(index)
+        self.connections.pop(index)
+        connection.close()
+        if worker.is_alive():
+            worker.terminate()
+        worker.join()
+
+    def close(self):
+        """
+        Stop all the workers of the pool.
+        """
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+
+        for worker, connection in zip(self.workers, self.connections):
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+            connection.close()
+
+        self.workers = []
+        self.connections = []
+        self.busy = {}
+        self.deadlines = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
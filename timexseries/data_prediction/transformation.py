@@ -214,6 +214,10 @@ class Diff(Transformation):
         return "differentiate (1)"
 
 
+# Names of the transformations accepted by `transformation_factory`.
+TRANSFORMATIONS = ("log", "log_modified", "none", "diff", "yeo_johnson")
+
+
 def transformation_factory(tr_class: str) -> Transformation:
     """
     Given the type of the transformation, encoded as string, return the Transformation object.
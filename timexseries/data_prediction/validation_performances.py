@@ -1,4 +1,4 @@
-from math import sqrt
+from math import sqrt, isnan
 
 from pandas import DataFrame, Series
 from sklearn.metrics import mean_squared_error, mean_absolute_error
@@ -27,6 +27,8 @@ class ValidationPerformance:
     SD: float
         Standard deviation of error. Default 0
     """
+    __slots__ = ('first_used_index', 'MSE', 'RMSE', 'MAE', 'AM', 'SD')
+
     def __init__(self, first_used_index=None):
         self.first_used_index = first_used_index
         self.MSE = 0
@@ -35,6 +37,13 @@ class ValidationPerformance:
         self.AM = 0
         self.SD = 0
 
+    def __setstate__(self, state):
+        # Objects pickled before the introduction of `__slots__` carry their attributes in a plain dict.
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+
     def set_testing_stats(self, actual: Series, predicted: Series):
         """
         Set all the statistical indexes according to input data.
@@ -88,7 +97,150 @@ class ValidationPerformance:
         {'first_used_index': None, 'MSE': 4.0, 'RMSE': 2.0, 'MAE': 2.0, 'AM': -2.0, 'SD': 0.0}
         """
         d = {}
-        for attribute, value in self.__dict__.items():
-            d[attribute] = value
+        for attribute in self.__slots__:
+            d[attribute] = getattr(self, attribute)
+
+        return d
+
+
+class ErrorAccumulator:
+    """
+    Streaming counterpart of `ValidationPerformance`, useful when the errors of a model become available one point at a
+    time (e.g. historical predictions). Each update costs O(1): the mean and the standard deviation of the errors are
+    kept with Welford's algorithm, MAE and MSE with running sums.
+
+    Attributes
+    ----------
+    first_used_index
+        Index of the first point accumulated. Default None
+    last_index
+        Index of the last point accumulated. Default None
+    count : int
+        Number of accumulated points. Default 0
+    """
+    __slots__ = ('first_used_index', 'last_index', 'last_error', 'count', 'absolute_sum', 'squared_sum', 'mean', 'm2')
+
+    def __init__(self):
+        self.first_used_index = None
+        self.last_index = None
+        self.last_error = 0.0
+        self.count = 0
+        self.absolute_sum = 0.0
+        self.squared_sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, index, actual: float, predicted: float, previous_prediction: float = None):
+        """
+        Accumulate the error of the prediction for the point `index`. Points should be given in chronological order;
+        if `index` is the same of the last accumulated point, its old contribution is replaced. NaN values are ignored.
+
+        A point accumulated before the last one can be predicted again, e.g. when historical predictions are
+        re-computed, passing its old prediction in `previous_prediction`: its old contribution is then replaced by the
+        new one, instead of counting the point twice.
+
+        Parameters
+        ----------
+        index
+            Index of the point.
+        actual : float
+            Actual value of the point.
+        predicted : float
+            Predicted value of the point.
+        previous_prediction : float, optional, default None
+            Prediction of the point already accumulated, if any. NaN if the point has not been accumulated.
+
+        Examples
+        --------
+        >>> acc = ErrorAccumulator()
+        >>> acc.update(pd.Timestamp("2000-01-01"), 1, 3)
+        >>> acc.update(pd.Timestamp("2000-01-02"), 1, 4)
+        >>> acc.get_validation_performance().get_dict()
+        {'first_used_index': Timestamp('2000-01-01 00:00:00'), 'MSE': 6.5, 'RMSE': 2.5495097567963922, 'MAE': 2.5,
+        'AM': -2.5, 'SD': 0.5}
+        >>> acc.update(pd.Timestamp("2000-01-01"), 1, 2, previous_prediction=3)
+        >>> acc.get_validation_performance().MAE
+        2.0
+        """
+        error = float(actual) - float(predicted)
+
+        if previous_prediction is not None:
+            previous_error = float(actual) - float(previous_prediction)
+            if not isnan(previous_error) and self.count > 0:
+                self._remove(previous_error)
+        elif not isnan(error) and self.count > 0 and index == self.last_index:
+            self._remove(self.last_error)
+
+        if isnan(error):
+            return
 
-        return d
\ No newline at end of file
+        if self.count == 0 and self.first_used_index is None:
+            self.first_used_index = index
+
+        self.count += 1
+        self.absolute_sum += abs(error)
+        self.squared_sum += error ** 2
+        delta = error - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (error - self.mean)
+
+        if self.last_index is None or index >= self.last_index:
+            self.last_index = index
+            self.last_error = error
+
+    def _remove(self, error: float):
+        if self.count == 1:
+            first_used_index = self.first_used_index
+            self.__init__()
+            self.first_used_index = first_used_index
+            return
+
+        self.absolute_sum -= abs(error)
+        self.squared_sum -= error ** 2
+        delta = error - self.mean
+        self.mean -= delta / (self.count - 1)
+        self.m2 -= delta * (error - self.mean)
+        self.count -= 1
+
+    def get_validation_performance(self) -> ValidationPerformance:
+        """
+        Return the statistics accumulated so far, in a `ValidationPerformance`.
+
+        Returns
+        -------
+        ValidationPerformance
+            Statistics of the accumulated errors. All zeros if no point has been accumulated.
+        """
+        tp = ValidationPerformance(self.first_used_index)
+        if self.count == 0:
+            return tp
+
+        tp.MAE = self.absolute_sum / self.count
+        tp.MSE = self.squared_sum / self.count
+        tp.RMSE = sqrt(tp.MSE)
+        tp.AM = self.mean
+        tp.SD = sqrt(max(self.m2, 0.0) / self.count)
+        return tp
+
+    @classmethod
+    def from_series(cls, actual: Series, predicted: Series) -> 'ErrorAccumulator':
+        """
+        Create an `ErrorAccumulator` with all the points of `predicted` for which an `actual` value is available.
+
+        Parameters
+        ----------
+        actual : Series
+            Actual data stored in a Pandas Series.
+        predicted : Series
+            Data predicted by a model, stored in a Pandas Series.
+
+        Returns
+        -------
+        ErrorAccumulator
+            Accumulator of the errors.
+        """
+        acc = cls()
+        for index, value in predicted.items():
+            if index in actual.index:
+                acc.update(index, actual[index], value)
+        return acc
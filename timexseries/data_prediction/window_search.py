@@ -0,0 +1,297 @@
+import math
+
+
+class WindowSearch:
+    """
+    Super-class used to represent the strategies with which the training windows of a model are explored.
+
+    Training windows are identified by their index `i`: the window `i` is composed of the last
+    `(i + 1) * delta_training_values` values of the training set, so windows with higher index are longer.
+
+    A strategy is used in an ask/tell fashion: `ask` returns the windows which should be evaluated next, and the
+    validation error obtained by each of them is given back to the strategy with `tell`. The search is over when `ask`
+    returns an empty list.
+
+    Parameters
+    ----------
+    windows_number : int
+        Number of available training windows.
+    batch_size : int, optional, default 1
+        Preferred number of windows returned by each `ask`, e.g. the number of processes which can evaluate them
+        concurrently.
+    """
+
+    def __init__(self, windows_number: int, batch_size: int = 1):
+        self.windows_number = windows_number
+        self.batch_size = max(1, batch_size)
+        self.errors = {}
+
+    def ask(self) -> [int]:
+        """
+        Return the indexes of the windows which should be evaluated next. An empty list means that the search is over.
+
+        Returns
+        -------
+        [int]
+            Indexes of the windows to evaluate.
+        """
+        pass
+
+    def tell(self, window: int, error: float):
+        """
+        Give back to the strategy the validation error obtained by the model trained on the window `window`.
+
+        Parameters
+        ----------
+        window : int
+            Index of the evaluated window.
+        error : float
+            Validation error, measured with the main accuracy estimator of the model; lower is better.
+        """
+        self.errors[window] = error if not math.isnan(error) else math.inf
+
+
+class Exhaustive(WindowSearch):
+    """
+    Evaluate all the windows, all at once. This is the classic behaviour of TIMEX.
+    """
+
+    def __init__(self, windows_number: int, batch_size: int = 1):
+        super().__init__(windows_number, batch_size)
+        self.asked = False
+
+    def ask(self) -> [int]:
+        if self.asked:
+            return []
+        self.asked = True
+        return [*range(0, self.windows_number)]
+
+
+class Patience(WindowSearch):
+    """
+    Evaluate the windows from the shortest to the longest, `batch_size` at a time, and stop as soon as `patience`
+    consecutive windows did not improve the best validation error found so far.
+
+    Parameters
+    ----------
+    patience : int, optional, default 3
+        Number of consecutive windows without improvement after which the search stops.
+    """
+
+    def __init__(self, windows_number: int, batch_size: int = 1, patience: int = 3):
+        super().__init__(windows_number, batch_size)
+        self.patience = max(1, patience)
+        self.next_window = 0
+
+    def _windows_without_improvement(self) -> int:
+        best_error = math.inf
+        without_improvement = 0
+        for window in range(0, self.next_window):
+            if self.errors[window] < best_error:
+                best_error = self.errors[window]
+                without_improvement = 0
+            else:
+                without_improvement += 1
+        return without_improvement
+
+    def ask(self) -> [int]:
+        if self.next_window >= self.windows_number or self._windows_without_improvement() >= self.patience:
+            return []
+
+        windows = [*range(self.next_window, min(self.next_window + self.batch_size, self.windows_number))]
+        self.next_window = windows[-1] + 1
+        return windows
+
+
+class SuccessiveHalving(WindowSearch):
+    """
+    Coarse-to-fine search over the windows. The first rung evaluates one window every `eta ** k` windows, with `k` the
+    largest exponent which still gives at least `eta` windows; every following rung keeps only the best `1 / eta` of the
+    windows of the previous rung, divides the spacing by `eta` and evaluates the neighbours of the kept windows at the
+    new spacing. The search is over after the rung with spacing 1.
+
+    Parameters
+    ----------
+    eta : int, optional, default 3
+        Reduction factor between two rungs.
+    """
+
+    def __init__(self, windows_number: int, batch_size: int = 1, eta: int = 3):
+        super().__init__(windows_number, batch_size)
+        self.eta = max(2, eta)
+        self.stride = 1
+        while self.windows_number / (self.stride * self.eta) >= self.eta:
+            self.stride *= self.eta
+        self.rung = [*range(0, self.windows_number, self.stride)]
+        if self.windows_number - 1 not in self.rung:
+            self.rung.append(self.windows_number - 1)
+        self.pending = [*self.rung]
+
+    def ask(self) -> [int]:
+        if self.pending:
+            windows = self.pending
+            self.pending = []
+            return windows
+
+        if self.stride == 1:
+            return []
+
+        self.rung = sorted(self.rung, key=lambda w: (self.errors[w], w))[:math.ceil(len(self.rung) / self.eta)]
+        self.stride = self.stride // self.eta
+
+        windows = set()
+        for window in self.rung:
+            for j in range(1, self.eta):
+                for neighbour in [window - j * self.stride, window + j * self.stride]:
+                    if 0 <= neighbour < self.windows_number and neighbour not in self.errors:
+                        windows.add(neighbour)
+
+        self.rung = self.rung + sorted(windows)
+        self.pending = sorted(windows)
+        return self.ask()
+
+
+class Geometric(WindowSearch):
+    """
+    Evaluate, all at once, the windows whose lengths grow geometrically: the window `i` is evaluated if its length is
+    the first one not shorter than `ratio ** k` times `delta_training_values`, for some integer `k`, i.e. windows 0, 1,
+    3, 7, 15... with `ratio` 2. The longest window is always evaluated. The number of evaluated windows grows with the
+    logarithm of the number of windows.
+
+    Parameters
+    ----------
+    ratio : float, optional, default 2
+        Ratio between the lengths of two consecutive evaluated windows.
+    """
+
+    def __init__(self, windows_number: int, batch_size: int = 1, ratio: float = 2):
+        super().__init__(windows_number, batch_size)
+        self.ratio = max(1.1, ratio)
+        self.asked = False
+
+    def ask(self) -> [int]:
+        if self.asked:
+            return []
+        self.asked = True
+
+        windows = set()
+        length = 1.0
+        while length < self.windows_number:
+            windows.add(math.ceil(length - 1e-9) - 1)
+            length *= self.ratio
+        windows.add(self.windows_number - 1)
+        return sorted(windows)
+
+
+class GoldenSection(WindowSearch):
+    """
+    Search of the window with the lowest validation error which assumes that the error, as a function of the window,
+    has a single minimum. The search keeps a bracket of windows which contains the minimum, initially all of them:
+    after each batch, the bracket shrinks to the windows between the two evaluated neighbours of the best window found
+    so far. The search is over when all the windows in the bracket have been evaluated, so the number of evaluated
+    windows grows with the logarithm of the number of windows.
+
+    With `batch_size` 1, this is a golden-section search: the window evaluated next divides the larger of the two parts
+    of the bracket around the best window in the golden ratio, so that the bracket shrinks geometrically. With larger
+    batches, `batch_size` windows evenly spaced in the bracket are evaluated at the same time.
+    """
+
+    def __init__(self, windows_number: int, batch_size: int = 1):
+        super().__init__(windows_number, batch_size)
+        self.low = 0
+        self.high = windows_number - 1
+
+    def _shrink_bracket(self):
+        evaluated = sorted(w for w in self.errors if self.low <= w <= self.high)
+        if len(evaluated) == 0:
+            return
+
+        best = min(range(0, len(evaluated)), key=lambda i: (self.errors[evaluated[i]], evaluated[i]))
+        if best > 0:
+            self.low = evaluated[best - 1]
+        if best < len(evaluated) - 1:
+            self.high = evaluated[best + 1]
+
+    def ask(self) -> [int]:
+        self._shrink_bracket()
+
+        candidates = [w for w in range(self.low, self.high + 1) if w not in self.errors]
+        if len(candidates) <= self.batch_size:
+            return candidates
+
+        if self.batch_size == 1:
+            inner = [w for w in self.errors if self.low < w < self.high]
+            if len(inner) == 0:
+                targets = [self.low + (self.high - self.low) * (3 - math.sqrt(5)) / 2]
+            else:
+                best = min(inner, key=lambda w: (self.errors[w], w))
+                if self.high - best > best - self.low:
+                    targets = [best + (self.high - best) * (3 - math.sqrt(5)) / 2]
+                else:
+                    targets = [best - (best - self.low) * (3 - math.sqrt(5)) / 2]
+        else:
+            targets = [self.low + (self.high - self.low) * (i + 1) / (self.batch_size + 1)
+                       for i in range(0, self.batch_size)]
+
+        windows = []
+        for target in targets:
+            window = min(candidates, key=lambda w: (abs(w - target), w))
+            candidates.remove(window)
+            windows.append(window)
+        return sorted(windows)
+
+
+# Names of the strategies accepted by `window_search_factory`.
+STRATEGIES = ("exhaustive", "patience", "successive_halving", "geometric", "golden_section")
+
+
+def window_search_factory(strategy: str, windows_number: int, batch_size: int = 1, patience: int = 3,
+                          eta: int = 3, ratio: float = 2) -> WindowSearch:
+    """
+    Given the name of the window search strategy, return the WindowSearch object.
+
+    Parameters
+    ----------
+    strategy : str
+        Strategy name. One of "exhaustive", "patience", "successive_halving", "geometric", "golden_section".
+    windows_number : int
+        Number of available training windows.
+    batch_size : int, optional, default 1
+        Preferred number of windows evaluated at the same time.
+    patience : int, optional, default 3
+        Used by the "patience" strategy.
+    eta : int, optional, default 3
+        Used by the "successive_halving" strategy.
+    ratio : float, optional, default 2
+        Used by the "geometric" strategy.
+
+    Returns
+    -------
+    WindowSearch
+        WindowSearch object.
+
+    Examples
+    --------
+    >>> search = window_search_factory("patience", 10, patience=2)
+    >>> search.ask()
+    [0]
+    >>> search.tell(0, 3.0)
+    >>> search.ask()
+    [1]
+    >>> search.tell(1, 4.0)
+    >>> search.ask()
+    [2]
+    >>> search.tell(2, 5.0)
+    >>> search.ask()
+    []
+    """
+    if strategy == "patience":
+        return Patience(windows_number, batch_size, patience)
+    elif strategy == "successive_halving":
+        return SuccessiveHalving(windows_number, batch_size, eta)
+    elif strategy == "geometric":
+        return Geometric(windows_number, batch_size, ratio)
+    elif strategy == "golden_section":
+        return GoldenSection(windows_number, batch_size)
+    else:
+        return Exhaustive(windows_number, batch_size)
@@ -3,6 +3,8 @@ import pandas as pd
 from pandas import DataFrame
 from statsmodels.tsa.stattools import grangercausalitytests
 
+from timexseries.data_prediction.config import compile_config
+
 
 def calc_xcorr(target: str, ingested_data: DataFrame, max_lags: int, modes: [str] = ["pearson"]) -> dict:
     """
@@ -241,8 +243,9 @@ def calc_all_xcorr(ingested_data: DataFrame, param_config: dict) -> dict:
                              1   0.239430  0.177921
                              2   0.287681 -0.063331}}
     """
+    param_config = compile_config(param_config)
     xcorr_max_lags = param_config['xcorr_parameters']['xcorr_max_lags']
-    xcorr_modes = [*param_config['xcorr_parameters']["xcorr_mode"].split(",")]
+    xcorr_modes = [*param_config.xcorr_modes]
     d = {}
     for col in ingested_data.columns:
         d[col] = calc_xcorr(col, ingested_data, max_lags=xcorr_max_lags, modes=xcorr_modes)
@@ -1,30 +1,65 @@
+from __future__ import annotations
+
+import importlib
 import logging
 import gettext
 import pathlib
 import os
+from typing import TYPE_CHECKING
 
 import pandas
 from pandas import Grouper, DataFrame
-import plotly.graph_objects as go
 import numpy as np
 
-import dash_core_components as dcc
-import dash_html_components as html
-from plotly.subplots import make_subplots
-import networkx as nx
-import dash_bootstrap_components as dbc
-
-from colorhash import ColorHash
-from statsmodels.tsa.seasonal import seasonal_decompose
-
-from timexseries.data_prediction import ValidationPerformance
-from timexseries.data_prediction.models.predictor import SingleResult
 import calendar
 
 from timexseries.timeseries_container import TimeSeriesContainer
 
+if TYPE_CHECKING:
+    from timexseries.data_prediction.validation_performances import ValidationPerformance
+    from timexseries.data_prediction.models.predictor import SingleResult
+
 log = logging.getLogger(__name__)
 
+
+class _LazyModule:
+    """
+    Placeholder of a module which is imported the first time one of its attributes is used. The visualization libraries
+    (dash, plotly, networkx...) take seconds to import, and most of the processes which import this module, e.g. the
+    training workers, never draw anything.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+go = _LazyModule("plotly.graph_objects")
+dcc = _LazyModule("dash_core_components")
+html = _LazyModule("dash_html_components")
+nx = _LazyModule("networkx")
+dbc = _LazyModule("dash_bootstrap_components")
+
+
+def make_subplots(*args, **kwargs):
+    from plotly.subplots import make_subplots
+    return make_subplots(*args, **kwargs)
+
+
+def ColorHash(*args, **kwargs):
+    from colorhash import ColorHash
+    return ColorHash(*args, **kwargs)
+
+
+def seasonal_decompose(*args, **kwargs):
+    from statsmodels.tsa.seasonal import seasonal_decompose
+    return seasonal_decompose(*args, **kwargs)
+
 # Default method to get a translated text.
 _ = lambda x: x
 
@@ -134,25 +169,31 @@ def create_timeseries_dash_children(timeseries_container: TimeSeriesContainer, p
 
         for model_name in models:
             model = models[model_name]
-            model_results = model.results
+            model_results = model.table
             model_characteristic = model.characteristics
 
             test_values = model_characteristic["test_values"]
             main_accuracy_estimator = model_parameters["main_accuracy_estimator"]
-            model_results.sort(key=lambda x: getattr(x.testing_performances, main_accuracy_estimator.upper()))
+            sorted_windows = model_results.argsort(main_accuracy_estimator)
 
-            best_prediction = model_results[0].prediction
-            testing_performances = [x.testing_performances for x in model_results]
+            best_prediction = model_results.prediction(sorted_windows[0])
+            testing_performances = [model_results.performance(i) for i in sorted_windows]
 
             children.extend([
                 html.H4(f"{model_name}"),
                 characteristics_list(model_characteristic, testing_performances),
                 # html.Div("Testing performance:"),
                 # html.Ul([html.Li(key + ": " + str(testing_performances[key])) for key in testing_performances]),
-                prediction_plot(timeseries_data, best_prediction, test_values),
-                performance_plot(timeseries_data, best_prediction, testing_performances, test_values),
             ])
 
+            # The forecasts of the training windows may have been discarded, according to `results_retention`.
+            if best_prediction is not None:
+                children.append(prediction_plot(timeseries_data, best_prediction, test_values))
+            else:
+                best_prediction = model.best_prediction.copy()
+
+            children.append(performance_plot(timeseries_data, best_prediction, testing_performances, test_values))
+
             # EXTRA
             # Warning: this will plot every model result, with every training set used!
             # children.extend(plot_every_prediction(ingested_data, model_results, main_accuracy_estimator, test_values))
@@ -163,10 +204,16 @@ def create_timeseries_dash_children(timeseries_container: TimeSeriesContainer, p
             html.Div(_("For every model the best predictions for each past date are plotted."))
         ])
         for model in timeseries_container.historical_prediction:
+            try:
+                historical_performance = timeseries_container.historical_performance[model]
+            except (KeyError, TypeError):
+                historical_performance = None
+
             children.extend([
                 html.H4(f"{model}"),
                 historical_prediction_plot(timeseries_data, timeseries_container.historical_prediction[model],
-                                           timeseries_container.models[model].best_prediction)
+                                           timeseries_container.models[model].best_prediction,
+                                           historical_performance)
             ])
 
     return children
@@ -868,7 +915,8 @@ def prediction_plot(df: DataFrame, predicted_data: DataFrame, test_values: int =
 
 
 def historical_prediction_plot(real_data: DataFrame, historical_prediction: DataFrame,
-                               future_prediction: DataFrame) -> html.Div:
+                               future_prediction: DataFrame,
+                               historical_performance: ValidationPerformance = None) -> html.Div:
     """
     Create and return a plot which contains the best prediction found by this model for this time series, along with
     the historical prediction. The plot of the error is also drawn.
@@ -887,6 +935,11 @@ def historical_prediction_plot(real_data: DataFrame, historical_prediction: Data
         Best prediction, corresponding to the `best_prediction` attribute of a
         `timexseries.data_prediction.models.predictor.ModelResult`.
 
+    historical_performance : ValidationPerformance, optional, default None
+        Error statistics of the historical prediction, e.g. the ones accumulated by
+        `timexseries.data_prediction.pipeline.compute_historical_predictions`. If not given, they are computed from
+        `real_data` and `historical_prediction`.
+
     Returns
     -------
     g : dcc.Graph
@@ -904,9 +957,13 @@ def historical_prediction_plot(real_data: DataFrame, historical_prediction: Data
 
     validation_real_data = real_data.loc[first_predicted_index:, timeseries_name]
 
-    testing_performance = ValidationPerformance(first_predicted_index)
-    testing_performance.set_testing_stats(actual=validation_real_data,
-                                          predicted=historical_prediction.loc[:last_real_index, timeseries_name])
+    if historical_performance is not None:
+        testing_performance = historical_performance
+    else:
+        from timexseries.data_prediction.validation_performances import ValidationPerformance
+        testing_performance = ValidationPerformance(first_predicted_index)
+        testing_performance.set_testing_stats(actual=validation_real_data,
+                                              predicted=historical_prediction.loc[:last_real_index, timeseries_name])
     new_children.extend([
         html.Div(_("This model, during the history, reached these performances on unseen data:")),
         show_errors(testing_performance),
@@ -1095,6 +1152,11 @@ def characteristics_list(model_characteristics: dict, testing_performances: [Val
                                          + "%" + _(' of the length of the time series.'),
             "delta_training_values": _('Training windows are composed of ') + value + _(' values.'),
             "extra_regressors": _("The model has used ") + value + _(" as extra-regressor(s) to improve the training."),
+            "window_search": _('Training windows have been chosen with the ') + value + _(' search strategy.'),
+            "evaluated_windows": _('The model has been trained on ') + value + _(' different training windows.'),
+            "epochs": _('The network has been trained for ') + value + _(' epochs.'),
+            "training_time": _('The final training has taken ') + value + _(' seconds.'),
+            "global_model": _('A single network has been trained on all the time-series.'),
             "transformation": _('The model has used a ') + value + _(
                 ' transformation on the input data.') if value != "none "
             else _('The model has not used any pre/post transformation on input data.')
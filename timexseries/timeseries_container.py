@@ -19,12 +19,18 @@ class TimeSeriesContainer:
         This is useful to verify the performances of each model not only on the very last data, but throughout the
         history of the time-series, in a cross-validation fashion. This dictionary contains one entry for each model
         tested.
+    historical_performance : dict
+        Error statistics of the historical prediction, one `ValidationPerformance` for each model tested. They are
+        accumulated while the historical prediction is computed.
     """
-    def __init__(self, timeseries_data: DataFrame, models: dict, xcorr: dict, historical_prediction: dict = None):
+    def __init__(self, timeseries_data: DataFrame, models: dict, xcorr: dict, historical_prediction: dict = None,
+                 historical_performance: dict = None):
         self.timeseries_data = timeseries_data
         self.models = models
         self.xcorr = xcorr
         self.historical_prediction = historical_prediction
+        self.historical_performance = historical_performance
 
-    def set_historical_prediction(self, historical_prediction):
+    def set_historical_prediction(self, historical_prediction, historical_performance=None):
         self.historical_prediction = historical_prediction
+        self.historical_performance = historical_performance